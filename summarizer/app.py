@@ -1,10 +1,14 @@
 import streamlit as st
 from scripts import dataIngestion
-from scripts import collecting
-from scripts.extra_features import extract_entities, analyze_sentiment, export_summary_to_pdf
+from scripts.analysis import analyze_many
+from scripts.extra_features import export_summary_to_pdf
+from scripts import instrument, registry
+from scripts.archive import get_archive
+from scripts.cache import document_key, get_cache
 import os
 import tempfile
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 
 
@@ -121,6 +125,90 @@ def render_entities(entities):
             st.table(df)
 
 
+# === Result Renderers ===
+def render_category(result):
+    st.markdown(f'''
+        <div class="output-box">
+            <h3>📌 Predicted Category</h3>
+            <p>{result["category"]}</p>
+        </div>
+    ''', unsafe_allow_html=True)
+
+
+def render_summary(result):
+    st.markdown(f'''
+        <div class="output-box">
+            <h3>📝 Summary</h3>
+            <p>{result["summary"]}</p>
+        </div>
+    ''', unsafe_allow_html=True)
+
+
+def render_keywords(result):
+    lda_topics = result["lda_topics"]
+    if lda_topics:
+        keywords_html = "".join(
+            f"<span style='background:#17a2b8; color:#fff; padding:4px 8px; margin:2px; border-radius:4px;'>{word}</span>"
+            for word, _ in lda_topics[0][1])
+        st.markdown(f"<div class='output-box'><h3>🔑 Keywords</h3><p>{keywords_html}</p></div>", unsafe_allow_html=True)
+    else:
+        st.warning("No keywords found.")
+
+
+def render_fake_news(result):
+    label, confidence = result["fake_news_label"], result["fake_news_confidence"]
+    st.subheader("Fake News Detection")
+    if label == "FAKE":
+        st.error(f"Prediction: {label} (Confidence: {confidence})")
+    else:
+        st.success(f"Prediction: {label} (Confidence: {confidence})")
+
+    # Long documents are scored window by window
+    if result.get("fake_news_windows"):
+        with st.expander("🪟 Fake News Score per Section"):
+            windows_df = pd.DataFrame(result["fake_news_windows"])
+            st.bar_chart(windows_df.set_index("start_token")["fake_probability"])
+            st.table(windows_df)
+
+
+def render_sentiment(result):
+    st.markdown(f"""
+        <div style="background-color:#e9f7ef; border-radius:10px; text-align:center; padding:30px; margin-top:30px;">
+            <h3 style="color:#2e7d32;">Overall Sentiment</h3>
+            <p style="font-size:22px; font-weight:bold; color:#2e7d32;">{result["sentiment"]}</p>
+        </div>
+    """, unsafe_allow_html=True)
+
+
+# Display order of the result blocks
+STAGES = ("category", "summary", "lda_topics", "entities", "fake_news", "sentiment")
+STAGE_TITLES = {
+    "category": "Predicting category",
+    "summary": "Summarizing",
+    "lda_topics": "Extracting keywords",
+    "entities": "Finding named entities",
+    "fake_news": "Checking for fake news",
+    "sentiment": "Analyzing sentiment",
+}
+RENDERERS = {
+    "category": render_category,
+    "summary": render_summary,
+    "lda_topics": render_keywords,
+    "entities": lambda result: render_entities(result["entities"]),
+    "fake_news": render_fake_news,
+    "sentiment": render_sentiment,
+}
+
+
+# === Stage Pool ===
+# The stages of one analysis run concurrently on this pool. Models are shared through
+# the registry, which also picks up newly published versions, and stage outputs are
+# kept in the result cache, so widget interactions don't rerun the models.
+@st.cache_resource(show_spinner=False)
+def stage_pool():
+    return ThreadPoolExecutor(max_workers=len(STAGES), thread_name_prefix="newssense-stage")
+
+
 # === Title ===
 st.markdown('<h1 class="main-title">📰 NewsSense: Smart News Analyzer</h1>', unsafe_allow_html=True)
 
@@ -146,11 +234,12 @@ elif input_option == "YouTube":
     if st.sidebar.button("Extract Transcript and Analyze"):
         if yt_url:
             article_text = dataIngestion.extract_text_from_youtube(yt_url)
-elif input_option == "Upload Image":
-    image_file = st.sidebar.file_uploader("Upload an image", type=["png", "jpg", "jpeg"])
+elif input_option == "image":
+    image_files = st.sidebar.file_uploader("Upload images", type=["png", "jpg", "jpeg", "tif", "tiff"],
+                                           accept_multiple_files=True)
     if st.sidebar.button("Process Image"):
-        if image_file is not None:
-            article_text = dataIngestion.extract_text_from_image(image_file)
+        if image_files:
+            article_text = "\n\n".join(dataIngestion.extract_text_from_images(image_files))
         else:
             st.sidebar.warning("Please upload an image.")
 else:
@@ -160,6 +249,7 @@ else:
             st.sidebar.warning("Please enter some text")
 
 show_notes = st.sidebar.checkbox("📝 Take Notes", value=False)
+show_metrics = st.sidebar.checkbox("🐞 Show Performance Metrics", value=False)
 
 if show_notes:
     user_input_note = st.sidebar.text_area(
@@ -187,70 +277,95 @@ if article_text:
     if language != 'English':
         with st.expander("🌐 Translated Input"):
                 article_text = dataIngestion.translate_to_english(article_text, src_lang='hi' if language == 'Hindi' else 'te')
-   
-    with st.spinner("🔍 Analyzing the article... Please wait."):
-
-        category = collecting.predict_category(article_text)
-        summary_abs = collecting.get_summary(article_text)
-        lda_topics = collecting.topic_modeling(article_text)
-        entities = extract_entities(article_text)
-        sentiment = analyze_sentiment(article_text)
-
-        st.session_state.update({
-            "category": category,
-            "summary": summary_abs,
-            "lda_topics": lda_topics,
-            "sentiment": sentiment,
-            "entities": entities,
-        })
-
-    st.success("✅ Analysis complete! Scroll down to view the results.")
 
     # === Extracted Text Preview ===
     with st.expander("📄 Extracted Text (First 1000 Characters)"):
         st.write(article_text[:1000])
 
-    # === Display Results ===
-    st.markdown(f'''
-        <div class="output-box">
-            <h3>📌 Predicted Category</h3>
-            <p>{category}</p>
-        </div>
-    ''', unsafe_allow_html=True)
-
-    st.markdown(f'''
-        <div class="output-box">
-            <h3>📝 Summary</h3>
-            <p>{summary_abs}</p>
-        </div>
-    ''', unsafe_allow_html=True)
-
-    if lda_topics:
-        keywords_html = "".join(
-            f"<span style='background:#17a2b8; color:#fff; padding:4px 8px; margin:2px; border-radius:4px;'>{word}</span>"
-            for word, _ in lda_topics[0][1])
-        st.markdown(f"<div class='output-box'><h3>🔑 Keywords</h3><p>{keywords_html}</p></div>", unsafe_allow_html=True)
+    # One placeholder per result block, filled in as soon as its stage finishes
+    status = st.empty()
+    placeholders = {name: st.empty() for name in STAGES}
+    for name, placeholder in placeholders.items():
+        placeholder.info(f"⏳ {STAGE_TITLES[name]}...")
+
+    # PDFs and transcripts are usually longer than BART's 1024 token window
+    long_document = input_option in ("PDF", "YouTube")
+    result, finished = {}, set()
+
+    # Called on this thread as each stage completes
+    def show_stage(name, fields, error):
+        finished.add(name)
+        if error is not None:
+            placeholders[name].error(f"{STAGE_TITLES[name]} failed: {error}")
+            return
+        result.update(fields[0])
+        with placeholders[name].container():
+            RENDERERS[name](fields[0])
+
+    # One analysis for all stages: the text is preprocessed once and, once every
+    # stage succeeded, remembered for near duplicate detection
+    failed, features = False, {}
+    with st.spinner("🔍 Analyzing the article... Please wait."):
+        try:
+            analyze_many([article_text], long_document=long_document, executor=stage_pool(),
+                         on_stage=show_stage, features=features)
+        except Exception as e:
+            failed = True
+            for name in STAGES:
+                if name not in finished:
+                    placeholders[name].error(f"{STAGE_TITLES[name]} failed: {e}")
+
+    st.session_state.update({
+        "category": result.get("category"),
+        "summary": result.get("summary"),
+        "lda_topics": result.get("lda_topics"),
+        "sentiment": result.get("sentiment"),
+        "entities": result.get("entities"),
+    })
+    if failed:
+        status.error("❌ Analysis incomplete: some stages failed, see the messages below.")
     else:
-        st.warning("No keywords found.")
-
+        status.success("✅ Analysis complete! Scroll down to view the results.")
+
+    # === Archive and Similar Articles ===
+    if not failed:
+        doc_id = document_key(article_text)
+        try:
+            archive = get_archive()
+            archive.add([{"id": doc_id, "source": url if input_option == "URL" else None, **result}], [article_text],
+                        clean_texts=features.get("clean_texts"))
+            similar = archive.similar(doc_id, k=5)
+        except Exception as e:
+            # The archive is an extra; missing models or a full disk must not break the analysis
+            st.info(f"Archive unavailable: {e}")
+            similar = []
+        if similar:
+            with st.expander("🗂️ Similar Articles in the Archive"):
+                st.table(pd.DataFrame(similar)[["score", "category", "fake_label", "sentiment", "summary"]])
+
+# === Debug Panel ===
+if show_metrics:
+    with st.expander("🐞 Performance Metrics", expanded=True):
+        stage_stats = instrument.snapshot()
+        if stage_stats:
+            st.markdown("**Stages**")
+            st.dataframe(pd.DataFrame.from_dict(stage_stats, orient="index").fillna(0))
+        else:
+            st.info("No stages have run yet in this process.")
 
-    # === Display Named Entities as Tables Grouped by Label ===
-    render_entities(entities)
+        load_stats = registry.load_stats()
+        if load_stats:
+            st.markdown("**Model loads**")
+            st.dataframe(pd.DataFrame.from_dict(load_stats, orient="index"))
 
-    label, confidence = dataIngestion.detect_fake_news(article_text)
-    st.subheader("Fake News Detection")
-    if label == "FAKE":
-        st.error(f"Prediction: {label} (Confidence: {confidence})")
-    else:
-        st.success(f"Prediction: {label} (Confidence: {confidence})")
+        st.markdown("**Result cache**")
+        st.json(get_cache().stats())
 
-    # === Display Sentiment ===
-    st.markdown(f"""
-        <div style="background-color:#e9f7ef; border-radius:10px; text-align:center; padding:30px; margin-top:30px;">
-            <h3 style="color:#2e7d32;">Overall Sentiment</h3>
-            <p style="font-size:22px; font-weight:bold; color:#2e7d32;">{sentiment}</p>
-        </div>
-    """, unsafe_allow_html=True)
+        col1, col2 = st.columns(2)
+        col1.download_button("📥 Prometheus metrics", data=instrument.to_prometheus(),
+                             file_name="metrics.prom", mime="text/plain")
+        col2.download_button("📥 Stage events (JSONL)", data=instrument.to_jsonl(),
+                             file_name="stage_events.jsonl", mime="application/json")
 
 # === PDF Generation ===
 custom_filename = st.sidebar.text_input("✏️ Enter custom filename for the PDF (without .pdf)", value="news_summary")
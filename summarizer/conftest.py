@@ -0,0 +1,23 @@
+import pytest
+
+# pytest puts this directory on sys.path, so the tests import `scripts.*` the way
+# the app does when it runs from summarizer/.
+
+
+class _IdentityLemmatizer:
+    @staticmethod
+    def lemmatize(token):
+        return token[:-1] if token.endswith("s") and len(token) > 3 else token
+
+
+# Stand-in for the NLTK stopwords and WordNet data, so preprocessing runs without downloads
+@pytest.fixture
+def nltk_resources(monkeypatch):
+    from scripts import preprocess
+    monkeypatch.setattr(preprocess, "_resources", {
+        "lemmatizer": _IdentityLemmatizer(),
+        "stop_words": {"the", "a", "an", "and", "of", "to", "in", "is", "was", "were", "on"},
+    })
+    preprocess.lemmatize.cache_clear()
+    yield
+    preprocess.lemmatize.cache_clear()
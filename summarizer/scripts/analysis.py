@@ -0,0 +1,233 @@
+import os
+from concurrent.futures import as_completed
+
+from .preprocess import preprocess_many
+from . import collecting
+from . import registry
+from . import summarization
+from . import dataIngestion
+from .extra_features import extract_entities_batch, analyze_sentiment_batch
+from .sentiment import NEUTRAL_BAND
+from .cache import MISSING, document_key, get_cache, model_fingerprint
+from .pdf_ingest import iter_page_ranges
+from .instrument import stage
+from . import dedup
+
+STAGES = ("category", "lda_topics", "summary", "entities", "sentiment", "fake_news")
+
+# Registry models each stage needs
+STAGE_MODELS = {
+    "category": ("classifier", "tfidf"),
+    "lda_topics": ("lda", "dictionary"),
+    "summary": ("summarizer",),
+    "entities": ("spacy_ner",),
+    "sentiment": ("sentiment_lexicon",),
+    "fake_news": ("fake_news",),
+}
+
+
+DEDUP_ENABLED = os.environ.get("NEWSSENSE_DEDUP", "1") not in ("", "0")
+
+MODEL_NAMES = ("classifier", "tfidf", "lda", "dictionary", "summarizer", "fake_news", "spacy_ner", "sentiment_lexicon")
+
+
+def current_fingerprint():
+    return model_fingerprint(
+        paths=[path for name in MODEL_NAMES for path in registry.model_files(name)],
+        model_ids=[registry.model_id(name) for name in MODEL_NAMES if registry.model_id(name)],
+    )
+
+
+# Run the whole pipeline over a list of documents.
+# Each document is preprocessed once, every model sees the batch in one call,
+# and stage outputs already in the result cache are not recomputed.
+# `stages` limits the run to some of STAGES; the results then only hold those fields.
+# With near_duplicates, a document at least dedup.THRESHOLD similar to one analyzed
+# before reuses that analysis; its result says so in "duplicate_of" (with the changed
+# sentences when diff=True). Defaults to on when the cache is used, see NEWSSENSE_DEDUP.
+# With an executor the stages run concurrently on it. on_stage(name, fields, error) is
+# called on the calling thread as each stage completes, with the result fields of that
+# stage for every text (or the exception it raised); the stage errors are re-raised
+# once all stages have finished.
+# A features dict gets the preprocessed text of every document under "clean_texts"
+# (None where nothing needed it), e.g. for Archive.add.
+def analyze_many(texts, batch_size=8, top_n=1, use_cache=True, long_document=False, stages=STAGES,
+                 near_duplicates=None, diff=False, executor=None, on_stage=None, features=None):
+    texts = [text or "" for text in texts]
+    if not texts:
+        return []
+
+    cache = get_cache() if use_cache else None
+    fingerprint = current_fingerprint()
+    keys = [document_key(text, fingerprint) for text in texts]
+
+    # Identical documents inside one batch are only computed once
+    first_index = {}
+    for i, key in enumerate(keys):
+        first_index.setdefault(key, i)
+    unique = sorted(first_index.values())
+
+    # Stage options that change the output are part of the stage name in the cache
+    stage_names = {stage: stage for stage in STAGES}
+    stage_names["lda_topics"] = f"lda_topics:{top_n}"
+    stage_names["sentiment"] = f"sentiment:{NEUTRAL_BAND}"
+    if long_document:
+        stage_names["summary"] = "summary:long"
+        stage_names["fake_news"] = "fake_news:full"
+
+    outputs = {stage: {} for stage in stages}
+    todo = {stage: [] for stage in stages}
+    for name in stages:
+        for i in unique:
+            value = cache.get(keys[i], stage_names[name]) if cache else MISSING
+            if value is MISSING:
+                todo[name].append(i)
+            else:
+                outputs[name][i] = value
+
+    if near_duplicates is None:
+        near_duplicates = use_cache and DEDUP_ENABLED
+    index = dedup.get_index() if near_duplicates else None
+    pending = sorted(set().union(*todo.values())) if index is not None else []
+
+    need_clean = sorted(set(todo.get("category", ())) | set(todo.get("lda_topics", ())) | set(pending))
+    clean_texts = {}
+    if need_clean:
+        with stage("preprocess", docs=len(need_clean), chars=sum(len(texts[i]) for i in need_clean)):
+            clean_texts = dict(zip(need_clean, preprocess_many([texts[i] for i in need_clean])))
+
+    # Documents close enough to one already analyzed take over its stored analysis
+    variant = "|".join([fingerprint] + [stage_names[stage] for stage in STAGES])
+    signatures, duplicates = {}, {}
+    if pending:
+        with stage("dedup", docs=len(pending)) as sizes:
+            for i in pending:
+                signatures[i] = dedup.signature(clean_texts[i])
+                match = index.query(signatures[i], variant)
+                if match is None:
+                    continue
+                doc, score = match
+                original_key, original_text, analysis = index.load(doc)
+                for name in stages:
+                    if i in todo[name]:
+                        outputs[name][i] = analysis[name]
+                        todo[name].remove(i)
+                        if cache:
+                            cache.set(keys[i], stage_names[name], analysis[name])
+                duplicates[i] = {"key": original_key, "similarity": round(score, 3)}
+                if diff:
+                    duplicates[i]["diff"] = dedup.diff_texts(original_text, texts[i])
+            sizes["duplicates"] = len(duplicates)
+
+    jobs = {}
+
+    def plan(stage, compute, indices=None):
+        if stage not in todo:
+            return
+        indices = todo[stage] if indices is None else indices
+        if indices:
+            jobs[stage] = (compute, indices)
+
+    plan("category", lambda idx: collecting.predict_categories([clean_texts[i] for i in idx]))
+    plan("lda_topics", lambda idx: collecting.topic_modeling_batch([clean_texts[i] for i in idx], top_n=top_n))
+    plan("entities", lambda idx: extract_entities_batch([texts[i] for i in idx], batch_size=batch_size * 4))
+    plan("sentiment", lambda idx: analyze_sentiment_batch([texts[i] for i in idx]))
+
+    # The transformer models can't take empty input, so only send documents with text
+    for i in todo.get("summary", ()):
+        if not texts[i].strip():
+            outputs["summary"][i] = ""
+    for i in todo.get("fake_news", ()):
+        if not texts[i].strip():
+            outputs["fake_news"][i] = (None, 0.0)
+    if long_document:
+        summarize = lambda idx: [summarization.long_document_summary(texts[i], batch_size=batch_size) for i in idx]
+    else:
+        summarize = lambda idx: summarization.abstractive_summary_batch([texts[i] for i in idx], batch_size=batch_size)
+    plan("summary", summarize, [i for i in todo.get("summary", ()) if texts[i].strip()])
+    if long_document:
+        score_fake_news = lambda idx: [dataIngestion.detect_fake_news_document(texts[i]) for i in idx]
+    else:
+        score_fake_news = lambda idx: dataIngestion.detect_fake_news_batch([texts[i] for i in idx],
+                                                                           batch_size=batch_size * 2)
+    plan("fake_news", score_fake_news, [i for i in todo.get("fake_news", ()) if texts[i].strip()])
+
+    def finish(stage, values):
+        indices = jobs[stage][1]
+        for i, value in zip(indices, values):
+            outputs[stage][i] = value
+        if cache:
+            cache.set_many(stage_names[stage], [(keys[i], outputs[stage][i]) for i in indices])
+
+    def notify(stage, error=None):
+        if on_stage is not None:
+            fields = None if error else [_stage_fields(stage, outputs[stage][first_index[key]]) for key in keys]
+            on_stage(stage, fields, error)
+
+    # Stages answered from the cache or a near duplicate are ready straight away
+    for name in stages:
+        if name not in jobs:
+            notify(name)
+    if executor is None:
+        for name, (compute, indices) in jobs.items():
+            finish(name, compute(indices))
+            notify(name)
+    else:
+        futures = {executor.submit(compute, indices): name for name, (compute, indices) in jobs.items()}
+        errors = []
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                finish(name, future.result())
+            except Exception as e:
+                errors.append(e)
+                notify(name, e)
+                continue
+            notify(name)
+        if errors:
+            raise errors[0]
+
+    # Complete analyses become reusable for later near duplicates
+    if index is not None and set(stages) == set(STAGES):
+        for i in pending:
+            if i not in duplicates:
+                index.insert(keys[i], variant, signatures[i], texts[i], {name: outputs[name][i] for name in STAGES})
+
+    if features is not None:
+        features["clean_texts"] = [clean_texts.get(first_index[key]) for key in keys]
+
+    results = []
+    for key in keys:
+        i = first_index[key]
+        result = {}
+        for name in stages:
+            result.update(_stage_fields(name, outputs[name][i]))
+        if i in duplicates:
+            result["duplicate_of"] = duplicates[i]
+        results.append(result)
+    return results
+
+
+# Result fields of one stage output; the fake news verdict is split into label, confidence and windows
+def _stage_fields(stage, value):
+    if stage != "fake_news":
+        return {stage: value}
+    if isinstance(value, dict):
+        label, confidence, windows = value["label"], value["confidence"], value["windows"]
+    else:
+        (label, confidence), windows = value, None
+    return {"fake_news_label": label, "fake_news_confidence": confidence, "fake_news_windows": windows}
+
+
+def analyze(text, use_cache=True, long_document=False, stages=STAGES):
+    return analyze_many([text], use_cache=use_cache, long_document=long_document, stages=stages)[0]
+
+
+# Analyze a PDF section by section while it is still being parsed.
+# Yields (first_page, last_page, result) so the first pages can be shown
+# before the last ones are extracted.
+def analyze_pdf_incremental(source, pages_per_section=10, workers=1, batch_size=8):
+    for start, pages in iter_page_ranges(source, pages_per_range=pages_per_section, workers=workers):
+        text = "".join(pages)
+        result = analyze_many([text], batch_size=batch_size, long_document=True)[0]
+        yield start + 1, start + len(pages), result
@@ -0,0 +1,414 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from . import registry
+from .cache import content_fingerprint, document_key
+from .preprocess import preprocess_many
+
+# Persistent archive of analyzed articles.
+#   meta.sqlite           one row per article plus an inverted index (postings) over
+#                         entities, category, topics and the fake news label
+#   tfidf-NNNNN.*.npy     CSR segments of the L2 normalized TF-IDF rows. Every add()
+#                         writes one; the newest segments are merged as soon as they hold
+#                         as many rows as the one before them, so an archive of n rows
+#                         keeps about log2(n) segments however small the adds are.
+#   lda.f32               dense (articles x topics) float32 matrix of LDA distributions
+# The matrices are memory mapped, so a similarity query only vectorizes the query
+# itself and scans the stored rows in place.
+
+DEFAULT_ARCHIVE_DIR = os.environ.get(
+    "NEWSSENSE_ARCHIVE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "archive"),
+)
+SCAN_ROWS = 100000  # rows of the LDA matrix scored at a time
+
+
+# Keyed on the content of the model files, not their path or mtime, so the
+# archive survives moving the repo or copying the models
+def _models_fingerprint():
+    return content_fingerprint(registry.model_files("tfidf") + registry.model_files("lda"))
+
+
+def _tfidf_rows(matrix):
+    from sklearn.preprocessing import normalize
+    return normalize(matrix).tocsr().astype(np.float32)
+
+
+def _tfidf_vectors(clean_texts):
+    return _tfidf_rows(registry.get("tfidf").transform(clean_texts))
+
+
+def _lda_vectors(clean_texts, num_topics):
+    lda_model, dictionary = registry.get_many("lda", "dictionary")
+    vectors = np.zeros((len(clean_texts), num_topics), dtype=np.float32)
+    for row, clean_text in enumerate(clean_texts):
+        for topic, prob in lda_model.get_document_topics(dictionary.doc2bow(clean_text.split()),
+                                                         minimum_probability=0.0):
+            vectors[row, topic] = prob
+    return vectors
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def _top_k(scores, rows, k):
+    if len(scores) > k:
+        keep = np.argpartition(-scores, k)[:k]
+        scores, rows = scores[keep], rows[keep]
+    order = np.argsort(-scores, kind="stable")
+    return scores[order], rows[order]
+
+
+# Postings of one analysis result: (field, value) pairs
+def _postings(result):
+    postings = {("category", str(result.get("category")))}
+    for text, label in result.get("entities") or []:
+        postings.add(("entity", f"{label}:{text}".lower()))
+    for topic_id, _ in result.get("lda_topics") or []:
+        postings.add(("topic", str(topic_id)))
+    if result.get("fake_news_label"):
+        postings.add(("fake", str(result["fake_news_label"])))
+    if result.get("sentiment"):
+        postings.add(("sentiment", str(result["sentiment"])))
+    return postings
+
+
+class Archive:
+    def __init__(self, directory=DEFAULT_ARCHIVE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, "meta.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " row INTEGER PRIMARY KEY, doc_id TEXT NOT NULL UNIQUE, title TEXT, source TEXT, category TEXT,"
+            " fake_label TEXT, fake_confidence REAL, sentiment TEXT, summary TEXT, added REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS docs_added ON docs (added);"
+            "CREATE TABLE IF NOT EXISTS postings (field TEXT NOT NULL, value TEXT NOT NULL, row INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS postings_lookup ON postings (field, value, row);"
+            "CREATE TABLE IF NOT EXISTS segments (name TEXT PRIMARY KEY, start INTEGER NOT NULL,"
+            " rows INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+        )
+        self._conn.commit()
+        self._segments = None
+        self._lda = None
+
+    def _meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, json.dumps(value)))
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    # Stored vectors are only comparable with queries vectorized by the same models
+    def _check_models(self):
+        stored = self._meta("model_content")
+        if stored is not None and stored != _models_fingerprint():
+            raise ValueError(f"The archive in {self.directory} was built with other TF-IDF/LDA models; "
+                             "rebuild it or point NEWSSENSE_ARCHIVE_DIR at a new directory")
+
+    # === Writing ===
+
+    # Add analysis results (from analyze_many) with the texts they were computed from.
+    # records may carry "id", "title", "source" and "added" (unix time); the id defaults
+    # to a hash of the text. Articles already in the archive are skipped.
+    # Features computed earlier can be passed in, aligned with records:
+    #   clean_texts  preprocess_text output (e.g. analyze_many(features=...)); None entries
+    #                are preprocessed here
+    #   tfidf        TF-IDF vectorizer output, one row per record
+    #   lda          (records x topics) LDA distributions
+    def add(self, records, texts, clean_texts=None, tfidf=None, lda=None):
+        with self._lock:
+            self._check_models()
+            rows = []
+            for position, (record, text) in enumerate(zip(records, texts)):
+                doc_id = str(record.get("id") or document_key(text))
+                rows.append((doc_id, record, text or "", position))
+            known = set()
+            for i in range(0, len(rows), 500):
+                chunk = [doc_id for doc_id, _, _, _ in rows[i:i + 500]]
+                known.update(r[0] for r in self._conn.execute(
+                    f"SELECT doc_id FROM docs WHERE doc_id IN ({','.join('?' * len(chunk))})", chunk))
+            fresh, seen = [], set()
+            for doc_id, record, text, position in rows:
+                if doc_id not in known and doc_id not in seen:
+                    seen.add(doc_id)
+                    fresh.append((doc_id, record, text, position))
+            if not fresh:
+                return 0
+
+            positions = [position for _, _, _, position in fresh]
+            num_topics = registry.get("lda").num_topics
+            if tfidf is None or lda is None:
+                clean = [clean_texts[p] if clean_texts is not None else None for p in positions]
+                missing = [i for i, clean_text in enumerate(clean) if clean_text is None]
+                if missing:
+                    for i, clean_text in zip(missing, preprocess_many([fresh[i][2] for i in missing])):
+                        clean[i] = clean_text
+            tfidf = _tfidf_vectors(clean) if tfidf is None else _tfidf_rows(tfidf[positions])
+            lda = _lda_vectors(clean, num_topics) if lda is None else np.asarray(lda, dtype=np.float32)[positions]
+            start = len(self)
+            name = f"tfidf-{start:010d}"
+            self._write_segment(name, tfidf)
+            self._write_lda(start, lda)
+
+            now = time.time()
+            with self._conn:
+                self._set_meta("model_content", _models_fingerprint())
+                self._set_meta("num_topics", num_topics)
+                self._set_meta("num_features", tfidf.shape[1])
+                for offset, (doc_id, record, _, _) in enumerate(fresh):
+                    row = start + offset
+                    self._conn.execute(
+                        "INSERT INTO docs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (row, doc_id, record.get("title"), record.get("source"), str(record.get("category")),
+                         record.get("fake_news_label"), _float(record.get("fake_news_confidence")),
+                         record.get("sentiment"), record.get("summary"), float(record.get("added") or now)),
+                    )
+                    self._conn.executemany("INSERT INTO postings VALUES (?, ?, ?)",
+                                           [(field, value, row) for field, value in _postings(record)])
+                self._conn.execute("INSERT INTO segments VALUES (?, ?, ?)", (name, start, len(fresh)))
+            self._segments = None
+            self._lda = None
+            self._merge_newest()
+            return len(fresh)
+
+    def _write_segment(self, name, matrix):
+        for part in ("data", "indices", "indptr"):
+            np.save(os.path.join(self.directory, f"{name}.{part}.npy"), getattr(matrix, part))
+
+    # Rows past the committed count are leftovers of an interrupted add and are overwritten
+    def _write_lda(self, start, vectors):
+        path = os.path.join(self.directory, "lda.f32")
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.seek(start * vectors.shape[1] * 4)
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+
+    # Replace consecutive segments with one. The merged segment is committed before
+    # the old files are removed, so an interruption leaves at most unused files behind.
+    def _merge(self, segments):
+        import scipy.sparse
+        merged = scipy.sparse.vstack([matrix for _, _, matrix in segments], format="csr")
+        start = segments[0][1]
+        name = f"tfidf-{start:010d}-{start + merged.shape[0]:010d}"
+        self._write_segment(name, merged)
+        old = [segment_name for segment_name, _, _ in segments]
+        with self._conn:
+            self._conn.executemany("DELETE FROM segments WHERE name = ?", [(segment_name,) for segment_name in old])
+            self._conn.execute("INSERT INTO segments VALUES (?, ?, ?)", (name, start, merged.shape[0]))
+        self._segments = None
+        for segment_name in old:
+            for part in ("data", "indices", "indptr"):
+                os.remove(os.path.join(self.directory, f"{segment_name}.{part}.npy"))
+
+    # Merge the newest segments into one while the segment before them has no more rows
+    # than they have together. Segment sizes then grow geometrically, like the digits
+    # of a binary counter, and every row is rewritten about log2(n) times in total.
+    def _merge_newest(self):
+        segments = self._load_segments()
+        first, rows = len(segments) - 1, segments[-1][2].shape[0]
+        while first > 0 and segments[first - 1][2].shape[0] <= rows:
+            first -= 1
+            rows += segments[first][2].shape[0]
+        if first < len(segments) - 1:
+            self._merge(segments[first:])
+
+    def segment_count(self):
+        with self._lock:
+            return len(self._load_segments())
+
+    # Merge all TF-IDF segments into one, so queries touch a single matrix
+    def compact(self):
+        with self._lock:
+            segments = self._load_segments()
+            if len(segments) > 1:
+                self._merge(segments)
+
+    # === Reading ===
+
+    def _load_segments(self):
+        import scipy.sparse
+        if self._segments is None:
+            num_features = self._meta("num_features")
+            segments = []
+            for name, start, rows in self._conn.execute("SELECT name, start, rows FROM segments ORDER BY start"):
+                data, indices, indptr = (np.load(os.path.join(self.directory, f"{name}.{part}.npy"), mmap_mode="r")
+                                         for part in ("data", "indices", "indptr"))
+                matrix = scipy.sparse.csr_matrix((data, indices, indptr), shape=(rows, num_features), copy=False)
+                segments.append((name, start, matrix))
+            self._segments = segments
+        return self._segments
+
+    def _load_lda(self):
+        if self._lda is None:
+            count, num_topics = len(self), self._meta("num_topics")
+            path = os.path.join(self.directory, "lda.f32")
+            if not count or not os.path.exists(path):
+                return np.zeros((0, num_topics or 0), dtype=np.float32)
+            self._lda = np.memmap(path, dtype=np.float32, mode="r", shape=(count, num_topics))
+        return self._lda
+
+    def _row_of(self, doc_id):
+        row = self._conn.execute("SELECT row FROM docs WHERE doc_id = ?", (str(doc_id),)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown article: {doc_id}")
+        return row[0]
+
+    # SQL condition on docs for the filters, or None when there are none.
+    # entities are (text, label) pairs; since/until are unix times.
+    def _where(self, category=None, entities=(), topics=(), fake_label=None, sentiment=None,
+               since=None, until=None):
+        clauses, params = [], []
+        for field, value in ([("category", category)] if category is not None else []) + \
+                            [("entity", f"{label}:{text}".lower()) for text, label in entities] + \
+                            [("topic", str(topic)) for topic in topics] + \
+                            ([("fake", fake_label)] if fake_label else []) + \
+                            ([("sentiment", sentiment)] if sentiment else []):
+            clauses.append("row IN (SELECT row FROM postings WHERE field = ? AND value = ?)")
+            params += [field, str(value)]
+        if since is not None:
+            clauses.append("added >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("added < ?")
+            params.append(until)
+        if not clauses:
+            return None, []
+        return " AND ".join(clauses), params
+
+    # Rows matching every filter, or None when there are no filters
+    def _filter_rows(self, **filters):
+        where, params = self._where(**filters)
+        if where is None:
+            return None
+        return np.fromiter((r[0] for r in self._conn.execute(f"SELECT row FROM docs WHERE {where}", params)),
+                           dtype=np.int64)
+
+    def _describe(self, rows, scores=None):
+        rows = [int(r) for r in rows]
+        found = {}
+        for i in range(0, len(rows), 500):
+            chunk = rows[i:i + 500]
+            cursor = self._conn.execute(
+                f"SELECT row, doc_id, title, source, category, fake_label, fake_confidence, sentiment, summary, added "
+                f"FROM docs WHERE row IN ({','.join('?' * len(chunk))})", chunk)
+            columns = [c[0] for c in cursor.description]
+            for values in cursor:
+                found[values[0]] = dict(zip(columns[1:], values[1:]))
+        results = []
+        for i, row in enumerate(rows):
+            item = dict(found[row])
+            if scores is not None:
+                item["score"] = round(float(scores[i]), 4)
+            results.append(item)
+        return results
+
+    # Filtered listing, newest first, e.g. every FAKE item mentioning an ORG this week:
+    #   archive.search(fake_label="FAKE", entities=[("Reuters", "ORG")], since=time.time() - 7 * 86400)
+    def search(self, limit=100, **filters):
+        with self._lock:
+            where, params = self._where(**filters)
+            query = f"SELECT row FROM docs {'WHERE ' + where if where else ''} ORDER BY added DESC LIMIT ?"
+            return self._describe([r[0] for r in self._conn.execute(query, params + [limit])])
+
+    # Top-k cosine neighbours of an archived article (doc_id) or of a new text.
+    # space is "tfidf" (wording) or "lda" (topic mix); filters are those of search().
+    def similar(self, doc_id=None, text=None, k=10, space="tfidf", **filters):
+        if (doc_id is None) == (text is None):
+            raise ValueError("Pass either doc_id or text")
+        with self._lock:
+            if not len(self):
+                return []
+            exclude = self._row_of(doc_id) if doc_id is not None else None
+            allowed = self._filter_rows(**filters)
+            if allowed is not None and not len(allowed):
+                return []
+            if space == "tfidf":
+                scores, rows = self._tfidf_scores(self._tfidf_query(exclude, text), allowed)
+            elif space == "lda":
+                scores, rows = self._lda_scores(self._lda_query(exclude, text), allowed)
+            else:
+                raise ValueError(f"Unknown space {space!r}, expected 'tfidf' or 'lda'")
+            if exclude is not None:
+                keep = rows != exclude
+                scores, rows = scores[keep], rows[keep]
+            scores, rows = _top_k(scores, rows, k)
+            return self._describe(rows, scores)
+
+    def _tfidf_query(self, row, text):
+        if text is not None:
+            self._check_models()
+            return _tfidf_vectors(preprocess_many([text]))
+        for _, start, matrix in self._load_segments():
+            if start <= row < start + matrix.shape[0]:
+                return matrix[row - start]
+        raise KeyError(f"Row {row} is not in any segment")
+
+    def _lda_query(self, row, text):
+        if text is not None:
+            self._check_models()
+            return _normalize(_lda_vectors(preprocess_many([text]), self._meta("num_topics")))[0]
+        return _normalize(np.asarray(self._load_lda()[row:row + 1]))[0]
+
+    # Rows are L2 normalized already, so cosine similarity is a sparse dot product
+    def _tfidf_scores(self, query, allowed):
+        all_scores, all_rows = [], []
+        query_t = query.T.tocsc()
+        for _, start, matrix in self._load_segments():
+            if allowed is not None:
+                local = allowed[(allowed >= start) & (allowed < start + matrix.shape[0])] - start
+                if not len(local):
+                    continue
+                scores = (matrix[local] @ query_t).toarray().ravel()
+                rows = local + start
+            else:
+                scores = (matrix @ query_t).toarray().ravel()
+                rows = np.arange(start, start + matrix.shape[0])
+            nonzero = scores > 0
+            all_scores.append(scores[nonzero])
+            all_rows.append(rows[nonzero])
+        if not all_scores:
+            return np.zeros(0), np.zeros(0, dtype=np.int64)
+        return np.concatenate(all_scores), np.concatenate(all_rows)
+
+    def _lda_scores(self, query, allowed):
+        lda = self._load_lda()
+        if allowed is not None:
+            allowed = np.sort(allowed)
+            return _normalize(np.asarray(lda[allowed])) @ query, allowed
+        scores = np.empty(len(lda), dtype=np.float32)
+        for start in range(0, len(lda), SCAN_ROWS):
+            scores[start:start + SCAN_ROWS] = _normalize(np.asarray(lda[start:start + SCAN_ROWS])) @ query
+        return scores, np.arange(len(lda))
+
+
+_default_archive = None
+_default_lock = threading.Lock()
+
+
+# One shared archive per process
+def get_archive():
+    global _default_archive
+    with _default_lock:
+        if _default_archive is None:
+            _default_archive = Archive()
+        return _default_archive
@@ -0,0 +1,277 @@
+import asyncio
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from .ingest_helpers import pack_sentences, split_sentences, youtube_video_id
+
+# Concurrent ingestion for feeds of URLs, YouTube links, images and translations.
+# Every source is an object with one async method, so the network backed ones can be
+# swapped for the Local* stand-ins below when running offline or in benchmarks.
+# The network libraries are only imported by the backends that use them.
+
+
+class RetryableError(Exception):
+    pass
+
+
+# Keeps at least 1 / rate seconds between the starts of two requests to the same host
+class HostRateLimiter:
+    def __init__(self, rate=2.0):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, url):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+# deep_translator raises TooManyRequests for HTTP 429 and RequestError for other failed requests
+def _retryable_errors():
+    errors = (RetryableError, asyncio.TimeoutError, OSError)
+    try:
+        from deep_translator.exceptions import RequestError, TooManyRequests
+    except ImportError:
+        return errors
+    return errors + (RequestError, TooManyRequests)
+
+
+async def with_retries(call, retries=3, backoff=0.5, timeout=20):
+    retryable = _retryable_errors()
+    for attempt in range(retries + 1):
+        try:
+            return await asyncio.wait_for(call(), timeout)
+        except retryable:
+            if attempt == retries:
+                raise
+            # Exponential backoff with jitter so retries from many tasks don't line up
+            await asyncio.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+
+
+# === Page sources ===
+
+class HttpPageSource:
+    # One aiohttp session for the whole run, so connections are reused
+    def __init__(self, concurrency=20, per_host_rate=2.0, timeout=20, retries=3, backoff=0.5):
+        self.concurrency = concurrency
+        self.limiter = HostRateLimiter(per_host_rate)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._session = None
+
+    async def __aenter__(self):
+        import aiohttp
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+        self._session = aiohttp.ClientSession(connector=connector,
+                                              headers={"User-Agent": "Mozilla/5.0 (NewsSense)"})
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+
+    async def fetch(self, url):
+        import aiohttp
+
+        async def request():
+            try:
+                async with self._session.get(url) as response:
+                    if response.status == 429 or response.status >= 500:
+                        raise RetryableError(f"HTTP {response.status}")
+                    response.raise_for_status()
+                    return await response.text(errors="replace")
+            except aiohttp.ClientConnectionError as e:
+                raise RetryableError(str(e)) from e
+
+        # Every attempt waits for its rate limit slot first; the timeout only covers the request,
+        # so time queued behind other requests to the same host doesn't count against it
+        async def limited():
+            await self.limiter.wait(url)
+            return await asyncio.wait_for(request(), self.timeout)
+
+        return await with_retries(limited, retries=self.retries, backoff=self.backoff, timeout=None)
+
+
+class LocalPageSource:
+    # Offline stand-in: html from a {url: html} dict or from files in a directory named by url
+    def __init__(self, pages=None, directory=None):
+        self.pages = pages or {}
+        self.directory = directory
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def fetch(self, url):
+        if url in self.pages:
+            return self.pages[url]
+        if self.directory:
+            name = urlparse(url).path.strip("/").replace("/", "_") or "index"
+            path = os.path.join(self.directory, name + ".html")
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    return f.read()
+        raise FileNotFoundError(url)
+
+
+def parse_article(url, html):
+    from newspaper import Article
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+    return article.text
+
+
+async def ingest_urls(urls, source=None, concurrency=20):
+    source = source or HttpPageSource(concurrency=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(url):
+        async with semaphore:
+            try:
+                html = await source.fetch(url)
+                # newspaper's parsing is CPU bound, keep it off the event loop
+                text = await asyncio.to_thread(parse_article, url, html)
+                return {"source": url, "text": text, "error": None}
+            except Exception as e:
+                return {"source": url, "text": "", "error": str(e)}
+
+    async with source:
+        return await asyncio.gather(*(one(url) for url in urls))
+
+
+# === Transcript sources ===
+
+class YouTubeTranscriptSource:
+    def __init__(self, languages=("en",)):
+        self.languages = list(languages)
+
+    async def fetch(self, video_id):
+        from youtube_transcript_api import YouTubeTranscriptApi
+        transcript = await asyncio.to_thread(YouTubeTranscriptApi.get_transcript, video_id,
+                                             languages=self.languages)
+        return " ".join(entry["text"] for entry in transcript)
+
+
+class LocalTranscriptSource:
+    def __init__(self, transcripts):
+        self.transcripts = transcripts
+
+    async def fetch(self, video_id):
+        return self.transcripts[video_id]
+
+
+async def ingest_youtube(urls, source=None, concurrency=8, retries=2, timeout=30):
+    source = source or YouTubeTranscriptSource()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(url):
+        video_id = youtube_video_id(url)
+        if video_id is None:
+            return {"source": url, "text": "", "error": "Invalid YouTube URL format."}
+        async with semaphore:
+            try:
+                text = await with_retries(lambda: source.fetch(video_id), retries=retries, timeout=timeout)
+                return {"source": url, "text": text, "error": None}
+            except Exception as e:
+                return {"source": url, "text": "", "error": str(e)}
+
+    return await asyncio.gather(*(one(url) for url in urls))
+
+
+# === Images ===
+
+async def ingest_images(image_files, ocr=None, concurrency=4):
+    if ocr is None:
+        from .dataIngestion import extract_text_from_image as ocr
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(image_file):
+        name = getattr(image_file, "name", str(image_file))
+        async with semaphore:
+            try:
+                return {"source": name, "text": await asyncio.to_thread(ocr, image_file), "error": None}
+            except Exception as e:
+                return {"source": name, "text": "", "error": str(e)}
+
+    return await asyncio.gather(*(one(f) for f in image_files))
+
+
+# === Translation ===
+
+class GoogleTranslateBackend:
+    # deep_translator's GoogleTranslator, a new one per chunk: it keeps the text of the
+    # current request on the instance, so a shared one could swap concurrent chunks.
+    # The library sets no HTTP timeout and wait_for only stops waiting, so the calls run
+    # on a pool of their own; a stalled request can't take the threads that
+    # asyncio.to_thread uses for parsing and OCR.
+    def __init__(self, max_workers=4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translate")
+
+    @staticmethod
+    def _translate(chunk, src_lang):
+        from deep_translator import GoogleTranslator
+        if not chunk.strip():
+            return chunk
+        return GoogleTranslator(source=src_lang, target='en').translate(chunk)
+
+    async def translate(self, chunk, src_lang):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._translate, chunk, src_lang)
+
+
+class LocalTranslateBackend:
+    # Offline stand-in: returns the text unchanged, or looks it up in a {text: translation} dict
+    def __init__(self, translations=None):
+        self.translations = translations or {}
+        self.requests = 0
+
+    async def translate(self, chunk, src_lang):
+        self.requests += 1
+        return self.translations.get(chunk, chunk)
+
+
+# Sentences are packed into as few requests as the size limit allows and
+# the packs of all texts are translated concurrently
+async def translate_texts(texts, src_lang, backend=None, concurrency=4, retries=3, timeout=30):
+    backend = backend or GoogleTranslateBackend(max_workers=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_pack(pack):
+        async with semaphore:
+            translated = await with_retries(lambda: backend.translate(pack, src_lang),
+                                            retries=retries, timeout=timeout)
+            return " ".join(translated.split("\n"))
+
+    async def one_text(text):
+        try:
+            parts = await asyncio.gather(*(one_pack(p) for p in pack_sentences(split_sentences(text))))
+            return " ".join(parts)
+        except Exception as e:
+            return f"Translation Error: {str(e)}"
+
+    return await asyncio.gather(*(one_text(t) for t in texts))
+
+
+# Blocking wrappers for scripts and the batch runner
+def fetch_urls(urls, **kwargs):
+    return asyncio.run(ingest_urls(urls, **kwargs))
+
+
+def fetch_youtube(urls, **kwargs):
+    return asyncio.run(ingest_youtube(urls, **kwargs))
+
+
+def translate_many(texts, src_lang, **kwargs):
+    return asyncio.run(translate_texts(texts, src_lang, **kwargs))
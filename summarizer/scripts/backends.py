@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import re
+import time
+
+# CPU inference backends for the Hugging Face models:
+#   torch  - stock fp32 PyTorch
+#   int8   - PyTorch with dynamic int8 quantization of the Linear layers
+#   onnx   - ONNX Runtime session exported with optimum (cached under models/onnx/)
+# Pick one with NEWSSENSE_BACKEND, or per model with NEWSSENSE_SUMMARIZER_BACKEND /
+# NEWSSENSE_FAKE_NEWS_BACKEND. NEWSSENSE_THREADS sets the intra-op thread count.
+
+BACKENDS = ("torch", "int8", "onnx")
+DISTILLED_SUMMARIZER = "sshleifer/distilbart-cnn-12-6"
+
+
+def backend_for(model):
+    backend = os.environ.get(f"NEWSSENSE_{model.upper()}_BACKEND") or os.environ.get("NEWSSENSE_BACKEND", "torch")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    return backend
+
+
+def thread_count():
+    threads = os.environ.get("NEWSSENSE_THREADS")
+    return int(threads) if threads else None
+
+
+def set_threads(threads):
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+
+
+def _onnx_dir(model_id):
+    from .model_store import model_path
+    return model_path(os.path.join("onnx", re.sub(r'[^A-Za-z0-9_.-]+', '_', model_id)))
+
+
+def _session_options(threads):
+    import onnxruntime
+    options = onnxruntime.SessionOptions()
+    if threads:
+        options.intra_op_num_threads = threads
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return options
+
+
+# The first load exports the model to ONNX and saves it; later loads reuse the export
+def _load_onnx(ort_class, model_id, threads):
+    export_dir = _onnx_dir(model_id)
+    options = _session_options(threads)
+    if os.path.isdir(export_dir):
+        return ort_class.from_pretrained(export_dir, session_options=options)
+    model = ort_class.from_pretrained(model_id, export=True, session_options=options)
+    model.save_pretrained(export_dir)
+    return model
+
+
+def _quantize(model):
+    import torch
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_summarizer(model_id, backend="torch", threads=None):
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
+    set_threads(threads)
+    if backend == "torch":
+        return pipeline("summarization", model=model_id)
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    if backend == "int8":
+        model = _quantize(AutoModelForSeq2SeqLM.from_pretrained(model_id).eval())
+    else:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        model = _load_onnx(ORTModelForSeq2SeqLM, model_id, threads)
+    return pipeline("summarization", model=model, tokenizer=tokenizer)
+
+
+def load_text_classifier(model_id, backend="torch", threads=None):
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+    set_threads(threads)
+    if backend == "torch":
+        return pipeline("text-classification", model=model_id)
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    if backend == "int8":
+        model = _quantize(AutoModelForSequenceClassification.from_pretrained(model_id).eval())
+    else:
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+        model = _load_onnx(ORTModelForSequenceClassification, model_id, threads)
+    return pipeline("text-classification", model=model, tokenizer=tokenizer)
+
+
+# === Accuracy check against the fp32 reference ===
+
+def _token_f1(reference, candidate):
+    ref, cand = reference.lower().split(), candidate.lower().split()
+    if not ref or not cand:
+        return float(ref == cand)
+    common = sum(min(ref.count(w), cand.count(w)) for w in set(cand))
+    if common == 0:
+        return 0.0
+    precision, recall = common / len(cand), common / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+# Runs the same texts through fp32 PyTorch and `backend` and reports agreement and speed.
+# Summaries are compared with unigram F1 (ROUGE-1 style), classifications by label agreement.
+def compare_backends(texts, backend, summarizer_model, fake_news_model, threads=None, max_length=130, min_length=30):
+    report = {"backend": backend, "threads": threads, "docs": len(texts)}
+
+    reference = load_summarizer(summarizer_model, "torch", threads)
+    candidate = load_summarizer(summarizer_model, backend, threads)
+    kwargs = dict(max_length=max_length, min_length=min_length, do_sample=False, truncation=True)
+    ref_out, ref_time = _timed(reference, texts, **kwargs)
+    cand_out, cand_time = _timed(candidate, texts, **kwargs)
+    scores = [_token_f1(r["summary_text"], c["summary_text"]) for r, c in zip(ref_out, cand_out)]
+    report["summarizer"] = {
+        "model": summarizer_model,
+        "mean_unigram_f1": round(sum(scores) / len(scores), 4),
+        "min_unigram_f1": round(min(scores), 4),
+        "fp32_seconds": round(ref_time, 3),
+        "backend_seconds": round(cand_time, 3),
+        "speedup": round(ref_time / cand_time, 2) if cand_time else None,
+    }
+    del reference, candidate
+
+    reference = load_text_classifier(fake_news_model, "torch", threads)
+    candidate = load_text_classifier(fake_news_model, backend, threads)
+    ref_out, ref_time = _timed(reference, texts, truncation=True)
+    cand_out, cand_time = _timed(candidate, texts, truncation=True)
+    agree = sum(r["label"] == c["label"] for r, c in zip(ref_out, cand_out))
+    report["fake_news"] = {
+        "model": fake_news_model,
+        "label_agreement": round(agree / len(texts), 4),
+        "max_score_diff": round(max(abs(r["score"] - c["score"]) for r, c in zip(ref_out, cand_out)), 4),
+        "fp32_seconds": round(ref_time, 3),
+        "backend_seconds": round(cand_time, 3),
+        "speedup": round(ref_time / cand_time, 2) if cand_time else None,
+    }
+    return report
+
+
+if __name__ == "__main__":
+    from .registry import FAKE_NEWS_MODEL, SUMMARIZER_MODEL
+    from .synthetic_corpus import make_article
+
+    parser = argparse.ArgumentParser(description="Compare an inference backend with fp32 PyTorch")
+    parser.add_argument("--backend", choices=[b for b in BACKENDS if b != "torch"], default="int8")
+    parser.add_argument("--threads", type=int, default=thread_count())
+    parser.add_argument("--samples", type=int, default=8)
+    parser.add_argument("--distilled", action="store_true", help=f"use {DISTILLED_SUMMARIZER} as the summarizer")
+    parser.add_argument("--texts", help="jsonl file with a 'text' field per line instead of synthetic articles")
+    args = parser.parse_args()
+
+    if args.texts:
+        with open(args.texts, encoding="utf-8") as f:
+            texts = [json.loads(line)["text"] for line in f if line.strip()][:args.samples]
+    else:
+        texts = [make_article("medium", seed=i) for i in range(args.samples)]
+    summarizer_model = DISTILLED_SUMMARIZER if args.distilled else SUMMARIZER_MODEL
+    print(json.dumps(compare_backends(texts, args.backend, summarizer_model, FAKE_NEWS_MODEL, args.threads), indent=2))
@@ -0,0 +1,313 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Headless batch runner. Run from the summarizer directory:
+#   python -m scripts.batch_run archive.csv -o results.jsonl --workers 4
+#   python -m scripts.batch_run feeds/ -o results_parquet --format parquet
+#   python -m scripts.batch_run feeds.jsonl -o results.jsonl --archive cache/archive
+# Progress is checkpointed next to the output, so re-running the same command
+# after a crash skips everything that was already written.
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff")
+
+
+# === Input readers: yield (doc_id, kind, payload) ===
+
+def read_csv(path, text_column="text", id_column=None, chunksize=1000):
+    import pandas as pd
+    row = 0
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        for _, record in chunk.iterrows():
+            doc_id = str(record[id_column]) if id_column else f"{os.path.basename(path)}:{row}"
+            row += 1
+            text = record.get(text_column)
+            yield doc_id, "text", text if isinstance(text, str) else ""
+
+
+def read_jsonl(path, text_column="text", id_column="id"):
+    with open(path, encoding="utf-8") as f:
+        for row, line in enumerate(f):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            doc_id = str(record.get(id_column, f"{os.path.basename(path)}:{row}"))
+            if record.get(text_column):
+                yield doc_id, "text", record[text_column]
+            elif record.get("url"):
+                yield doc_id, "url", record["url"]
+
+
+def read_directory(path):
+    for name in sorted(os.listdir(path)):
+        full = os.path.join(path, name)
+        lower = name.lower()
+        if lower.endswith(".pdf"):
+            yield name, "pdf", full
+        elif lower.endswith(IMAGE_EXTENSIONS):
+            yield name, "image", full
+        elif lower.endswith((".txt", ".urls")):
+            # One URL per line
+            with open(full, encoding="utf-8") as f:
+                for line in f:
+                    url = line.strip()
+                    if url and not url.startswith("#"):
+                        yield url, "url", url
+
+
+def read_inputs(source, text_column="text", id_column=None):
+    if os.path.isdir(source):
+        return read_directory(source)
+    if source.endswith(".jsonl"):
+        return read_jsonl(source, text_column=text_column, id_column=id_column or "id")
+    return read_csv(source, text_column=text_column, id_column=id_column)
+
+
+# === Worker side ===
+
+def _init_worker():
+    from . import registry
+    registry.preload(["classifier", "tfidf", "lda", "dictionary", "summarizer", "fake_news", "spacy_ner"])
+
+
+def _load_texts(items):
+    from .dataIngestion import extract_text_from_image, extract_text_from_pdf
+    from .async_ingest import fetch_urls
+
+    texts, errors = {}, {}
+    urls = [(doc_id, payload) for doc_id, kind, payload in items if kind == "url"]
+    if urls:
+        for (doc_id, _), fetched in zip(urls, fetch_urls([u for _, u in urls])):
+            texts[doc_id] = fetched["text"]
+            if fetched["error"]:
+                errors[doc_id] = fetched["error"]
+    for doc_id, kind, payload in items:
+        try:
+            if kind == "text":
+                texts[doc_id] = payload
+            elif kind == "pdf":
+                texts[doc_id] = extract_text_from_pdf(payload)
+            elif kind == "image":
+                texts[doc_id] = extract_text_from_image(payload)
+        except Exception as e:
+            texts[doc_id] = ""
+            errors[doc_id] = str(e)
+    return texts, errors
+
+
+# with_text keeps each document's text and preprocessed text in its record, for the archive
+def process_batch(items, with_text=False):
+    from .analysis import analyze_many
+
+    texts, errors = _load_texts(items)
+    # PDFs get the long document summary and full document fake news scoring, the rest the fast path
+    results, clean_texts = [None] * len(items), [None] * len(items)
+    for long_document in (False, True):
+        positions = [i for i, (_, kind, _) in enumerate(items) if (kind == "pdf") == long_document]
+        if not positions:
+            continue
+        features = {}
+        group = analyze_many([texts.get(items[i][0], "") for i in positions], long_document=long_document,
+                             features=features)
+        for i, result, clean_text in zip(positions, group, features["clean_texts"]):
+            results[i], clean_texts[i] = result, clean_text
+    records = []
+    for (doc_id, kind, payload), result, clean_text in zip(items, results, clean_texts):
+        record = {"id": doc_id, "source_type": kind, "chars": len(texts.get(doc_id, "")),
+                  "error": errors.get(doc_id)}
+        if kind != "text":
+            record["source"] = payload
+        record.update(result)
+        if with_text:
+            record["text"] = texts.get(doc_id, "")
+            record["clean_text"] = clean_text
+        records.append(record)
+    return records
+
+
+# === Output ===
+
+def _json_default(value):
+    # numpy scalars from the LDA keywords and the classifier
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class JsonlWriter:
+    def __init__(self, path):
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, records):
+        for record in records:
+            self._file.write(json.dumps(record, default=_json_default, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+# Columns of the parquet parts; nested values are stored as JSON strings
+PARQUET_COLUMNS = (
+    ("id", "string"), ("source_type", "string"), ("source", "string"), ("chars", "int64"),
+    ("error", "string"), ("category", "string"), ("summary", "string"), ("keywords", "string"),
+    ("entities", "json"), ("sentiment", "string"), ("fake_news_label", "string"),
+    ("fake_news_confidence", "float64"), ("fake_news_windows", "json"), ("duplicate_of", "json"),
+)
+
+
+def parquet_schema():
+    import pyarrow as pa
+    return pa.schema([(name, pa.string() if kind == "json" else getattr(pa, kind)())
+                      for name, kind in PARQUET_COLUMNS])
+
+
+def parquet_row(record):
+    row = {}
+    for name, kind in PARQUET_COLUMNS:
+        value = record.get(name)
+        if name == "keywords":
+            value = ", ".join(word for _, keywords in (record.get("lda_topics") or [])[:1] for word, _ in keywords)
+        if value is None:
+            row[name] = None
+        elif kind == "json":
+            row[name] = json.dumps(value, default=_json_default, ensure_ascii=False)
+        elif kind == "string":
+            row[name] = str(value)
+        elif kind == "float64":
+            row[name] = float(value)
+        else:
+            row[name] = int(value)
+    return row
+
+
+class ParquetWriter:
+    # One part file per batch, so a resumed job only ever adds files.
+    # Every part has the same fixed schema, whatever keys the first record has.
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.schema = parquet_schema()
+        self._part = len(glob.glob(os.path.join(directory, "part-*.parquet")))
+
+    def write(self, records):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pylist([parquet_row(record) for record in records], schema=self.schema)
+        self._part += 1
+        with pq.ParquetWriter(os.path.join(self.directory, f"part-{self._part:05d}.parquet"), self.schema) as out:
+            out.write_table(table)
+
+    def close(self):
+        pass
+
+
+class Checkpoint:
+    # Ids are appended only after their results are on disk (at-least-once)
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done = {line.rstrip("\n") for line in f if line.strip()}
+        self._file = open(path, "a", encoding="utf-8")
+
+    def mark(self, ids):
+        self._file.write("".join(f"{doc_id}\n" for doc_id in ids))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run(source, output, fmt="jsonl", workers=1, batch_size=16, text_column="text", id_column=None,
+        archive_dir=None):
+    writer = ParquetWriter(output) if fmt == "parquet" else JsonlWriter(output)
+    archive = None
+    if archive_dir:
+        from .archive import Archive
+        archive = Archive(archive_dir)
+    checkpoint = Checkpoint(output.rstrip("/\\") + ".checkpoint")
+    pending_items = (item for item in read_inputs(source, text_column=text_column, id_column=id_column)
+                     if item[0] not in checkpoint.done)
+    skipped = len(checkpoint.done)
+    if skipped:
+        print(f"Resuming, {skipped} documents already done", file=sys.stderr)
+
+    start = time.perf_counter()
+    processed = 0
+
+    def finish(records):
+        nonlocal processed
+        if archive is not None:
+            texts = [record.pop("text", "") for record in records]
+            clean_texts = [record.pop("clean_text", None) for record in records]
+            ok = [i for i, record in enumerate(records) if not record["error"]]
+            archive.add([records[i] for i in ok], [texts[i] for i in ok], clean_texts=[clean_texts[i] for i in ok])
+        writer.write(records)
+        checkpoint.mark(record["id"] for record in records)
+        processed += len(records)
+        elapsed = time.perf_counter() - start
+        print(f"{processed} docs in {elapsed:.1f}s ({processed / elapsed:.2f} docs/sec)", file=sys.stderr)
+
+    try:
+        if workers <= 1:
+            for batch in batched(pending_items, batch_size):
+                finish(process_batch(batch, archive is not None))
+        else:
+            # Only a couple of batches per worker in flight, so memory stays flat on huge inputs
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                in_flight = deque()
+                for batch in batched(pending_items, batch_size):
+                    in_flight.append(pool.submit(process_batch, batch, archive is not None))
+                    if len(in_flight) >= workers * 2:
+                        finish(in_flight.popleft().result())
+                while in_flight:
+                    finish(in_flight.popleft().result())
+    finally:
+        writer.close()
+        checkpoint.close()
+
+    elapsed = time.perf_counter() - start
+    return {"processed": processed, "skipped": skipped, "seconds": round(elapsed, 2),
+            "docs_per_sec": round(processed / elapsed, 2) if elapsed else None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the NewsSense analysis over a batch of documents")
+    parser.add_argument("source", help="csv or jsonl file, or a directory of PDFs, images and URL lists")
+    parser.add_argument("-o", "--output", required=True, help="jsonl file, or directory for parquet parts")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--text-column", default="text")
+    parser.add_argument("--id-column", default=None)
+    parser.add_argument("--archive", help="also add the results to this searchable archive directory")
+    args = parser.parse_args(argv)
+
+    summary = run(args.source, args.output, fmt=args.format, workers=args.workers,
+                  batch_size=args.batch_size, text_column=args.text_column, id_column=args.id_column,
+                  archive_dir=args.archive)
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+# Offline benchmark of the ingestion and analysis stages on a synthetic corpus.
+# Run from the summarizer directory:
+#   python -m scripts.benchmark --quick
+#   python -m scripts.benchmark --summarizer-model ./tiny-bart --fake-news-model ./tiny-clf
+#   python -m scripts.benchmark --stand-ins
+#   python -m scripts.benchmark --compare benchmarks/<previous>.json
+# The bundled models in summarizer/models are used as is; the Hugging Face models
+# are loaded offline, so point the flags (or NEWSSENSE_*_MODEL) at local copies, or
+# use --stand-ins to time the code around them with tiny random models (see stand_ins.py).
+# Stages that can't run are listed under "skipped" in the result file.
+
+DEFAULT_OUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+ALL_STAGES = ("preprocess_text", "predict_category", "topic_modeling", "abstractive_summary",
+              "extract_entities", "analyze_sentiment", "detect_fake_news",
+              "extract_text_from_pdf", "extract_text_from_image", "export_summary_to_pdf")
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(1000 * sum(ordered) / len(ordered), 3),
+        "p50_ms": round(1000 * pick(0.50), 3),
+        "p90_ms": round(1000 * pick(0.90), 3),
+        "p99_ms": round(1000 * pick(0.99), 3),
+    }
+
+
+def time_calls(fn, inputs):
+    samples = []
+    for item in inputs:
+        start = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def throughput(batch_fn, texts, batch_sizes):
+    result = {}
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, len(texts), batch_size):
+            batch_fn(texts[i:i + batch_size])
+        elapsed = time.perf_counter() - start
+        result[str(batch_size)] = round(len(texts) / elapsed, 2) if elapsed else None
+    return result
+
+
+class MemoryProbe:
+    def __enter__(self):
+        from .instrument import peak_rss
+        from .registry import current_rss
+        self._rss, self._peak = current_rss, peak_rss
+        self.rss_before, self.peak_before = current_rss(), peak_rss()
+        return self
+
+    def __exit__(self, *exc):
+        self.result = {
+            "rss_delta_mb": round((self._rss() - self.rss_before) / (1024 * 1024), 1),
+            "peak_rss_delta_mb": round((self._peak() - self.peak_before) / (1024 * 1024), 1),
+        }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(stages=ALL_STAGES, samples=5, batch_sizes=(1, 4, 16), pdf_pages=(10, 200), quick=False):
+    from . import registry
+    from .synthetic_corpus import make_corpus, make_files
+    from .instrument import reset as reset_instrumentation
+
+    if quick:
+        samples, batch_sizes, pdf_pages = 2, (1, 4), (10, 50)
+    corpus = make_corpus({"short": max(samples, 16), "medium": max(samples, 16),
+                          "long": samples, "very_long": 1 if quick else 2})
+    sizes = {size: texts[:samples] for size, texts in corpus.items()}
+    throughput_texts = corpus["medium"][:16]
+    results = {"stages": {}, "throughput": {}, "memory": {}, "skipped": {}}
+    reset_instrumentation()
+
+    def latency_by_size(fn):
+        fn(corpus["short"][0])  # warm up, so model loading is not timed
+        return {size: percentiles(time_calls(fn, texts)) for size, texts in sizes.items()}
+
+    # A stage that fails (missing optional dependency, model or system binary such
+    # as Tesseract) is recorded under "skipped" and the remaining stages still run
+    @contextlib.contextmanager
+    def measure(name):
+        print(f"benchmarking {name}", file=sys.stderr)
+        try:
+            with MemoryProbe() as probe:
+                yield
+        except Exception as e:
+            for section in ("stages", "throughput", "memory"):
+                results[section].pop(name, None)
+            results["skipped"][name] = f"{type(e).__name__}: {' '.join(str(e).split())}"
+            print(f"skipped {name}: {results['skipped'][name]}", file=sys.stderr)
+        else:
+            results["memory"][name] = probe.result
+
+    # load returns the single document and the batch function of the stage
+    def bench(name, load):
+        if name not in stages:
+            return
+        with measure(name):
+            single, batch = load()
+            results["stages"][name] = latency_by_size(single)
+            results["throughput"][name] = throughput(batch, throughput_texts, batch_sizes)
+
+    def preprocess_fns():
+        from .preprocess import preprocess_text, preprocess_many
+        return preprocess_text, preprocess_many
+
+    def category_fns():
+        from . import collecting
+        from .preprocess import preprocess_many
+        return collecting.predict_category, lambda texts: collecting.predict_categories(preprocess_many(texts))
+
+    def topic_fns():
+        from . import collecting
+        from .preprocess import preprocess_many
+        return collecting.topic_modeling, lambda texts: collecting.topic_modeling_batch(preprocess_many(texts))
+
+    def summary_fns():
+        from .summarization import abstractive_summary, abstractive_summary_batch
+        return abstractive_summary, abstractive_summary_batch
+
+    def entity_fns():
+        from .extra_features import extract_entities, extract_entities_batch
+        return extract_entities, extract_entities_batch
+
+    def sentiment_fns():
+        from .extra_features import analyze_sentiment, analyze_sentiment_batch
+        return analyze_sentiment, analyze_sentiment_batch
+
+    def fake_news_fns():
+        from .dataIngestion import detect_fake_news, detect_fake_news_batch
+        return detect_fake_news, detect_fake_news_batch
+
+    bench("preprocess_text", preprocess_fns)
+    bench("predict_category", category_fns)
+    bench("topic_modeling", topic_fns)
+    bench("abstractive_summary", summary_fns)
+    bench("extract_entities", entity_fns)
+    bench("analyze_sentiment", sentiment_fns)
+    bench("detect_fake_news", fake_news_fns)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if "extract_text_from_pdf" in stages:
+            with measure("extract_text_from_pdf"):
+                from .dataIngestion import extract_text_from_pdf
+                pdfs, _ = make_files(tmp, pdf_pages=pdf_pages, images=0)
+                results["stages"]["extract_text_from_pdf"] = {
+                    f"{pages}_pages": percentiles(time_calls(extract_text_from_pdf, [path] * samples))
+                    for pages, path in zip(pdf_pages, pdfs)
+                }
+
+        if "extract_text_from_image" in stages:
+            with measure("extract_text_from_image"):
+                from .dataIngestion import extract_text_from_image
+                _, images = make_files(tmp, pdf_pages=(), images=samples)
+                results["stages"]["extract_text_from_image"] = {
+                    "image": percentiles(time_calls(extract_text_from_image, images))
+                }
+
+        if "export_summary_to_pdf" in stages:
+            with measure("export_summary_to_pdf"):
+                from .extra_features import export_summary_to_pdf
+                entities = [("Anita Rao", "PERSON"), ("Reuters", "ORG"), ("London", "GPE")] * 5
+
+                def export(i):
+                    return export_summary_to_pdf(os.path.join(tmp, f"report_{i}.pdf"), "business",
+                                                 corpus["medium"][0][:600], ["market", "shares"], "Positive",
+                                                 entities)
+
+                results["stages"]["export_summary_to_pdf"] = {
+                    "report": percentiles(time_calls(export, range(samples)))
+                }
+
+    results["model_loads"] = registry.load_stats()
+    return results
+
+
+# Stages/sizes whose p50 got slower than threshold (relative) between two result files
+def compare(old, new, threshold=0.10):
+    regressions = []
+    for stage, by_size in new.get("stages", {}).items():
+        for size, stats in by_size.items():
+            old_stats = old.get("stages", {}).get(stage, {}).get(size)
+            if not isinstance(stats, dict) or not isinstance(old_stats, dict):
+                continue
+            before, after = old_stats.get("p50_ms"), stats.get("p50_ms")
+            if before and after and after > before * (1 + threshold):
+                regressions.append({"stage": stage, "size": size, "before_ms": before, "after_ms": after,
+                                    "change": round(after / before - 1, 3)})
+    for stage, by_batch in new.get("throughput", {}).items():
+        for batch_size, rate in by_batch.items():
+            before = old.get("throughput", {}).get(stage, {}).get(batch_size)
+            if before and rate and rate < before * (1 - threshold):
+                regressions.append({"stage": stage, "batch_size": batch_size, "before_docs_per_sec": before,
+                                    "after_docs_per_sec": rate, "change": round(rate / before - 1, 3)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of the NewsSense stages")
+    parser.add_argument("--stages", nargs="*", default=list(ALL_STAGES), choices=ALL_STAGES)
+    parser.add_argument("--samples", type=int, default=5, help="calls per article size")
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=[1, 4, 16])
+    parser.add_argument("--pdf-pages", type=int, nargs="*", default=[10, 200])
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--summarizer-model", help="local path of a summarization model")
+    parser.add_argument("--fake-news-model", help="local path of a text classification model")
+    parser.add_argument("--stand-ins", action="store_true",
+                        help="use tiny random stand-ins for the Hugging Face and spaCy models")
+    parser.add_argument("--backend", choices=["torch", "int8", "onnx"], help="inference backend for both models")
+    parser.add_argument("--out", help="result file (default benchmarks/<timestamp>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    # Must be set before the registry is imported
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+    if args.summarizer_model:
+        os.environ["NEWSSENSE_SUMMARIZER_MODEL"] = args.summarizer_model
+    if args.fake_news_model:
+        os.environ["NEWSSENSE_FAKE_NEWS_MODEL"] = args.fake_news_model
+    if args.backend:
+        os.environ["NEWSSENSE_BACKEND"] = args.backend
+
+    from . import registry
+    if args.stand_ins:
+        from . import stand_ins
+        stand_ins.install()
+    results = run_benchmarks(stages=args.stages, samples=args.samples, batch_sizes=tuple(args.batch_sizes),
+                             pdf_pages=tuple(args.pdf_pages), quick=args.quick)
+    commit = git_commit()
+    results["meta"] = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "quick": args.quick,
+        "stand_ins": args.stand_ins,
+        "models": {name: registry.model_id(name) or registry.model_files(name)
+                   for name in ("classifier", "tfidf", "lda", "summarizer", "fake_news", "spacy_ner", "sentiment_lexicon")},
+    }
+
+    out = args.out or os.path.join(DEFAULT_OUT_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{commit or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {json.dumps(r)}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import hashlib
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    "NEWSSENSE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "results.sqlite"),
+)
+
+# Returned by ResultCache.get when nothing is stored, since None can be a real result
+MISSING = object()
+
+
+def normalize_text(text):
+    text = unicodedata.normalize("NFKC", text or "")
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+# Fingerprint of the model files and HF model ids, so retrained models never serve stale results
+def model_fingerprint(paths=(), model_ids=()):
+    h = hashlib.sha256()
+    for path in paths:
+        try:
+            st = os.stat(path)
+            h.update(f"{path}:{st.st_size}:{st.st_mtime_ns}".encode())
+        except OSError:
+            h.update(f"{path}:missing".encode())
+    for model_id in model_ids:
+        h.update(f"id:{model_id}".encode())
+    return h.hexdigest()[:16]
+
+
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+# SHA-256 of a file's content, recomputed only when its size or mtime changes
+def file_digest(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "missing"
+    stamp = (st.st_size, st.st_mtime_ns)
+    with _digests_lock:
+        cached = _digests.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    digest = h.hexdigest()
+    with _digests_lock:
+        _digests[path] = (stamp, digest)
+    return digest
+
+
+# Fingerprint of what the model files contain, the same after a move, a fresh
+# checkout or a touch; for stores that outlive the process, like the archive
+def content_fingerprint(paths=()):
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(f"{file_digest(path)}\0".encode())
+    return h.hexdigest()[:16]
+
+
+def document_key(text, fingerprint=""):
+    h = hashlib.sha256()
+    h.update(fingerprint.encode())
+    h.update(b"\0")
+    h.update(normalize_text(text).encode("utf-8"))
+    return h.hexdigest()
+
+
+# Two tier cache of per stage results: a bounded in memory LRU in front of a SQLite file
+class ResultCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_items=2048):
+        self.path = path
+        self.max_items = max_items
+        self.hits = Counter()
+        self.misses = Counter()
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT NOT NULL, stage TEXT NOT NULL, value BLOB NOT NULL, created REAL NOT NULL, "
+                "PRIMARY KEY (key, stage))"
+            )
+            self._conn.commit()
+
+    def _remember(self, item, value):
+        self._memory[item] = value
+        self._memory.move_to_end(item)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key, stage):
+        item = (key, stage)
+        with self._lock:
+            if item in self._memory:
+                self._memory.move_to_end(item)
+                self.hits[stage] += 1
+                return self._memory[item]
+            row = None
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value FROM results WHERE key = ? AND stage = ?", item
+                ).fetchone()
+            if row is None:
+                self.misses[stage] += 1
+                return MISSING
+            value = pickle.loads(row[0])
+            self._remember(item, value)
+            self.hits[stage] += 1
+            return value
+
+    def set(self, key, stage, value):
+        self.set_many(stage, [(key, value)])
+
+    def set_many(self, stage, items):
+        with self._lock:
+            rows = []
+            now = time.time()
+            for key, value in items:
+                self._remember((key, stage), value)
+                rows.append((key, stage, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now))
+            if self._conn is not None and rows:
+                self._conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", rows)
+                self._conn.commit()
+
+    # Drop the oldest rows on disk so the file stays below max_rows
+    def prune(self, max_rows):
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM results WHERE rowid IN ("
+                "SELECT rowid FROM results ORDER BY created DESC LIMIT -1 OFFSET ?)", (max_rows,)
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self.hits.clear()
+            self.misses.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM results")
+                self._conn.commit()
+
+    def stats(self):
+        stages = sorted(set(self.hits) | set(self.misses))
+        return {
+            stage: {"hits": self.hits[stage], "misses": self.misses[stage]}
+            for stage in stages
+        } | {
+            "total": {"hits": sum(self.hits.values()), "misses": sum(self.misses.values())},
+            "memory_items": len(self._memory),
+        }
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+# One shared cache per process
+def get_cache():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache()
+        return _default_cache
@@ -1,39 +1,197 @@
+import argparse
+import glob
+import json
+import os
+import zlib
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import TfidfVectorizer
-from preprocess import preprocess_text
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer, TfidfTransformer
+from sklearn.pipeline import Pipeline
+from preprocess import preprocess_many
 from sklearn.metrics import accuracy_score
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
 import joblib
+from model_store import building_version, publish
 
-#import the data
-data = pd.read_csv('../data/news.csv')
 
-#preprocess the text column
-data['clean_text'] = data['text'].apply(preprocess_text)
+# Saves the vectorizer and classifier under models/classifier/<version>/ and publishes it.
+# Serving (collecting, through the registry) switches to it on its next call.
+def save_version(classifier, vectorizer, metadata):
+    with building_version('classifier') as (version, out_dir):
+        joblib.dump(classifier, os.path.join(out_dir, 'classifier_model.pkl'))
+        joblib.dump(vectorizer, os.path.join(out_dir, 'tfidf_vectorizer.pkl'))
+        publish('classifier', version, metadata)
+    return version
 
-#define x and y
-x = data['clean_text']
-y = data['labels']
 
-#vectorize the text
-tfidfmodel = TfidfVectorizer(max_features=10000,ngram_range=(1, 3),min_df=2,max_df=0.95)
-x_vect = tfidfmodel.fit_transform(x)
+# === In-memory training (the original pipeline) ===
+def train_full(path='../data/news.csv'):
+    #import the data
+    data = pd.read_csv(path)
 
-#split the data into train and test
-x_train , x_test , y_train , y_test = train_test_split(x_vect , y , stratify=y,test_size=0.2 , random_state=42)
+    #preprocess the text column
+    data['clean_text'] = preprocess_many(data['text'], n_jobs=os.cpu_count() or 1)
 
-#model training
-model_logistic = LogisticRegression(max_iter=1000)
-model_logistic.fit(x_train , y_train)
-y_pred = model_logistic.predict(x_test)
+    #define x and y
+    x = data['clean_text']
+    y = data['labels']
 
+    #vectorize the text
+    tfidfmodel = TfidfVectorizer(max_features=10000,ngram_range=(1, 3),min_df=2,max_df=0.95)
+    x_vect = tfidfmodel.fit_transform(x)
 
-#saving the models to pickle files
-joblib.dump(model_logistic, '../models/classifier_model.pkl')
-joblib.dump(tfidfmodel, '../models/tfidf_vectorizer.pkl')
+    #split the data into train and test
+    x_train , x_test , y_train , y_test = train_test_split(x_vect , y , stratify=y,test_size=0.2 , random_state=42)
 
+    #model training
+    model_logistic = LogisticRegression(max_iter=1000)
+    model_logistic.fit(x_train , y_train)
+    y_pred = model_logistic.predict(x_test)
 
+    #saving the models with their held-out accuracy
+    return save_version(model_logistic, tfidfmodel, {
+        'mode': 'full',
+        'model': 'LogisticRegression',
+        'source': path,
+        'accuracy': round(float(accuracy_score(y_test, y_pred)), 4),
+        'n_train': int(x_train.shape[0]),
+        'n_test': int(x_test.shape[0]),
+        'n_features': len(tfidfmodel.vocabulary_),
+        'classes': [str(c) for c in model_logistic.classes_],
+    })
 
 
+# === Out-of-core training ===
+# The csv files are streamed in chunks. Pass 1 preprocesses every row once into a
+# jsonl spool file, collects the labels and the document frequencies of the hashed
+# 1-3 grams. Pass 2 fits the classifier chunk by chunk with partial_fit.
 
+def iter_labeled_chunks(source, chunksize=5000, text_column='text', label_column='labels'):
+    paths = sorted(glob.glob(os.path.join(source, '*.csv'))) if os.path.isdir(source) else [source]
+    for path in paths:
+        for chunk in pd.read_csv(path, usecols=[text_column, label_column], chunksize=chunksize):
+            chunk = chunk.dropna()
+            yield chunk[text_column].tolist(), chunk[label_column].tolist()
+
+
+# Rows go to the held-out set by a hash of their text, so the split is stable across runs
+def is_held_out(text, test_size):
+    return zlib.crc32(text.encode('utf-8')) % 1000 < test_size * 1000
+
+
+def iter_spool(path, chunksize):
+    texts, labels = [], []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            text, label = json.loads(line)
+            texts.append(text)
+            labels.append(label)
+            if len(texts) >= chunksize:
+                yield texts, labels
+                texts, labels = [], []
+    if texts:
+        yield texts, labels
+
+
+def make_hashing_vectorizer(n_features):
+    return HashingVectorizer(n_features=n_features, ngram_range=(1, 3), alternate_sign=False, norm=None)
+
+
+def train_incremental(sources, model='sgd', n_features=2 ** 20, use_idf=True, test_size=0.2,
+                      chunksize=5000, epochs=1, spool_dir='../data'):
+    n_jobs = os.cpu_count() or 1
+    hasher = make_hashing_vectorizer(n_features)
+    train_path = os.path.join(spool_dir, 'classifier_train.spool.jsonl')
+    test_path = os.path.join(spool_dir, 'classifier_test.spool.jsonl')
+
+    # Pass 1: preprocess once, split, count labels and document frequencies
+    doc_freq = np.zeros(n_features, dtype=np.int64)
+    n_train = n_test = 0
+    classes = set()
+    with open(train_path, 'w', encoding='utf-8') as train_out, open(test_path, 'w', encoding='utf-8') as test_out:
+        for source in sources:
+            for texts, labels in iter_labeled_chunks(source, chunksize=chunksize):
+                clean_texts = preprocess_many(texts, n_jobs=n_jobs)
+                train_texts = []
+                for raw, clean, label in zip(texts, clean_texts, labels):
+                    classes.add(label)
+                    if is_held_out(raw, test_size):
+                        test_out.write(json.dumps([clean, label]) + '\n')
+                        n_test += 1
+                    else:
+                        train_out.write(json.dumps([clean, label]) + '\n')
+                        train_texts.append(clean)
+                        n_train += 1
+                if use_idf and train_texts:
+                    counts = hasher.transform(train_texts)
+                    doc_freq += np.bincount(counts.indices, minlength=n_features)
+
+    # Same smoothed idf TfidfTransformer computes, set from the streamed counts
+    steps = [('hash', hasher)]
+    if use_idf:
+        tfidf = TfidfTransformer(smooth_idf=True, sublinear_tf=False)
+        tfidf.idf_ = np.log((1 + n_train) / (1 + doc_freq)) + 1
+        tfidf.n_features_in_ = n_features
+        steps.append(('tfidf', tfidf))
+    else:
+        steps.append(('tfidf', TfidfTransformer(use_idf=False).fit(hasher.transform(['']))))
+    vectorizer = Pipeline(steps)
+
+    classes = np.array(sorted(classes))
+    if model == 'nb':
+        classifier = MultinomialNB(alpha=0.01)
+    else:
+        classifier = SGDClassifier(loss='log_loss', alpha=1e-6, random_state=42)
+
+    # Pass 2: partial_fit chunk by chunk, shuffled within each chunk
+    rng = np.random.default_rng(42)
+    for _ in range(epochs):
+        for texts, labels in iter_spool(train_path, chunksize):
+            order = rng.permutation(len(texts))
+            x = vectorizer.transform([texts[i] for i in order])
+            classifier.partial_fit(x, [labels[i] for i in order], classes=classes)
+
+    correct = 0
+    for texts, labels in iter_spool(test_path, chunksize):
+        y_pred = classifier.predict(vectorizer.transform(texts))
+        correct += int((y_pred == np.array(labels)).sum())
+
+    os.remove(train_path)
+    os.remove(test_path)
+    return save_version(classifier, vectorizer, {
+        'mode': 'incremental',
+        'model': type(classifier).__name__,
+        'sources': list(sources),
+        'accuracy': round(correct / n_test, 4) if n_test else None,
+        'n_train': n_train,
+        'n_test': n_test,
+        'n_features': n_features,
+        'n_features_seen': int((doc_freq > 0).sum()) if use_idf else None,
+        'use_idf': use_idf,
+        'epochs': epochs,
+        'classes': [str(c) for c in classes],
+    })
+
+
+# The guard keeps worker processes from re-running the training on import
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the category classifier")
+    parser.add_argument("sources", nargs="*", default=['../data/news.csv'],
+                        help="csv files or directories of csv shards")
+    parser.add_argument("--incremental", action="store_true",
+                        help="stream the data with hashed features and a partial_fit model")
+    parser.add_argument("--model", choices=["sgd", "nb"], default="sgd")
+    parser.add_argument("--n-features", type=int, default=2 ** 20)
+    parser.add_argument("--no-idf", action="store_true")
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--chunksize", type=int, default=5000)
+    args = parser.parse_args()
+
+    if args.incremental:
+        version = train_incremental(args.sources, model=args.model, n_features=args.n_features,
+                                    use_idf=not args.no_idf, chunksize=args.chunksize, epochs=args.epochs)
+    else:
+        version = train_full(args.sources[0])
+    print(f"Published classifier version {version}")
@@ -1,42 +1,54 @@
-import joblib
+from . import registry
+from .instrument import instrumented
 from .preprocess import preprocess_text
 from .summarization import abstractive_summary
-from gensim import corpora, models
 
-# Load models
-clf = joblib.load('c:/Users/g.sneha2/Desktop/nesintel/models/classifier_model.pkl')
-tfidf = joblib.load( 'c:/Users/g.sneha2/Desktop/nesintel/models/tfidf_vectorizer.pkl')
-lda_model = models.LdaModel.load('c:/Users/g.sneha2/Desktop/nesintel/models/lda_model.gensim')
-dictionary = corpora.Dictionary.load('c:/Users/g.sneha2/Desktop/nesintel/models/lda_dictionary.dict')
+# Models are loaded lazily through the registry; the old module attributes still work
+_model_names = {"clf": "classifier", "tfidf": "tfidf", "lda_model": "lda", "dictionary": "dictionary"}
+
+
+def __getattr__(name):
+    if name in _model_names:
+        return registry.get(_model_names[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def predict_category(text):
-    clean_text = preprocess_text(text)
-    vect_text = tfidf.transform([clean_text])
-    pred = clf.predict(vect_text)
-    return pred[0]
+    return predict_categories([preprocess_text(text)])[0]
+
+# Batch variant: takes already preprocessed texts and vectorizes them in one sparse transform
+@instrumented("classifier", lambda result, clean_texts: {"docs": len(clean_texts)})
+def predict_categories(clean_texts):
+    if not clean_texts:
+        return []
+    tfidf, clf = registry.get_many("tfidf", "classifier")
+    vect_texts = tfidf.transform(clean_texts)
+    return list(clf.predict(vect_texts))
 
 def get_summary(text):
     return abstractive_summary(text)
 
 def topic_modeling(text, top_n=1):
-    clean_tokens = preprocess_text(text).split()
-    bow = dictionary.doc2bow(clean_tokens)
-    topic_probs = lda_model.get_document_topics(bow)
-    
-    # Sort by probability and take top topic(s)
-    top_topics = sorted(topic_probs, key=lambda x: -x[1])[:top_n]
-    
-    topics_with_keywords = []
-    for topic_id, prob in top_topics:
-        keywords = lda_model.show_topic(topic_id, topn=10)
-        topics_with_keywords.append((topic_id, keywords))
-
-    return topics_with_keywords
-
-
-
-
-
-
-
+    return topic_modeling_batch([preprocess_text(text)], top_n=top_n)[0]
+
+# Batch variant: takes already preprocessed texts, keywords are looked up once per topic
+@instrumented("lda", lambda result, clean_texts, **_: {"docs": len(clean_texts)})
+def topic_modeling_batch(clean_texts, top_n=1):
+    lda_model, dictionary = registry.get_many("lda", "dictionary")
+    keyword_cache = {}
+    results = []
+    for clean_text in clean_texts:
+        bow = dictionary.doc2bow(clean_text.split())
+        topic_probs = lda_model.get_document_topics(bow)
+
+        # Sort by probability and take top topic(s)
+        top_topics = sorted(topic_probs, key=lambda x: -x[1])[:top_n]
+
+        topics_with_keywords = []
+        for topic_id, prob in top_topics:
+            if topic_id not in keyword_cache:
+                keyword_cache[topic_id] = lda_model.show_topic(topic_id, topn=10)
+            topics_with_keywords.append((topic_id, keyword_cache[topic_id]))
+        results.append(topics_with_keywords)
+
+    return results
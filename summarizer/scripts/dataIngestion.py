@@ -1,13 +1,15 @@
 from newspaper import Article
 from newspaper.article import ArticleException
-import fitz
 from youtube_transcript_api import YouTubeTranscriptApi
-from PIL import Image
-import pytesseract
-import re
 from deep_translator import GoogleTranslator
-from transformers import pipeline
+from . import registry
+from .instrument import instrumented
+from .pdf_ingest import extract_pdf_text
+from . import ocr
+from .summarization import split_windows, spread_windows
+from .ingest_helpers import TRANSLATE_MAX_CHARS, pack_sentences, split_sentences, youtube_video_id
 
+@instrumented("url_download", lambda text, url: {"chars": len(text)})
 def extract_text_from_url(url):
     try:
         article = Article(url)
@@ -18,20 +20,14 @@ def extract_text_from_url(url):
         print(f"Failed to download article: {e}")
         return ""
 
-def extract_text_from_pdf(pdf_file):
-    doc = fitz.open(stream=pdf_file.read(), filetype="pdf")
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    return text
+def extract_text_from_pdf(pdf_file, workers=1):
+    return extract_pdf_text(pdf_file, workers=workers)
 
+@instrumented("youtube_transcript", lambda text, url: {"chars": len(text)})
 def extract_text_from_youtube(url):
     try: 
-        if "v=" in url:
-            video_id = url.split("v=")[-1].split("&")[0]
-        elif "youtu.be/" in url:
-            video_id = url.split("youtu.be/")[-1].split("?")[0]
-        else:
+        video_id = youtube_video_id(url)
+        if video_id is None:
             return "Invalid YouTube URL format."
         transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=['en'])
         full_text = " ".join([entry["text"] for entry in transcript])
@@ -40,36 +36,131 @@ def extract_text_from_youtube(url):
     except Exception as e:
         return f"Failed to retrieve transcript: {str(e)}"
     
-pytesseract.pytesseract.tesseract_cmd = r'C:\\Program Files\\Tesseract-OCR\\tesseract.exe'
+@instrumented("ocr", lambda text, image_file, **_: {"images": 1, "chars": len(text)})
+def extract_text_from_image(image_file, **options):
+    # Multi-page TIFFs give one text per page
+    return "\n".join(ocr.ocr_file(image_file, **options))
 
-def extract_text_from_image(image_file):
-    image = Image.open(image_file)
-    text = pytesseract.image_to_string(image)
-    return text
+# Several uploads at once, OCRed across a process pool
+@instrumented("ocr", lambda texts, image_files, **_: {"images": len(image_files), "chars": sum(map(len, texts))})
+def extract_text_from_images(image_files, workers=None, **options):
+    return ocr.ocr_files(image_files, workers=workers, **options)
 
+@instrumented("translate", lambda result, text, src_lang: {"chars": len(text)})
 def translate_to_english(text: str, src_lang: str) -> str:
     try:
-        # Split the text into paragraphs or sentences
-        chunks = re.split(r'(?<=[।.!?])\s+', text.strip())  
+        # One translator and one request per ~4500 characters instead of per sentence
+        translator = GoogleTranslator(source=src_lang, target='en')
         translated_chunks = []
-        for chunk in chunks:
-            if chunk.strip():
-                translated = GoogleTranslator(source=src_lang, target='en').translate(chunk)
-                translated_chunks.append(translated)
+        for chunk in pack_sentences(split_sentences(text)):
+            translated = translator.translate(chunk)
+            translated_chunks.append(" ".join(translated.split("\n")))
         return " ".join(translated_chunks)
     except Exception as e:
         return f"Translation Error: {str(e)}"
     
-fake_news_model = pipeline("text-classification", model="Pulk17/Fake-News-Detection")     
+def __getattr__(name):
+    if name == "fake_news_model":
+        return registry.get("fake_news")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+     
 
 label_map = {
     "LABEL_0": "REAL",
     "LABEL_1": "FAKE"
 }
 
+@instrumented("fake_news", lambda result, text: {"docs": 1})
 def detect_fake_news(text):
-    result = fake_news_model(text[:512])[0]
+    result = registry.get("fake_news")(text[:512])[0]
     label = label_map.get(result['label'], result['label'])
     score = result['score']
     return label, round(score, 3)
 
+# Full document scoring. The text is tokenized once and cut into overlapping
+# windows of the model's 512 tokens, windows are scored in batched forward passes
+# and aggregated:
+#   mean     - average class probabilities over windows
+#   weighted - same, weighted by the number of tokens in each window
+#   max      - the verdict of the single most confident window
+# Scoring stops early once the aggregate is at least early_exit confident.
+@instrumented("fake_news_document", lambda result, text, **_: {"docs": 1, "chars": len(text)})
+def detect_fake_news_document(text, window=512, overlap=64, aggregate="mean", max_windows=32,
+                              batch_size=8, early_exit=0.95):
+    import torch
+
+    classifier = registry.get("fake_news")
+    tokenizer, model = classifier.tokenizer, classifier.model
+    labels = [label_map.get(model.config.id2label[i], model.config.id2label[i])
+              for i in range(model.config.num_labels)]
+
+    ids = tokenizer(text, add_special_tokens=False)['input_ids']
+    content = window - tokenizer.num_special_tokens_to_add()
+    all_windows = split_windows(ids, window_size=content, overlap=overlap) if ids else []
+    positions = spread_windows(list(range(len(all_windows))), max_windows)
+    windows = [all_windows[i] for i in positions]
+    if not windows:
+        # Nothing to score: no tokens, or max_windows=0
+        return {"label": "Unknown", "confidence": 0.0, "windows_total": len(all_windows),
+                "windows_scored": 0, "early_exit": False, "windows": []}
+    batch_size = batch_size or len(windows)
+
+    probs, lengths = [], []
+    early = False
+    for start in range(0, len(windows), batch_size):
+        batch = [tokenizer.build_inputs_with_special_tokens(w) for w in windows[start:start + batch_size]]
+        width = max(len(b) for b in batch)
+        input_ids = torch.full((len(batch), width), tokenizer.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(batch), width), dtype=torch.long)
+        for row, b in enumerate(batch):
+            input_ids[row, :len(b)] = torch.tensor(b, dtype=torch.long)
+            attention_mask[row, :len(b)] = 1
+        with torch.no_grad():
+            logits = model(input_ids=input_ids.to(model.device), attention_mask=attention_mask.to(model.device)).logits
+        probs.extend(torch.softmax(logits.float(), dim=-1).cpu().tolist())
+        lengths.extend(len(w) for w in windows[start:start + batch_size])
+
+        doc_probs = _aggregate(probs, lengths, aggregate)
+        if early_exit and start + batch_size < len(windows) and max(doc_probs) >= early_exit:
+            early = True
+            break
+
+    doc_probs = _aggregate(probs, lengths, aggregate)
+    best = max(range(len(doc_probs)), key=doc_probs.__getitem__)
+    fake_index = labels.index("FAKE") if "FAKE" in labels else None
+
+    # Token offsets of the scored windows, for the per-window view in the UI
+    step = max(1, content - overlap)
+    offsets = [i * step for i in positions[:len(probs)]]
+    return {
+        "label": labels[best],
+        "confidence": round(doc_probs[best], 3),
+        "windows_total": len(all_windows),
+        "windows_scored": len(probs),
+        "early_exit": early,
+        "windows": [
+            {
+                "start_token": offset,
+                "end_token": offset + length,
+                "label": labels[max(range(len(p)), key=p.__getitem__)],
+                "confidence": round(max(p), 3),
+                "fake_probability": round(p[fake_index], 3) if fake_index is not None else None,
+            }
+            for offset, length, p in zip(offsets, lengths, probs)
+        ],
+    }
+
+def _aggregate(probs, lengths, aggregate):
+    if aggregate == "max":
+        return max(probs, key=max)
+    weights = lengths if aggregate == "weighted" else [1] * len(probs)
+    total = sum(weights)
+    return [sum(p[k] * w for p, w in zip(probs, weights)) / total for k in range(len(probs[0]))]
+
+# Batch variant: one pipeline call for the whole list of texts
+@instrumented("fake_news", lambda result, texts, **_: {"docs": len(texts)})
+def detect_fake_news_batch(texts, batch_size=16):
+    if not texts:
+        return []
+    results = registry.get("fake_news")([text[:512] for text in texts], batch_size=batch_size)
+    return [(label_map.get(r['label'], r['label']), round(r['score'], 3)) for r in results]
@@ -0,0 +1,171 @@
+import difflib
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from .ner import sentence_spans
+
+# Near-duplicate index over analyzed documents.
+# Documents are reduced to the word shingles of their preprocess_text output and
+# summarized by a MinHash signature; LSH banding finds candidates in a few dict
+# lookups and the signature agreement estimates their Jaccard similarity.
+# Signatures, the document text and its analysis live in a SQLite file; the band
+# buckets are rebuilt in memory on open, so a lookup never touches the disk.
+
+DEFAULT_INDEX_PATH = os.environ.get(
+    "NEWSSENSE_DEDUP_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "dedup.sqlite"),
+)
+THRESHOLD = float(os.environ.get("NEWSSENSE_DEDUP_THRESHOLD", "0.9"))
+NUM_PERM = 128
+BANDS = 16  # 8 rows per band: documents with Jaccard 0.9 share a bucket with probability > 0.999
+SHINGLE_SIZE = 3
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, _PRIME, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+_B = _rng.randint(0, _PRIME, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+
+
+def shingles(clean_text, size=SHINGLE_SIZE):
+    tokens = clean_text.split()
+    if len(tokens) < size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+# MinHash signature of a preprocessed text, or None when it has no words
+def signature(clean_text):
+    grams = shingles(clean_text)
+    if not grams:
+        return None
+    hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+    hashes %= _PRIME
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0).astype(np.uint32)
+
+
+def similarity(sig_a, sig_b):
+    return float(np.count_nonzero(sig_a == sig_b)) / NUM_PERM
+
+
+def _band_keys(sig):
+    rows = NUM_PERM // BANDS
+    # Stable across processes, unlike hash()
+    return [int.from_bytes(hashlib.blake2b(sig[band * rows:(band + 1) * rows].tobytes(), digest_size=7).digest(),
+                           "big") for band in range(BANDS)]
+
+
+# Sentences only in one of two texts, to show what changed in a syndicated copy
+def diff_texts(old, new):
+    old_sentences = [old[s:e] for s, e in sentence_spans(old or "")]
+    new_sentences = [new[s:e] for s, e in sentence_spans(new or "")]
+    removed, added = [], []
+    matcher = difflib.SequenceMatcher(None, old_sentences, new_sentences, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag in ("replace", "delete"):
+            removed.extend(old_sentences[i1:i2])
+        if tag in ("replace", "insert"):
+            added.extend(new_sentences[j1:j2])
+    return {"removed": removed, "added": added}
+
+
+class NearDuplicateIndex:
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._buckets = defaultdict(list)
+        self._signatures = {}
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "id INTEGER PRIMARY KEY, key TEXT NOT NULL, variant TEXT NOT NULL, signature BLOB NOT NULL, "
+            "text TEXT NOT NULL, analysis BLOB NOT NULL, created REAL NOT NULL, UNIQUE (key, variant))"
+        )
+        self._conn.commit()
+        for doc, variant, blob in self._conn.execute("SELECT id, variant, signature FROM documents"):
+            self._index(doc, variant, np.frombuffer(blob, dtype=np.uint32))
+
+    def _index(self, doc, variant, sig):
+        self._signatures[doc] = (variant, sig)
+        for band, bucket in enumerate(_band_keys(sig)):
+            self._buckets[(band, bucket)].append(doc)
+
+    def __len__(self):
+        return len(self._signatures)
+
+    # Best stored document with similarity >= threshold among those analyzed the same
+    # way (variant), as (doc_id, similarity), or None
+    def query(self, sig, variant, threshold=THRESHOLD):
+        if sig is None:
+            return None
+        best = None
+        with self._lock:
+            seen = set()
+            for band, bucket in enumerate(_band_keys(sig)):
+                for doc in self._buckets.get((band, bucket), ()):
+                    if doc in seen:
+                        continue
+                    seen.add(doc)
+                    doc_variant, doc_sig = self._signatures[doc]
+                    if doc_variant != variant:
+                        continue
+                    score = similarity(sig, doc_sig)
+                    if score >= threshold and (best is None or score > best[1]):
+                        best = (doc, score)
+        return best
+
+    def insert(self, key, variant, sig, text, analysis):
+        if sig is None:
+            return None
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO documents (key, variant, signature, text, analysis, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, variant, sig.tobytes(), text, pickle.dumps(analysis, protocol=pickle.HIGHEST_PROTOCOL),
+                 time.time()),
+            )
+            if cursor.rowcount == 0:
+                self._conn.commit()
+                return None
+            doc = cursor.lastrowid
+            self._conn.commit()
+            self._index(doc, variant, sig)
+            return doc
+
+    # (key, text, analysis) of a stored document
+    def load(self, doc):
+        with self._lock:
+            key, text, blob = self._conn.execute(
+                "SELECT key, text, analysis FROM documents WHERE id = ?", (doc,)
+            ).fetchone()
+        return key, text, pickle.loads(blob)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._signatures.clear()
+            self._conn.execute("DELETE FROM documents")
+            self._conn.commit()
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+# One shared index per process
+def get_index():
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = NearDuplicateIndex()
+        return _default_index
@@ -1,58 +1,43 @@
-import spacy
-from textblob import TextBlob
 import os
-from fpdf import FPDF
-
-nlp = spacy.load("en_core_web_sm")
-def extract_entities(text):
-    doc = nlp(text)
-    unique_entities = set((ent.text.strip(), ent.label_) for ent in doc.ents)
-    return list(unique_entities)
-
+from . import ner, registry, sentiment
+from .instrument import instrumented
+from .reports import ReportWriter, sanitize_text
 
 
-def analyze_sentiment(text):
-    blob = TextBlob(text)
-    polarity = blob.sentiment.polarity
-    if polarity > 0:
-        return "Positive"
-    elif polarity < 0:
-        return "Negative"
-    else:
-        return "Neutral"
+def __getattr__(name):
+    if name == "nlp":
+        return registry.get("spacy")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def sanitize_text(text):
-    return text.encode("latin-1", "replace").decode("latin-1")
+def _unique_entities(mentions):
+    return list(dict.fromkeys((m["text"], m["label"]) for m in mentions))
 
-# Export to PDF (fpdf, Latin-1 safe)
-def export_summary_to_pdf(filename, category, summary, keywords, sentiment, entities):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_auto_page_break(auto=True, margin=15)
+# (text, label) pairs in order of first mention; see scripts/ner.py for counts and offsets
+@instrumented("ner", lambda result, text: {"docs": 1, "chars": len(text)})
+def extract_entities(text):
+    return _unique_entities(ner.extract_mentions([text])[0])
 
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(0, 10, sanitize_text("NewsSense Summary Report"), ln=True)
+# Batch variant: the chunks of all texts go through one nlp.pipe call
+@instrumented("ner", lambda result, texts, **_: {"docs": len(texts), "chars": sum(map(len, texts))})
+def extract_entities_batch(texts, batch_size=32, n_process=ner.N_PROCESS):
+    return [_unique_entities(m) for m in ner.extract_mentions(texts, batch_size=batch_size, n_process=n_process)]
 
-    pdf.set_font("Arial", "", 12)
-    pdf.ln(5)
-    pdf.cell(0, 10, sanitize_text(f"Category: {category}"), ln=True)
-    pdf.ln(5)
 
-    pdf.multi_cell(0, 10, sanitize_text(f"Summary:\n{summary}"))
-    pdf.ln(5)
 
-    pdf.cell(0, 10, sanitize_text(f"Sentiment: {sentiment}"), ln=True)
-    pdf.ln(5)
+# Label from the batched lexicon engine; see scripts/sentiment.py for sentence level stats
+def analyze_sentiment(text, neutral_band=sentiment.NEUTRAL_BAND):
+    return sentiment.score_documents([text], neutral_band)[0]["label"]
 
-    pdf.multi_cell(0, 10, sanitize_text(f"Keywords: {', '.join(keywords)}"))
-    pdf.ln(5)
+def analyze_sentiment_batch(texts, neutral_band=sentiment.NEUTRAL_BAND):
+    return [result["label"] for result in sentiment.score_documents(texts, neutral_band)]
 
-    pdf.cell(0, 10, sanitize_text("Named Entities:"), ln=True)
-    for ent_text, ent_type in entities:
-        # Replace bullet (•) with hyphen (-)
-        pdf.cell(0, 10, sanitize_text(f"- {ent_text} ({ent_type})"), ln=True)
 
-    output_path = os.path.join("exports", filename)
-    os.makedirs("exports", exist_ok=True)
-    pdf.output(output_path)
-    return output_path
\ No newline at end of file
+# Export to PDF with the Unicode report font (see reports.py), Latin-1 with the core font
+# when none is installed.
+# Bare file names go under exports/, paths are written where the caller asked.
+def export_summary_to_pdf(filename, category, summary, keywords, sentiment, entities):
+    output_path = filename if os.path.dirname(filename) else os.path.join("exports", filename)
+    writer = ReportWriter()
+    writer.article({"category": category, "summary": summary, "keywords": keywords,
+                    "sentiment": sentiment, "entities": entities})
+    return writer.save(output_path)
@@ -0,0 +1,42 @@
+import re
+
+# Text helpers of the ingestion layer without its network dependencies,
+# shared by dataIngestion and async_ingest.
+
+
+def youtube_video_id(url):
+    if "v=" in url:
+        return url.split("v=")[-1].split("&")[0]
+    if "youtu.be/" in url:
+        return url.split("youtu.be/")[-1].split("?")[0]
+    return None
+
+
+# Google Translate rejects requests over 5000 characters
+TRANSLATE_MAX_CHARS = 4500
+
+def split_sentences(text):
+    return [s for s in re.split(r'(?<=[।.!?])\s+', text.strip()) if s.strip()]
+
+# Pack sentences into as few request sized chunks as possible, one sentence per line.
+# Sentences longer than max_chars are cut at whitespace.
+def pack_sentences(sentences, max_chars=TRANSLATE_MAX_CHARS):
+    packs, current, size = [], [], 0
+    for sentence in sentences:
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            piece, sentence = sentence[:cut], sentence[cut:].lstrip()
+            if current:
+                packs.append("\n".join(current))
+                current, size = [], 0
+            packs.append(piece)
+        if current and size + len(sentence) + 1 > max_chars:
+            packs.append("\n".join(current))
+            current, size = [], 0
+        if sentence:
+            current.append(sentence)
+            size += len(sentence) + 1
+    if current:
+        packs.append("\n".join(current))
+    return packs
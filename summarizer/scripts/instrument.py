@@ -0,0 +1,190 @@
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from .registry import current_rss
+
+# Per stage wall time, CPU time, input size and memory, kept in process.
+# Export with to_prometheus() or to_jsonl(); set NEWSSENSE_PROFILE=1 (or call
+# enable_profiling()) to also collect a cProfile per stage.
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+_PROFILE = os.environ.get("NEWSSENSE_PROFILE", "") not in ("", "0")
+_stats = {}
+_events = deque(maxlen=10000)
+_profiles = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def peak_rss():
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def enable_profiling(enabled=True):
+    global _PROFILE
+    _PROFILE = enabled
+
+
+def _record(name, wall, cpu, rss_delta, peak_delta, sizes):
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = {
+                "calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "max_wall_seconds": 0.0,
+                "rss_delta_bytes": 0, "peak_rss_delta_bytes": 0, "sizes": {},
+                "recent_wall": deque(maxlen=1000),
+            }
+        stats["calls"] += 1
+        stats["wall_seconds"] += wall
+        stats["cpu_seconds"] += cpu
+        stats["max_wall_seconds"] = max(stats["max_wall_seconds"], wall)
+        stats["rss_delta_bytes"] += rss_delta
+        stats["peak_rss_delta_bytes"] = max(stats["peak_rss_delta_bytes"], peak_delta)
+        stats["recent_wall"].append(wall)
+        for unit, value in sizes.items():
+            stats["sizes"][unit] = stats["sizes"].get(unit, 0) + value
+        _events.append({"stage": name, "time": time.time(), "wall_seconds": round(wall, 6),
+                        "cpu_seconds": round(cpu, 6), "rss_delta_bytes": rss_delta,
+                        "peak_rss_delta_bytes": peak_delta, **sizes})
+
+
+# Time a block of work. The yielded dict can be filled with sizes that are only
+# known at the end, e.g. `with stage("pdf_parse") as sizes: ...; sizes["pages"] = n`
+@contextmanager
+def stage(name, **sizes):
+    # Only the outermost stage of a thread is profiled, nested profilers are not allowed
+    profiler = None
+    if _PROFILE and not getattr(_local, "profiling", False):
+        profiler = cProfile.Profile()
+        _local.profiling = True
+    rss_before = current_rss()
+    peak_before = peak_rss()
+    cpu_start = time.thread_time()
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield sizes
+    finally:
+        if profiler:
+            profiler.disable()
+            _local.profiling = False
+        wall = time.perf_counter() - start
+        cpu = time.thread_time() - cpu_start
+        _record(name, wall, cpu, current_rss() - rss_before, peak_rss() - peak_before,
+                {k: v for k, v in sizes.items() if isinstance(v, (int, float))})
+        if profiler:
+            with _lock:
+                if name in _profiles:
+                    _profiles[name].add(profiler)
+                else:
+                    _profiles[name] = pstats.Stats(profiler)
+
+
+# Decorator form. size(result, *args, **kwargs) returns the sizes to record,
+# e.g. {"docs": 8, "chars": 12000}.
+def instrumented(name, size=None):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name) as sizes:
+                result = func(*args, **kwargs)
+                if size is not None:
+                    sizes.update(size(result, *args, **kwargs))
+                return result
+        return wrapper
+    return decorator
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def snapshot():
+    with _lock:
+        result = {}
+        for name, stats in _stats.items():
+            recent = list(stats["recent_wall"])
+            calls = stats["calls"]
+            result[name] = {
+                "calls": calls,
+                "wall_seconds": round(stats["wall_seconds"], 4),
+                "cpu_seconds": round(stats["cpu_seconds"], 4),
+                "mean_wall_seconds": round(stats["wall_seconds"] / calls, 4),
+                "p95_wall_seconds": round(_percentile(recent, 0.95), 4),
+                "max_wall_seconds": round(stats["max_wall_seconds"], 4),
+                "rss_delta_mb": round(stats["rss_delta_bytes"] / (1024 * 1024), 1),
+                "peak_rss_delta_mb": round(stats["peak_rss_delta_bytes"] / (1024 * 1024), 1),
+                **{f"{unit}_total": value for unit, value in stats["sizes"].items()},
+                **{f"{unit}_per_sec": round(value / stats["wall_seconds"], 1)
+                   for unit, value in stats["sizes"].items() if stats["wall_seconds"]},
+            }
+        return result
+
+
+def to_prometheus(prefix="newssense_stage"):
+    lines = []
+    metrics = (("calls_total", "calls", "counter"),
+               ("wall_seconds_total", "wall_seconds", "counter"),
+               ("cpu_seconds_total", "cpu_seconds", "counter"),
+               ("max_wall_seconds", "max_wall_seconds", "gauge"),
+               ("peak_rss_delta_bytes", "peak_rss_delta_bytes", "gauge"))
+    with _lock:
+        for metric, key, kind in metrics:
+            lines.append(f"# TYPE {prefix}_{metric} {kind}")
+            for name, stats in sorted(_stats.items()):
+                lines.append(f'{prefix}_{metric}{{stage="{name}"}} {stats[key]}')
+        lines.append(f"# TYPE {prefix}_input_total counter")
+        for name, stats in sorted(_stats.items()):
+            for unit, value in sorted(stats["sizes"].items()):
+                lines.append(f'{prefix}_input_total{{stage="{name}",unit="{unit}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+# Per call events as JSON lines; appended to path if given
+def to_jsonl(path=None):
+    with _lock:
+        events = list(_events)
+    text = "".join(json.dumps(event) + "\n" for event in events)
+    if path:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(text)
+    return text
+
+
+def profile_report(name, limit=20):
+    with _lock:
+        stats = _profiles.get(name)
+        if stats is None:
+            return ""
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _events.clear()
+        _profiles.clear()
@@ -0,0 +1,105 @@
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+
+# Layout of the models directory. Trained models are written to
+# <MODELS_DIR>/<kind>/<version>/ and the CURRENT file next to the versions
+# names the one that serving should use. The flat files shipped in
+# MODELS_DIR are used while a kind has no published version.
+#
+# This module has no package relative imports so the training scripts can
+# import it directly, like preprocess.
+MODELS_DIR = os.environ.get(
+    "NEWSSENSE_MODELS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models"),
+)
+
+
+def model_path(filename):
+    return os.path.join(MODELS_DIR, filename)
+
+
+def kind_dir(kind):
+    return os.path.join(MODELS_DIR, kind)
+
+
+def version_path(kind, version):
+    return os.path.join(kind_dir(kind), version)
+
+
+def new_version(kind):
+    version = time.strftime("%Y%m%d-%H%M%S")
+    path = version_path(kind, version)
+    suffix = 1
+    while os.path.exists(path):
+        suffix += 1
+        path = version_path(kind, f"{version}-{suffix}")
+    os.makedirs(path)
+    return os.path.basename(path), path
+
+
+# new_version for a block that writes and publishes the version; if the block
+# fails the directory is removed, so a failed run leaves no unpublished version behind
+@contextmanager
+def building_version(kind):
+    version, path = new_version(kind)
+    try:
+        yield version, path
+    except BaseException:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+
+
+# Write the metadata and switch CURRENT to the new version in one rename,
+# so readers never see a half written pointer
+def publish(kind, version, metadata=None):
+    path = version_path(kind, version)
+    meta = dict(metadata or {}, version=version, published_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+    with open(os.path.join(path, "metadata.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    pointer = os.path.join(kind_dir(kind), "CURRENT")
+    tmp = pointer + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(version)
+    os.replace(tmp, pointer)
+    return path
+
+
+def current_version(kind):
+    try:
+        with open(os.path.join(kind_dir(kind), "CURRENT")) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def list_versions(kind):
+    if not os.path.isdir(kind_dir(kind)):
+        return []
+    return sorted(name for name in os.listdir(kind_dir(kind))
+                  if os.path.isdir(version_path(kind, name)))
+
+
+def read_metadata(kind, version=None):
+    version = version or current_version(kind)
+    if version is None:
+        return None
+    try:
+        with open(os.path.join(version_path(kind, version), "metadata.json")) as f:
+            return json.load(f)
+    except OSError:
+        return None
+
+
+# A model file of a given version; version None means the flat file in MODELS_DIR
+def version_file(kind, version, filename):
+    if version is None:
+        return model_path(filename)
+    return os.path.join(version_path(kind, version), filename)
+
+
+# Where a model file should be loaded from: the current version if there is one
+def resolve(kind, filename):
+    return version_file(kind, current_version(kind) if kind else None, filename)
@@ -0,0 +1,93 @@
+import os
+import re
+
+from . import registry
+from .instrument import stage
+
+# Entity extraction for long texts and large batches.
+# Uses the trimmed "spacy_ner" pipeline (tok2vec + ner only), splits documents into
+# sentence aligned chunks well below spaCy's max_length, and streams the chunks of
+# all documents through one nlp.pipe call. Entity offsets are relative to the
+# original document.
+
+CHUNK_CHARS = int(os.environ.get("NEWSSENSE_NER_CHUNK_CHARS", "20000"))
+BATCH_SIZE = int(os.environ.get("NEWSSENSE_NER_BATCH_SIZE", "64"))
+N_PROCESS = int(os.environ.get("NEWSSENSE_NER_PROCESSES", "1"))
+
+_SENTENCE_END = re.compile(r'(?<=[।.!?])\s+')
+
+
+# (start, end) character spans of the sentences of text
+def sentence_spans(text):
+    spans, start = [], 0
+    for match in _SENTENCE_END.finditer(text):
+        spans.append((start, match.start()))
+        start = match.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+
+# The sentences of text as strings, split where sentence_spans splits.
+# Trailing whitespace is not kept; whitespace only text is one empty sentence.
+def split_sentences(text):
+    return _SENTENCE_END.split(text.rstrip()) if text else []
+
+
+# Split text into (offset, chunk) pairs of at most max_chars, cutting between
+# sentences where possible and at whitespace inside overlong sentences.
+def chunk_text(text, max_chars=CHUNK_CHARS):
+    if len(text) <= max_chars:
+        return [(0, text)] if text.strip() else []
+    chunks = []
+    chunk_start = chunk_end = None
+    for start, end in sentence_spans(text):
+        if chunk_start is not None and end - chunk_start > max_chars:
+            chunks.append((chunk_start, text[chunk_start:chunk_end]))
+            chunk_start = None
+        while end - start > max_chars:
+            cut = text.rfind(" ", start, start + max_chars)
+            cut = cut if cut > start else start + max_chars
+            chunks.append((start, text[start:cut]))
+            start = cut
+        if chunk_start is None:
+            chunk_start = start
+        chunk_end = end
+    if chunk_start is not None:
+        chunks.append((chunk_start, text[chunk_start:chunk_end]))
+    return [(offset, chunk) for offset, chunk in chunks if chunk.strip()]
+
+
+# Every entity mention of every text as {"text", "label", "start", "end"}, in document order
+def extract_mentions(texts, batch_size=BATCH_SIZE, n_process=N_PROCESS, max_chars=CHUNK_CHARS):
+    texts = [text or "" for text in texts]
+    nlp = registry.get("spacy_ner")
+    max_chars = min(max_chars, nlp.max_length)
+    chunks = [(chunk, (index, offset)) for index, text in enumerate(texts)
+              for offset, chunk in chunk_text(text, max_chars)]
+    mentions = [[] for _ in texts]
+    with stage("ner_pipe", docs=len(texts), chunks=len(chunks), chars=sum(map(len, texts))):
+        for doc, (index, offset) in nlp.pipe(chunks, as_tuples=True, batch_size=batch_size, n_process=n_process):
+            for ent in doc.ents:
+                text = ent.text.strip()
+                if text:
+                    mentions[index].append({"text": text, "label": ent.label_,
+                                            "start": offset + ent.start_char, "end": offset + ent.end_char})
+    return mentions
+
+
+# Group the mentions of one document by (text, label), most frequent first
+def merge_mentions(mentions):
+    merged = {}
+    for mention in mentions:
+        key = (mention["text"], mention["label"])
+        entry = merged.get(key)
+        if entry is None:
+            entry = merged[key] = {"text": mention["text"], "label": mention["label"], "count": 0, "offsets": []}
+        entry["count"] += 1
+        entry["offsets"].append((mention["start"], mention["end"]))
+    return sorted(merged.values(), key=lambda e: (-e["count"], e["offsets"][0][0]))
+
+
+def extract_entity_details(texts, batch_size=BATCH_SIZE, n_process=N_PROCESS, max_chars=CHUNK_CHARS):
+    return [merge_mentions(m) for m in extract_mentions(texts, batch_size, n_process, max_chars)]
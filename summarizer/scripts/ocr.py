@@ -0,0 +1,121 @@
+import hashlib
+import io
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps, ImageSequence
+import pytesseract
+
+from .cache import MISSING, get_cache
+
+# Tesseract is found through TESSERACT_CMD, then PATH, then the default Windows install.
+# Images are optionally downscaled and binarized before OCR, which cuts OCR time a lot
+# on large scans, and results are cached by a hash of the pixels and the OCR settings.
+
+_WINDOWS_TESSERACT = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+MAX_SIDE = int(os.environ.get("NEWSSENSE_OCR_MAX_SIDE", "2500"))
+
+
+def tesseract_command():
+    command = os.environ.get("TESSERACT_CMD") or shutil.which("tesseract")
+    if command is None and os.path.exists(_WINDOWS_TESSERACT):
+        command = _WINDOWS_TESSERACT
+    return command
+
+
+def configure_tesseract():
+    command = tesseract_command()
+    if command:
+        pytesseract.pytesseract.tesseract_cmd = command
+    return command
+
+
+def tesseract_available():
+    return configure_tesseract() is not None
+
+
+def prepare_image(image, max_side=MAX_SIDE, binarize=False, threshold=None):
+    image = ImageOps.grayscale(image)
+    if max_side and max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+    if binarize:
+        image = ImageOps.autocontrast(image)
+        cutoff = threshold if threshold is not None else 160
+        image = image.point(lambda p: 255 if p > cutoff else 0, mode="1")
+    return image
+
+
+def _settings_key(lang, config, max_side, binarize, threshold):
+    return f"ocr:{lang}:{config}:{max_side}:{int(binarize)}:{threshold}"
+
+
+def _image_key(image):
+    h = hashlib.sha256()
+    h.update(f"{image.mode}:{image.size}".encode())
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+
+def ocr_image(image, lang="eng", config="", max_side=MAX_SIDE, binarize=False, threshold=None, use_cache=True):
+    stage = _settings_key(lang, config, max_side, binarize, threshold)
+    key = _image_key(image) if use_cache else None
+    cache = get_cache() if use_cache else None
+    if cache:
+        text = cache.get(key, stage)
+        if text is not MISSING:
+            return text
+    configure_tesseract()
+    text = pytesseract.image_to_string(prepare_image(image, max_side, binarize, threshold), lang=lang, config=config)
+    if cache:
+        cache.set(key, stage, text)
+    return text
+
+
+# Every frame of the file: one for png/jpeg, one per page for multi-page TIFFs
+def iter_frames(image_file):
+    with Image.open(image_file) as image:
+        for frame in ImageSequence.Iterator(image):
+            yield frame.copy()
+
+
+def ocr_file(image_file, **options):
+    return [ocr_image(frame, **options) for frame in iter_frames(image_file)]
+
+
+def _ocr_encoded(png_bytes, options):
+    with Image.open(io.BytesIO(png_bytes)) as image:
+        return ocr_image(image, **options)
+
+
+# OCR many images (and every page of multi-page TIFFs) across a process pool.
+# Returns one text per input file, with the pages of a file joined by newlines.
+def ocr_files(image_files, workers=None, **options):
+    frames = []
+    for index, image_file in enumerate(image_files):
+        if hasattr(image_file, "seek"):
+            image_file.seek(0)
+        for frame in iter_frames(image_file):
+            buffer = io.BytesIO()
+            frame.save(buffer, format="PNG")
+            frames.append((index, buffer.getvalue()))
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(frames) <= 1:
+        texts = [_ocr_encoded(data, options) for _, data in frames]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=configure_tesseract) as pool:
+            texts = list(pool.map(_ocr_encoded, [data for _, data in frames], [options] * len(frames)))
+
+    per_file = [[] for _ in image_files]
+    for (index, _), text in zip(frames, texts):
+        per_file[index].append(text)
+    return ["\n".join(parts) for parts in per_file]
+
+
+# Render a PDF page without a text layer and OCR it
+def ocr_pdf_page(page, dpi=200, **options):
+    import fitz
+    pixmap = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    image = Image.frombytes("L", (pixmap.width, pixmap.height), pixmap.samples)
+    return ocr_image(image, **options)
@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import fitz
+
+from .instrument import stage
+
+
+# Uploaded files are copied to disk in fixed size chunks, so a PDF is never held
+# in memory twice. Paths are used as they are.
+@contextmanager
+def pdf_on_disk(source, chunk_size=1 << 20):
+    if isinstance(source, (str, os.PathLike)):
+        yield os.fspath(source)
+        return
+    if hasattr(source, "seek"):
+        source.seek(0)
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            shutil.copyfileobj(source, out, chunk_size)
+        yield path
+    finally:
+        os.remove(path)
+
+
+# Pages without a text layer (scans) are rendered at this DPI and OCRed; 0 turns it off
+OCR_DPI = int(os.environ.get("NEWSSENSE_PDF_OCR_DPI", "200"))
+
+
+def page_count(path):
+    with fitz.open(path) as doc:
+        return doc.page_count
+
+
+# Opening by path lets MuPDF read objects from the file on demand,
+# and each page is released before the next one is parsed.
+def _page_text(page, ocr_dpi, ocr_options):
+    text = page.get_text()
+    if text.strip() or not ocr_dpi:
+        return text
+    from . import ocr
+    if not ocr.tesseract_available():
+        return text
+    return ocr.ocr_pdf_page(page, dpi=ocr_dpi, **ocr_options)
+
+
+def iter_pdf_pages(source, start=0, end=None, ocr_dpi=OCR_DPI, ocr_options=None):
+    with pdf_on_disk(source) as path:
+        with fitz.open(path) as doc:
+            end = doc.page_count if end is None else min(end, doc.page_count)
+            for number in range(start, end):
+                page = doc.load_page(number)
+                yield _page_text(page, ocr_dpi, ocr_options or {})
+                del page
+
+
+def _extract_range(path, start, end, ocr_dpi=OCR_DPI, ocr_options=None):
+    with fitz.open(path) as doc:
+        return [_page_text(doc.load_page(number), ocr_dpi, ocr_options or {}) for number in range(start, end)]
+
+
+# Yields (first_page, pages) for consecutive page ranges. With workers > 1 the ranges are
+# parsed in a process pool; only a few ranges are in flight at once and results come
+# back in page order, so memory stays bounded and callers can start on the first range.
+def iter_page_ranges(source, pages_per_range=10, workers=1, ocr_dpi=OCR_DPI, ocr_options=None):
+    with pdf_on_disk(source) as path:
+        total = page_count(path)
+        ranges = [(start, min(start + pages_per_range, total)) for start in range(0, total, pages_per_range)]
+        if workers <= 1 or len(ranges) <= 1:
+            for start, end in ranges:
+                yield start, _extract_range(path, start, end, ocr_dpi, ocr_options)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            todo = iter(ranges)
+            for start, end in todo:
+                pending.append((start, pool.submit(_extract_range, path, start, end, ocr_dpi, ocr_options)))
+                if len(pending) >= workers * 2:
+                    break
+            while pending:
+                start, future = pending.popleft()
+                pages = future.result()
+                next_range = next(todo, None)
+                if next_range is not None:
+                    pending.append((next_range[0], pool.submit(_extract_range, path, *next_range,
+                                                               ocr_dpi, ocr_options)))
+                yield start, pages
+
+
+def extract_pdf_text(source, workers=1, ocr_dpi=OCR_DPI, ocr_options=None):
+    parts = []
+    with stage("pdf_parse") as sizes:
+        for _, pages in iter_page_ranges(source, workers=workers, ocr_dpi=ocr_dpi, ocr_options=ocr_options):
+            parts.extend(pages)
+        text = "".join(parts)
+        sizes.update(pages=len(parts), chars=len(text))
+    return text
@@ -1,22 +1,111 @@
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import nltk
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 
-nltk.download('stopwords')
-nltk.download('punkt')
-nltk.download('wordnet')
+LEMMA_CACHE_SIZE = 200000
 
-stop_words = set(stopwords.words('english'))
-lemmatizer = WordNetLemmatizer()
+_non_letters = re.compile(r'[^a-z\s]')
+_resources = {}
+_resources_lock = threading.Lock()
 
-def preprocess_text(text):
+
+# NLTK data is only downloaded the first time it is needed and missing locally
+def _ensure_nltk_data():
+    for path, package in (('corpora/stopwords', 'stopwords'),
+                          ('tokenizers/punkt', 'punkt'),
+                          ('corpora/wordnet', 'wordnet')):
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            nltk.download(package, quiet=True)
+
+
+def _get_resources():
+    if not _resources:
+        with _resources_lock:
+            if not _resources:
+                _ensure_nltk_data()
+                _resources.update({
+                    'lemmatizer': WordNetLemmatizer(),
+                    'stop_words': set(stopwords.words('english')),
+                })
+    return _resources
+
+
+def __getattr__(name):
+    if name in ('stop_words', 'lemmatizer'):
+        return _get_resources()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Lemmas are cached per word, the vocabulary repeats far more than it grows
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def lemmatize(token):
+    return _get_resources()['lemmatizer'].lemmatize(token)
+
+
+# The only splits word_tokenize still makes on [a-z\s] text are these contractions
+_treebank_splits = {
+    'cannot': ('can', 'not'), 'gimme': ('gim', 'me'), 'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'), 'lemme': ('lem', 'me'), 'wanna': ('wan', 'na'),
+}
+
+
+# After lowercasing and stripping everything but a-z and whitespace, this gives the
+# same tokens as nltk.word_tokenize without running the sentence and treebank tokenizers.
+def fast_tokenize(text):
+    tokens = text.split()
+    if _treebank_splits.keys().isdisjoint(tokens):
+        return tokens
+    split_tokens = []
+    for tok in tokens:
+        split_tokens.extend(_treebank_splits.get(tok, (tok,)))
+    return split_tokens
+
+
+def preprocess_text(text, fast=True):
+    stop_words = _get_resources()['stop_words']
     text = text.lower()
-    text = re.sub(r'[^a-z\s]', '', text)
-    tokens = nltk.word_tokenize(text)
-    tokens = [lemmatizer.lemmatize(tok) for tok in tokens if tok not in stop_words]
+    text = _non_letters.sub('', text)
+    tokens = fast_tokenize(text) if fast else nltk.word_tokenize(text)
+    tokens = [lemmatize(tok) for tok in tokens if tok not in stop_words]
     return ' '.join(tokens)
 
 
+def _preprocess_chunk(texts, fast=True):
+    return [preprocess_text(text, fast=fast) for text in texts]
+
+
+def _is_series(texts):
+    try:
+        import pandas as pd
+    except ImportError:
+        return False
+    return isinstance(texts, pd.Series)
+
+
+# Bulk API over lists or pandas Series. With n_jobs > 1 the texts are split into
+# chunks and preprocessed in worker processes, which is what training corpora need.
+def preprocess_many(texts, n_jobs=1, chunksize=500, fast=True):
+    # Only a Series keeps its index; a list has an .index method too
+    index = texts.index if _is_series(texts) else None
+    texts = ['' if not isinstance(text, str) else text for text in texts]
 
+    if n_jobs <= 1 or len(texts) <= chunksize:
+        cleaned = _preprocess_chunk(texts, fast=fast)
+    else:
+        _get_resources()  # download missing NLTK data once, before the workers start
+        chunks = [texts[i:i + chunksize] for i in range(0, len(texts), chunksize)]
+        cleaned = []
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            for part in pool.map(_preprocess_chunk, chunks, [fast] * len(chunks)):
+                cleaned.extend(part)
 
+    if index is not None:
+        import pandas as pd
+        return pd.Series(cleaned, index=index)
+    return cleaned
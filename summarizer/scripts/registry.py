@@ -0,0 +1,206 @@
+import os
+import threading
+import time
+
+from . import backends
+from . import model_store
+from .model_store import MODELS_DIR, model_path
+
+# Every model is loaded on first use and shared by the whole process.
+# Paths and model ids can be overridden with environment variables.
+# NEWSSENSE_DISTILLED_SUMMARIZER=1 swaps BART for the smaller distilled checkpoint
+SUMMARIZER_MODEL = os.environ.get(
+    "NEWSSENSE_SUMMARIZER_MODEL",
+    backends.DISTILLED_SUMMARIZER if os.environ.get("NEWSSENSE_DISTILLED_SUMMARIZER", "") not in ("", "0")
+    else "facebook/bart-large-cnn",
+)
+FAKE_NEWS_MODEL = os.environ.get("NEWSSENSE_FAKE_NEWS_MODEL", "Pulk17/Fake-News-Detection")
+SPACY_MODEL = os.environ.get("NEWSSENSE_SPACY_MODEL", "en_core_web_sm")
+
+# How often versioned models look for a newly published version
+VERSION_CHECK_SECONDS = float(os.environ.get("NEWSSENSE_VERSION_CHECK_SECONDS", "5"))
+
+
+def current_rss():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def _load_joblib(path):
+    import joblib
+    return joblib.load(path)
+
+
+def _load_lda(path):
+    from gensim import models
+    return models.LdaModel.load(path)
+
+
+def _load_dictionary(path):
+    from gensim import corpora
+    return corpora.Dictionary.load(path)
+
+
+def _load_summarizer(path):
+    # The pipeline owns the tokenizer, so BART's tokenizer is only loaded once
+    return backends.load_summarizer(SUMMARIZER_MODEL, backends.backend_for("summarizer"), backends.thread_count())
+
+
+def _load_fake_news(path):
+    return backends.load_text_classifier(FAKE_NEWS_MODEL, backends.backend_for("fake_news"), backends.thread_count())
+
+
+def _load_spacy(path):
+    import spacy
+    return spacy.load(SPACY_MODEL)
+
+
+# Compiled from TextBlob's lexicon on first use
+def _load_sentiment_lexicon(path):
+    from .sentiment import load_lexicon
+    return load_lexicon(path)
+
+
+# Components entity recognition doesn't need; ner only depends on tok2vec
+NER_EXCLUDE = ("tagger", "parser", "lemmatizer", "attribute_ruler", "senter")
+
+
+def _load_spacy_ner(path):
+    import spacy
+    return spacy.load(SPACY_MODEL, exclude=list(NER_EXCLUDE))
+
+
+# name -> (loader(path), file it reads, hub/package id, versioned kind)
+# The backend is part of the id of the transformer models, since quantized outputs differ.
+# Models of the same kind are published together and swapped together.
+_specs = {
+    "classifier": (_load_joblib, "classifier_model.pkl", None, "classifier"),
+    "tfidf": (_load_joblib, "tfidf_vectorizer.pkl", None, "classifier"),
+    "lda": (_load_lda, "lda_model.gensim", None, "lda"),
+    "dictionary": (_load_dictionary, "lda_dictionary.dict", None, "lda"),
+    "summarizer": (_load_summarizer, None, lambda: f"{SUMMARIZER_MODEL}@{backends.backend_for('summarizer')}", None),
+    "fake_news": (_load_fake_news, None, lambda: f"{FAKE_NEWS_MODEL}@{backends.backend_for('fake_news')}", None),
+    "spacy": (_load_spacy, None, lambda: SPACY_MODEL, None),
+    "spacy_ner": (_load_spacy_ner, None, lambda: f"{SPACY_MODEL}:ner", None),
+    "sentiment_lexicon": (_load_sentiment_lexicon, "sentiment_lexicon.npz", None, None),
+}
+
+_models = {}
+_loaded_versions = {}
+_stats = {}
+_locks = {}
+_version_checks = {}
+_registry_lock = threading.Lock()
+
+
+def register(name, loader, filename=None, model_id=None, kind=None):
+    with _registry_lock:
+        _specs[name] = (loader, filename, model_id, kind)
+        _models.pop(name, None)
+
+
+def _lock_for(name):
+    with _registry_lock:
+        return _locks.setdefault(name, threading.Lock())
+
+
+# Published version of a kind, re-read from disk at most every VERSION_CHECK_SECONDS
+def _version_of(kind):
+    if kind is None:
+        return None
+    now = time.monotonic()
+    checked = _version_checks.get(kind)
+    if checked is None or now - checked[0] >= VERSION_CHECK_SECONDS:
+        checked = (now, model_store.current_version(kind))
+        _version_checks[kind] = checked
+    return checked[1]
+
+
+def get(name):
+    if name not in _specs:
+        raise KeyError(f"Unknown model: {name}")
+    return _get(name, _version_of(_specs[name][3]))
+
+
+# Models used together, e.g. the vectorizer and the classifier trained on its output.
+# The published version of each kind is read once, so a publish between two loads
+# can't pair a new vectorizer with an old classifier.
+def get_many(*names):
+    for name in names:
+        if name not in _specs:
+            raise KeyError(f"Unknown model: {name}")
+    versions = {}
+    for name in names:
+        kind = _specs[name][3]
+        if kind not in versions:
+            versions[kind] = _version_of(kind)
+    return tuple(_get(name, versions[_specs[name][3]]) for name in names)
+
+
+# The model at the given published version (None for the flat file), loaded if needed
+def _get(name, version):
+    loader, filename, _, kind = _specs[name]
+    model = _models.get(name)
+    if model is not None and _loaded_versions.get(name) == version:
+        return model
+    with _lock_for(name):
+        # Another thread may have finished loading while we waited
+        if name in _models and _loaded_versions.get(name) == version:
+            return _models[name]
+        path = model_store.version_file(kind, version, filename) if filename else None
+        rss_before = current_rss()
+        start = time.perf_counter()
+        model = loader(path)
+        _stats[name] = {
+            "version": version,
+            "load_seconds": round(time.perf_counter() - start, 3),
+            "rss_delta_mb": round((current_rss() - rss_before) / (1024 * 1024), 1),
+        }
+        # Swapping the reference is atomic; callers holding the old model finish with it
+        _models[name] = model
+        _loaded_versions[name] = version
+        return model
+
+
+def is_loaded(name):
+    return name in _models
+
+
+def unload(name):
+    with _lock_for(name):
+        _models.pop(name, None)
+        _loaded_versions.pop(name, None)
+        _stats.pop(name, None)
+
+
+# Load a set of models up front, e.g. in a batch worker before the first request
+def preload(names):
+    for name in names:
+        get(name)
+
+
+def load_stats():
+    return dict(_stats)
+
+
+# Files and model ids a model depends on, used to key cached results
+def model_files(name):
+    filename, kind = _specs[name][1], _specs[name][3]
+    if not filename:
+        return []
+    return [model_store.resolve(kind, filename)]
+
+
+def model_id(name):
+    model_id_fn = _specs[name][2]
+    if model_id_fn is None:
+        return None
+    return model_id_fn() if callable(model_id_fn) else model_id_fn
@@ -0,0 +1,289 @@
+import argparse
+import functools
+import json
+import os
+import re
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import fpdf
+from fpdf import FPDF
+
+# PDF reports for one article or a whole batch of analyzed articles.
+# Text is written with a Unicode TTF found in summarizer/fonts or the system font
+# directories (Noto Sans, DejaVu Sans, ...), with its bold face for headings.
+# Devanagari and Telugu text uses a font for that script when one is installed
+# (e.g. NotoSansDevanagari, NotoSansTelugu). NEWSSENSE_PDF_FONT and
+# NEWSSENSE_PDF_BOLD_FONT pick the files explicitly. Only when no font is found
+# is the core Arial font used, with text forced to Latin-1.
+# Large digests are rendered in parts across processes, each part is written to disk
+# and appended to the final PDF with incremental saves, one part in memory at a time.
+#   python -m scripts.reports results.jsonl -o digest.pdf
+#   python -m scripts.reports results.jsonl -o reports.zip --zip
+
+REPORT_FONT = os.environ.get("NEWSSENSE_PDF_FONT")
+REPORT_BOLD_FONT = os.environ.get("NEWSSENSE_PDF_BOLD_FONT")
+ARTICLES_PER_PART = int(os.environ.get("NEWSSENSE_PDF_PART_SIZE", "50"))
+_FAMILY = "NewsSense"
+
+FONT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts")
+FONT_SEARCH_PATHS = (
+    FONT_DIR,
+    os.path.expanduser("~/.fonts"),
+    os.path.expanduser("~/.local/share/fonts"),
+    "/usr/share/fonts",
+    "/usr/local/share/fonts",
+    "/Library/Fonts",
+    "/System/Library/Fonts",
+    os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts"),
+)
+
+# (regular, bold) file names per script, preferred first; bold is None when there is no bold face
+FONT_CANDIDATES = {
+    "latin": (("NotoSans-Regular.ttf", "NotoSans-Bold.ttf"), ("DejaVuSans.ttf", "DejaVuSans-Bold.ttf"),
+              ("LiberationSans-Regular.ttf", "LiberationSans-Bold.ttf"), ("FreeSans.ttf", "FreeSansBold.ttf"),
+              ("arial.ttf", "arialbd.ttf"), ("Arial Unicode.ttf", None)),
+    "devanagari": (("NotoSansDevanagari-Regular.ttf", "NotoSansDevanagari-Bold.ttf"),
+                   ("Lohit-Devanagari.ttf", None), ("Nirmala.ttf", "NirmalaB.ttf")),
+    "telugu": (("NotoSansTelugu-Regular.ttf", "NotoSansTelugu-Bold.ttf"), ("Lohit-Telugu.ttf", None),
+               ("Nirmala.ttf", "NirmalaB.ttf")),
+}
+_SCRIPTS = {
+    "devanagari": re.compile("[\u0900-\u097f]"),
+    "telugu": re.compile("[\u0c00-\u0c7f]"),
+}
+
+
+def sanitize_text(text):
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+# Lower-cased file name -> path of every TTF in the search paths, first one wins
+@functools.lru_cache(maxsize=None)
+def _installed_fonts():
+    found = {}
+    for root in FONT_SEARCH_PATHS:
+        for directory, _, files in os.walk(root):
+            for name in files:
+                if name.lower().endswith(".ttf"):
+                    found.setdefault(name.lower(), os.path.join(directory, name))
+    return found
+
+
+# (regular, bold) paths of the first installed candidate of a script, or None
+def find_font(script="latin"):
+    installed = _installed_fonts()
+    for regular, bold in FONT_CANDIDATES[script]:
+        if regular.lower() in installed:
+            return installed[regular.lower()], installed.get((bold or "").lower())
+    return None
+
+
+# script -> (regular, bold) font files a report uses; "latin" is the main font
+def report_fonts(font=None, bold_font=None):
+    fonts = {script: find_font(script) for script in FONT_CANDIDATES}
+    if font:
+        fonts["latin"] = (font, bold_font)
+    return {script: files for script, files in fonts.items() if files}
+
+
+# Fields of a report from an analysis result (or a batch_run record)
+def article_fields(record, number=None):
+    lda_topics = record.get("lda_topics") or []
+    keywords = record.get("keywords")
+    if keywords is None:
+        keywords = [word for word, _ in lda_topics[0][1]] if lda_topics else []
+    title = record.get("title") or record.get("id") or (f"Article {number}" if number else "Article")
+    return {
+        "title": f"{number}. {title}" if number else str(title),
+        "category": record.get("category"),
+        "summary": record.get("summary") or "",
+        "keywords": [str(k) for k in keywords],
+        "sentiment": record.get("sentiment"),
+        "entities": [tuple(entity) for entity in record.get("entities") or []],
+    }
+
+
+class ReportWriter:
+    def __init__(self, font=REPORT_FONT, bold_font=REPORT_BOLD_FONT):
+        self.pdf = FPDF()
+        self.pdf.set_auto_page_break(auto=True, margin=15)
+        self.fonts = report_fonts(font, bold_font)
+        self.unicode = "latin" in self.fonts
+        # script -> whether it has a bold face, for the fonts added so far.
+        # A TTF is embedded once per document and reused by every article in it.
+        self._added = {}
+        # fpdf 1.7 pickles the font metrics next to the TTF, which races between the
+        # worker processes; reading the metrics only takes milliseconds
+        if self.unicode and hasattr(fpdf, "set_global"):
+            fpdf.set_global("FPDF_CACHE_MODE", 1)
+
+    # The script font for text in Devanagari or Telugu when one is installed, else the main font
+    def _script(self, text):
+        for script, pattern in _SCRIPTS.items():
+            if script in self.fonts and pattern.search(text):
+                return script
+        return "latin"
+
+    def _font(self, text, size, bold=False):
+        if not self.unicode:
+            self.pdf.set_font("Arial", "B" if bold else "", size)
+            return
+        script = self._script(text)
+        family = f"{_FAMILY}-{script}"
+        if script not in self._added:
+            regular, bold_file = self.fonts[script]
+            self.pdf.add_font(family, "", regular, uni=True)
+            if bold_file:
+                self.pdf.add_font(family, "B", bold_file, uni=True)
+            self._added[script] = bool(bold_file)
+        self.pdf.set_font(family, "B" if bold and self._added[script] else "", size)
+
+    def line(self, text, size=12, bold=False):
+        text = str(text) if self.unicode else sanitize_text(str(text))
+        self._font(text, size, bold)
+        self.pdf.cell(0, 10, text, ln=True)
+
+    def block(self, text, size=12):
+        text = str(text) if self.unicode else sanitize_text(str(text))
+        self._font(text, size)
+        self.pdf.multi_cell(0, 10, text)
+
+    # Start a new page for the article; returns its first page number.
+    # compact lists the entities one line per label instead of one line per entity.
+    def article(self, article, title="NewsSense Summary Report", compact=False):
+        self.pdf.add_page()
+        first_page = self.pdf.page_no()
+        self.line(title, 16, bold=True)
+        self.pdf.ln(5)
+        self.line(f"Category: {article['category']}")
+        self.pdf.ln(5)
+        self.block(f"Summary:\n{article['summary']}")
+        self.pdf.ln(5)
+        self.line(f"Sentiment: {article['sentiment']}")
+        self.pdf.ln(5)
+        self.block(f"Keywords: {', '.join(article['keywords'])}")
+        self.pdf.ln(5)
+        self.line("Named Entities:")
+        if compact:
+            grouped = {}
+            for ent_text, ent_type in article["entities"]:
+                grouped.setdefault(ent_type, []).append(ent_text)
+            for ent_type, texts in sorted(grouped.items()):
+                self.block(f"{ent_type}: {', '.join(texts)}")
+        else:
+            for ent_text, ent_type in article["entities"]:
+                self.line(f"- {ent_text} ({ent_type})")
+        return first_page
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.pdf.output(path)
+        return path
+
+
+def _render_part(articles, path, font, bold_font):
+    writer = ReportWriter(font, bold_font)
+    pages = [writer.article(article, article["title"], compact=True) for article in articles]
+    writer.save(path)
+    return pages
+
+
+def _render_single(article, path, font, bold_font):
+    writer = ReportWriter(font, bold_font)
+    writer.article(article)
+    return writer.save(path)
+
+
+# map() over a process pool when there is more than one task, in order
+def _parallel_map(fn, workers, *iterables):
+    count = len(iterables[0])
+    workers = min(workers or os.cpu_count() or 1, count)
+    if workers <= 1:
+        yield from map(fn, *iterables)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(fn, *iterables, chunksize=max(1, count // (workers * 4)))
+
+
+# One PDF with every article and a bookmark per article.
+# The first part becomes the digest file and every later part is appended to it with
+# an incremental save, so only the part being appended is held in memory.
+def build_digest(records, path, workers=None, part_size=ARTICLES_PER_PART, font=REPORT_FONT,
+                 bold_font=REPORT_BOLD_FONT):
+    import fitz
+    articles = [article_fields(record, number) for number, record in enumerate(records, 1)]
+    if not articles:
+        raise ValueError("No articles to report")
+    parts = [articles[i:i + part_size] for i in range(0, len(articles), part_size)]
+    out_dir = os.path.dirname(os.path.abspath(path))
+    os.makedirs(out_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=out_dir) as tmp:
+        part_paths = [os.path.join(tmp, f"part_{i:05d}.pdf") for i in range(len(parts))]
+        digest_path = os.path.join(tmp, "digest.pdf")
+        toc, offset = [], 0
+        rendered = _parallel_map(_render_part, workers, parts, part_paths, [font] * len(parts),
+                                 [bold_font] * len(parts))
+        for part, part_path, pages in zip(parts, part_paths, rendered):
+            if not toc:
+                os.replace(part_path, digest_path)
+                with fitz.open(digest_path) as digest:
+                    added = digest.page_count
+            else:
+                with fitz.open(digest_path) as digest, fitz.open(part_path) as part_doc:
+                    digest.insert_pdf(part_doc)
+                    digest.saveIncr()
+                    added = part_doc.page_count
+                os.remove(part_path)
+            toc.extend([1, article["title"], offset + page] for article, page in zip(part, pages))
+            offset += added
+        with fitz.open(digest_path) as digest:
+            digest.set_toc(toc)
+            digest.saveIncr()
+        os.replace(digest_path, path)
+    return path
+
+
+def _file_name(number, title):
+    slug = re.sub(r'[^\w-]+', '_', str(title)).strip('_')[:60] or "article"
+    return f"{number:04d}_{slug}.pdf"
+
+
+# A zip with one report per article
+def build_zip(records, path, workers=None, font=REPORT_FONT, bold_font=REPORT_BOLD_FONT):
+    articles = [article_fields(record) for record in records]
+    out_dir = os.path.dirname(os.path.abspath(path))
+    os.makedirs(out_dir, exist_ok=True)
+    names = [_file_name(number, article["title"]) for number, article in enumerate(articles, 1)]
+    with tempfile.TemporaryDirectory(dir=out_dir) as tmp, zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        paths = [os.path.join(tmp, name) for name in names]
+        for name, pdf_path in zip(names, _parallel_map(_render_single, workers, articles, paths,
+                                                       [font] * len(articles), [bold_font] * len(articles))):
+            archive.write(pdf_path, name)
+            os.remove(pdf_path)
+    return path
+
+
+def read_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PDF reports from batch_run results")
+    parser.add_argument("results", help="jsonl written by scripts.batch_run")
+    parser.add_argument("-o", "--out", required=True)
+    parser.add_argument("--zip", action="store_true", help="one PDF per article in a zip instead of a digest")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--part-size", type=int, default=ARTICLES_PER_PART)
+    parser.add_argument("--font", default=REPORT_FONT, help="Unicode TTF font (default NEWSSENSE_PDF_FONT or "
+                                                            "the first installed Noto/DejaVu font)")
+    parser.add_argument("--bold-font", default=REPORT_BOLD_FONT, help="bold face of --font")
+    args = parser.parse_args()
+
+    records = [r for r in read_records(args.results) if not r.get("error")]
+    if args.zip:
+        print(build_zip(records, args.out, args.workers, args.font, args.bold_font))
+    else:
+        print(build_digest(records, args.out, args.workers, args.part_size, args.font, args.bold_font))
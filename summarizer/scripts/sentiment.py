@@ -0,0 +1,192 @@
+import os
+import xml.etree.ElementTree as ElementTree
+from itertools import repeat
+
+import numpy as np
+
+from . import registry
+from .instrument import instrumented
+from .ner import split_sentences
+
+# Lexicon sentiment scored in bulk.
+# TextBlob's en-sentiment.xml lexicon is compiled once into numpy arrays
+# (models/sentiment_lexicon.npz). Documents are split into sentences, the sentences of
+# a batch are tokenized in one regex pass, all tokens are looked up at once and the
+# sentence and document scores are averaged
+# with np.bincount. Like TextBlob's PatternAnalyzer, an intensifier ("very good")
+# scales the next word and a negation ("not good") flips it at half strength.
+
+NEUTRAL_BAND = float(os.environ.get("NEWSSENSE_SENTIMENT_NEUTRAL_BAND", "0"))
+LEXICON_FILE = "sentiment_lexicon.npz"
+NEGATIONS = ("not", "n't", "never", "no", "none", "nobody", "nothing", "neither", "nor", "cannot")
+NEGATION_WINDOW = 3
+
+# Joins the sentences of a batch before tokenizing; it is a token of its own
+SEPARATOR = "\0"
+
+# Bytes that can't be part of a token become spaces; \x01 stands in for the apostrophe of "n't"
+_TOKEN_BYTES = bytes(c if 97 <= c <= 122 or c == 0 else 39 if c == 1 else 32 for c in range(256))
+
+
+# Runs of a-z, with "didn't" split into "did" and "n't" (the tokens of
+# [a-z]+(?=n't)|n't|[a-z]+), using only C level string operations. Non ASCII
+# characters become "?" and then spaces, like any other separator.
+def tokenize(text):
+    text = text.replace("\x01", " ").replace("n't", " n\x01t")
+    return text.encode("ascii", "replace").translate(_TOKEN_BYTES).decode("ascii").split()
+
+
+def textblob_lexicon_path():
+    import textblob
+    return os.path.join(os.path.dirname(textblob.__file__), "en", "en-sentiment.xml")
+
+
+# Average the senses of every word form into polarity, subjectivity and intensity arrays
+def compile_lexicon(source=None, target=None):
+    senses = {}
+    for word in ElementTree.parse(source or textblob_lexicon_path()).getroot().iter("word"):
+        form = word.get("form", "").lower()
+        if not form or " " in form:
+            continue
+        senses.setdefault(form, []).append((
+            float(word.get("polarity", 0)), float(word.get("subjectivity", 0)),
+            float(word.get("intensity", 1)), word.get("pos", "").startswith("RB"),
+        ))
+    words = sorted(senses)
+    values = np.array([np.mean([s[:3] for s in senses[w]], axis=0) for w in words], dtype=np.float32)
+    modifier = np.array([any(s[3] for s in senses[w]) and abs(values[i, 2] - 1) > 1e-6
+                         for i, w in enumerate(words)], dtype=bool)
+    lexicon = {"words": np.array(words), "polarity": values[:, 0], "subjectivity": values[:, 1],
+               "intensity": values[:, 2], "modifier": modifier}
+    if target:
+        np.savez(target, **lexicon)
+    return lexicon
+
+
+# Token -> row lookup; negations and the sentence separator get rows too, so one dict
+# lookup per token is enough
+class Lexicon:
+    def __init__(self, arrays):
+        words = arrays["words"].tolist()
+        extra = [w for w in NEGATIONS if w not in set(words)] + [SEPARATOR]
+        pad = np.zeros(len(extra), dtype=np.float32)
+        self.index = {word: i for i, word in enumerate(words + extra)}
+        self.polarity = np.concatenate((arrays["polarity"], pad))
+        self.subjectivity = np.concatenate((arrays["subjectivity"], pad))
+        self.intensity = np.concatenate((arrays["intensity"], pad + 1))
+        self.modifier = np.concatenate((arrays["modifier"], pad.astype(bool)))
+        self.negation = np.zeros(len(self.index), dtype=bool)
+        self.negation[[self.index[w] for w in NEGATIONS]] = True
+        self.separator = self.index[SEPARATOR]
+
+
+def load_lexicon(path):
+    if os.path.exists(path):
+        with np.load(path) as arrays:
+            return Lexicon({name: arrays[name] for name in arrays.files})
+    return Lexicon(compile_lexicon(target=path))
+
+
+# Polarity and subjectivity of every sentence of every text.
+# Returns (sentences, doc_of_sentence, polarity, subjectivity, scored, words) where
+# words counts the lexicon words of a sentence and scored says it has at least one.
+def score_sentences(texts):
+    lexicon = registry.get("sentiment_lexicon")
+    sentences, doc_ids = [], []
+    for doc, text in enumerate(texts):
+        parts = split_sentences((text or "").replace(SEPARATOR, " "))
+        sentences.extend(parts)
+        doc_ids.extend(repeat(doc, len(parts)))
+
+    # The n-th separator token ends the n-th sentence
+    n = len(sentences)
+    tokens = tokenize(f" {SEPARATOR} ".join(sentences).lower())
+    token_ids = np.fromiter(map(lexicon.index.get, tokens, repeat(-1, len(tokens))), dtype=np.int64, count=len(tokens))
+    separators = token_ids == lexicon.separator
+    sentence_ids = np.cumsum(separators)[~separators]
+    token_ids = token_ids[~separators]
+    known = token_ids >= 0
+    safe = np.where(known, token_ids, 0)
+    negators = known & lexicon.negation[safe]
+    polarity = np.where(known, lexicon.polarity[safe], 0).astype(np.float64)
+    subjectivity = np.where(known, lexicon.subjectivity[safe], 0).astype(np.float64)
+    modifier = known & lexicon.modifier[safe]
+
+    def previous(values, k, fill):
+        shifted = np.full_like(values, fill)
+        if k < len(values):
+            shifted[k:] = np.where(sentence_ids[k:] == sentence_ids[:-k], values[:-k], fill)
+        return shifted
+
+    # An intensifier followed by a lexicon word scales that word and is not scored itself
+    weight = known & ((polarity != 0) | (subjectivity != 0))
+    boosted = previous(modifier, 1, False) & weight
+    scale = np.where(boosted, previous(np.where(known, lexicon.intensity[safe], 1).astype(np.float64), 1, 1), 1)
+    absorbed = np.zeros_like(boosted)
+    absorbed[:-1] = boosted[1:]
+    weight &= ~absorbed
+    polarity = np.clip(polarity * scale, -1, 1)
+    subjectivity = np.clip(subjectivity * scale, 0, 1)
+
+    negated = np.zeros_like(negators)
+    for k in range(1, NEGATION_WINDOW + 1):
+        negated |= previous(negators, k, False)
+    polarity = np.where(negated, polarity * -0.5, polarity)
+
+    counts = np.bincount(sentence_ids[weight], minlength=n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sentence_polarity = np.bincount(sentence_ids[weight], weights=polarity[weight], minlength=n) / counts
+        sentence_subjectivity = np.bincount(sentence_ids[weight], weights=subjectivity[weight], minlength=n) / counts
+    scored = counts > 0
+    return (sentences, np.array(doc_ids, dtype=np.int64), np.nan_to_num(sentence_polarity),
+            np.nan_to_num(sentence_subjectivity), scored, counts)
+
+
+# Aggregate and distribution stats per text:
+# label, polarity and subjectivity (mean over the scored words of the text),
+# the share of positive/negative/neutral sentences and the strongest sentences.
+@instrumented("sentiment", lambda result, texts, *_, **__: {"docs": len(texts),
+                                                            "chars": sum(len(t or "") for t in texts)})
+def score_documents(texts, neutral_band=NEUTRAL_BAND, top_k=3):
+    sentences, doc_ids, polarity, subjectivity, scored, counts = score_sentences(texts)
+    d = len(texts)
+    words = np.bincount(doc_ids, weights=counts, minlength=d)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        doc_polarity = np.nan_to_num(np.bincount(doc_ids, weights=polarity * counts, minlength=d) / words)
+        doc_subjectivity = np.nan_to_num(np.bincount(doc_ids, weights=subjectivity * counts, minlength=d) / words)
+    totals = np.bincount(doc_ids, minlength=d)
+    negative = np.bincount(doc_ids, weights=(polarity < -neutral_band).astype(np.float64), minlength=d)
+    positive = np.bincount(doc_ids, weights=(polarity > neutral_band).astype(np.float64), minlength=d)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        negative_share = np.nan_to_num(negative / totals).round(4).tolist()
+        positive_share = np.nan_to_num(positive / totals).round(4).tolist()
+        neutral_share = np.nan_to_num((totals - negative - positive) / totals).round(4).tolist()
+    labels = np.where(doc_polarity > neutral_band, "Positive",
+                      np.where(doc_polarity < -neutral_band, "Negative", "Neutral")).tolist()
+    doc_polarity, doc_subjectivity = doc_polarity.round(4).tolist(), doc_subjectivity.round(4).tolist()
+
+    # Sentences of a document are contiguous, so after sorting by (document, polarity)
+    # the weakest and strongest sentences of a document are the ends of its slice
+    order = np.lexsort((polarity, doc_ids)).tolist()
+    bounds = np.concatenate(([0], np.cumsum(totals))).tolist()
+    sentence_polarity, scored, totals = polarity.round(3).tolist(), scored.tolist(), totals.tolist()
+
+    def pick(indices, keep):
+        return [(sentences[i], sentence_polarity[i]) for i in indices if scored[i] and keep(sentence_polarity[i])]
+
+    results = []
+    for doc in range(d):
+        first, last = bounds[doc], bounds[doc + 1]
+        results.append({
+            "label": labels[doc],
+            "polarity": doc_polarity[doc],
+            "subjectivity": doc_subjectivity[doc],
+            "sentences": totals[doc],
+            "negative_share": negative_share[doc],
+            "positive_share": positive_share[doc],
+            "neutral_share": neutral_share[doc],
+            "most_negative": pick(order[first:min(first + top_k, last)], lambda p: p < -neutral_band),
+            "most_positive": pick(order[max(last - top_k, first):last][::-1], lambda p: p > neutral_band),
+        })
+    return results
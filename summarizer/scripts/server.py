@@ -0,0 +1,244 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local HTTP analysis service. Requests for the transformer models are queued and
+# grouped into micro-batches, so concurrent users share one forward pass.
+# Run from the summarizer directory:
+#   python -m scripts.server --port 8080
+#   curl -d '{"text": "..."}' localhost:8080/summarize
+# /summarize also takes "budget_ms", "tier" (auto/extractive/abstractive) and "upgrade";
+# see scripts/tiered.py. The response says which tier produced the summary.
+#   curl -d '{"text": "...", "budget_ms": 300, "upgrade": true}' localhost:8080/summarize
+
+
+class QueueFull(Exception):
+    pass
+
+
+# Collects requests until max_batch_size is reached or the oldest one has waited
+# max_wait seconds, then calls handler(items) once for the whole batch.
+# A client may have cancelled its future while it was queued
+def _settle(future, result=None, exception=None):
+    if not future.set_running_or_notify_cancel():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+
+
+class MicroBatcher:
+    def __init__(self, handler, max_batch_size=8, max_wait=0.02, max_queue=256, size_of=len):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.size_of = size_of
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.batches = 0
+        self.items = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def submit(self, item):
+        future = Future()
+        try:
+            self._queue.put_nowait((item, future))
+        except queue.Full:
+            # Backpressure: refuse instead of letting latency grow without bound
+            raise QueueFull()
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # Everything that runs caller code is inside the try: an exception escaping
+            # here would end this thread and leave every later future waiting forever
+            try:
+                # Similar lengths next to each other means less padding inside the model batches
+                batch.sort(key=lambda entry: self.size_of(entry[0]))
+                items = [item for item, _ in batch]
+                results = list(self.handler(items))
+                if len(results) != len(batch):
+                    # A short result list would leave some clients waiting forever
+                    raise RuntimeError(f"handler returned {len(results)} results for {len(batch)} requests")
+            except Exception as e:
+                for _, future in batch:
+                    _settle(future, exception=e)
+                continue
+            self.batches += 1
+            self.items += len(items)
+            for (_, future), result in zip(batch, results):
+                _settle(future, result=result)
+
+    def stats(self):
+        return {
+            "queue_depth": self.depth(),
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+def _fake_news(texts):
+    from .dataIngestion import detect_fake_news_batch
+    return [{"label": label, "confidence": confidence}
+            for label, confidence in detect_fake_news_batch(texts, batch_size=len(texts))]
+
+
+def _analyze(texts):
+    from .analysis import analyze_many
+    return analyze_many(texts, batch_size=len(texts))
+
+
+# Returns (batchers, tiered); the /summarize batcher belongs to the TieredSummarizer
+def build_batchers(max_batch_size=8, max_wait=0.02, max_queue=256):
+    from .tiered import TieredSummarizer
+    tiered = TieredSummarizer(max_batch_size=max_batch_size, max_wait=max_wait, max_queue=max_queue)
+    return {
+        "/summarize": tiered.batcher,
+        "/fake-news": MicroBatcher(_fake_news, max_batch_size * 2, max_wait, max_queue),
+        "/analyze": MicroBatcher(_analyze, max_batch_size, max_wait, max_queue),
+    }, tiered
+
+
+def _json_default(value):
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def make_handler(batchers, request_timeout=120, tiered=None):
+    class AnalysisHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, payload, headers=None):
+            body = json.dumps(payload, default=_json_default, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                health = {path: b.stats() for path, b in batchers.items()}
+                if tiered is not None:
+                    health["/summarize"].update(tiered.stats())
+                self._send(200, health)
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            batcher = batchers.get(self.path)
+            if batcher is None:
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                text = body.get("text", "")
+            except (ValueError, AttributeError):
+                self._send(400, {"error": "expected a JSON object with a 'text' field"})
+                return
+            if not isinstance(text, str) or not text.strip():
+                self._send(400, {"error": "'text' must be a non-empty string"})
+                return
+
+            if self.path == "/summarize" and tiered is not None:
+                self._summarize(text, body)
+                return
+
+            try:
+                future = batcher.submit(text)
+            except QueueFull:
+                self._send(503, {"error": "server busy, retry later"}, {"Retry-After": "1"})
+                return
+            try:
+                result = future.result(timeout=request_timeout)
+            except FutureTimeout:
+                self._send(504, {"error": "timed out"})
+                return
+            except Exception as e:
+                self._send(500, {"error": str(e)})
+                return
+            self._send(200, {"result": result})
+
+        def _summarize(self, text, body):
+            from .tiered import TIERS
+            budget_ms, tier = body.get("budget_ms"), body.get("tier", "auto")
+            try:
+                budget = None if budget_ms is None else float(budget_ms) / 1000
+            except (TypeError, ValueError):
+                self._send(400, {"error": "'budget_ms' must be a number"})
+                return
+            if tier not in TIERS:
+                self._send(400, {"error": f"'tier' must be one of {', '.join(TIERS)}"})
+                return
+            try:
+                answer = tiered.summarize(text, budget, tier, bool(body.get("upgrade")), timeout=request_timeout)
+            except QueueFull:
+                self._send(503, {"error": "server busy, retry later"}, {"Retry-After": "1"})
+                return
+            except FutureTimeout:
+                self._send(504, {"error": "timed out"})
+                return
+            except Exception as e:
+                self._send(500, {"error": str(e)})
+                return
+            # A pending upgrade lands in the result cache; asking again returns it as tier "cached"
+            self._send(200, {
+                "result": answer["summary"],
+                "tier": answer["tier"],
+                "estimated_abstractive_seconds": answer["estimated_abstractive_seconds"],
+                "elapsed_seconds": answer["elapsed_seconds"],
+                "upgrade": "pending" if answer["upgrade"] is not None else None,
+            })
+
+        def log_message(self, format, *args):
+            pass
+
+    return AnalysisHandler
+
+
+def serve(host="127.0.0.1", port=8080, max_batch_size=8, max_wait=0.02, max_queue=256):
+    batchers, tiered = build_batchers(max_batch_size, max_wait, max_queue)
+    server = ThreadingHTTPServer((host, port), make_handler(batchers, tiered=tiered))
+    print(f"Serving on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-batching analysis server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=20)
+    parser.add_argument("--max-queue", type=int, default=256)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.max_batch_size, args.max_wait_ms / 1000, args.max_queue)
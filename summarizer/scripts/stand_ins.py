@@ -0,0 +1,96 @@
+from . import registry
+from .synthetic_corpus import _ORGS, _PEOPLE, _PLACES, _WORDS
+
+# Tiny offline stand-ins for the Hugging Face and spaCy models, so the benchmark
+# can run end to end on a machine without the downloaded checkpoints:
+#   summarizer       - 1 layer BART with random weights behind a summarization pipeline
+#   fake_news        - 1 layer DistilBERT with random weights behind a text-classification pipeline
+#   spacy/spacy_ner  - blank English pipeline with an entity ruler for the corpus names
+# The tokenizer is a word level vocabulary over the synthetic corpus. Outputs are
+# meaningless; the timings measure the code around the models (tokenization,
+# batching, windowing, chunking), not the models themselves.
+
+SEED = 0
+SPECIAL_TOKENS = ("<pad>", "<s>", "</s>", "<unk>")
+MAX_TOKENS = {"summarizer": 1024, "fake_news": 512}
+
+
+def vocabulary():
+    words = set(_WORDS) | {".", "!", "?", ","}
+    for name in _PEOPLE + _ORGS + _PLACES:
+        words.update(name.lower().split())
+    return list(SPECIAL_TOKENS) + sorted(words)
+
+
+def make_tokenizer(max_length):
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors
+    from transformers import PreTrainedTokenizerFast
+
+    vocab = {token: i for i, token in enumerate(vocabulary())}
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    tokenizer.normalizer = normalizers.Lowercase()
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="<s> $A </s>", special_tokens=[("<s>", vocab["<s>"]), ("</s>", vocab["</s>"])])
+    # Neither BART nor DistilBERT take token_type_ids
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, model_max_length=max_length,
+                                   pad_token="<pad>", bos_token="<s>", eos_token="</s>", unk_token="<unk>",
+                                   model_input_names=["input_ids", "attention_mask"])
+
+
+def make_summarizer():
+    import torch
+    from transformers import BartConfig, BartForConditionalGeneration, pipeline
+
+    tokenizer = make_tokenizer(MAX_TOKENS["summarizer"])
+    config = BartConfig(vocab_size=len(tokenizer), d_model=32, encoder_layers=1, decoder_layers=1,
+                        encoder_attention_heads=2, decoder_attention_heads=2, encoder_ffn_dim=64,
+                        decoder_ffn_dim=64, max_position_embeddings=MAX_TOKENS["summarizer"],
+                        pad_token_id=tokenizer.pad_token_id, bos_token_id=tokenizer.bos_token_id,
+                        eos_token_id=tokenizer.eos_token_id, decoder_start_token_id=tokenizer.eos_token_id,
+                        forced_bos_token_id=None, forced_eos_token_id=None)
+    torch.manual_seed(SEED)
+    model = BartForConditionalGeneration(config).eval()
+    return pipeline("summarization", model=model, tokenizer=tokenizer)
+
+
+def make_text_classifier():
+    import torch
+    from transformers import DistilBertConfig, DistilBertForSequenceClassification, pipeline
+
+    tokenizer = make_tokenizer(MAX_TOKENS["fake_news"])
+    config = DistilBertConfig(vocab_size=len(tokenizer), dim=32, n_layers=1, n_heads=2, hidden_dim=64,
+                              max_position_embeddings=MAX_TOKENS["fake_news"], pad_token_id=tokenizer.pad_token_id,
+                              num_labels=2)
+    torch.manual_seed(SEED)
+    model = DistilBertForSequenceClassification(config).eval()
+    return pipeline("text-classification", model=model, tokenizer=tokenizer)
+
+
+def make_spacy():
+    import spacy
+
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler")
+    patterns = [(label, name) for label, names in (("PERSON", _PEOPLE), ("ORG", _ORGS), ("GPE", _PLACES))
+                for name in names]
+    # Sentences start with a capital, so "the World Bank" also appears as "The World Bank"
+    ruler.add_patterns([{"label": label, "pattern": variant} for label, name in patterns
+                        for variant in {name, name[0].upper() + name[1:]}])
+    return nlp
+
+
+_MAKERS = {
+    "summarizer": make_summarizer,
+    "fake_news": make_text_classifier,
+    "spacy": make_spacy,
+    "spacy_ner": make_spacy,
+}
+
+
+# Swap the stand-ins into the registry. The model id keeps cached results of the
+# stand-ins apart from those of the real models.
+def install(names=tuple(_MAKERS)):
+    for name in names:
+        maker = _MAKERS[name]
+        registry.register(name, lambda path, maker=maker: maker(), model_id=f"stand-in:{name}")
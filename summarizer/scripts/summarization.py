@@ -1,17 +1,129 @@
-from transformers import pipeline
-from transformers import pipeline, BartTokenizer
+import time
+from . import registry
+from .instrument import instrumented
+
+MAX_INPUT_TOKENS = 1024  # max tokens BART supports
+
+
+def __getattr__(name):
+    if name == "summarizer":
+        return registry.get("summarizer")
+    if name == "tokenizer":
+        return registry.get("summarizer").tokenizer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Runs generate directly on token id lists, so text is never decoded and re-encoded
+# on the way in. Returns the generated token ids for each input.
+def generate_from_ids(id_lists, max_length=130, min_length=30, batch_size=8):
+    import torch
+
+    summarizer = registry.get("summarizer")
+    model = summarizer.model
+    pad_id = summarizer.tokenizer.pad_token_id
+    outputs = []
+    for start in range(0, len(id_lists), batch_size):
+        batch = id_lists[start:start + batch_size]
+        width = max(len(ids) for ids in batch)
+        input_ids = torch.full((len(batch), width), pad_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(batch), width), dtype=torch.long)
+        for row, ids in enumerate(batch):
+            input_ids[row, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+            attention_mask[row, :len(ids)] = 1
+        with torch.no_grad():
+            generated = model.generate(input_ids=input_ids.to(model.device),
+                                       attention_mask=attention_mask.to(model.device),
+                                       max_length=max_length, min_length=min_length, do_sample=False)
+        outputs.extend(generated.tolist())
+    return outputs
 
-tokenizer = BartTokenizer.from_pretrained("facebook/bart-large-cnn")
-summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
 
 def abstractive_summary(text, max_length=130, min_length=30):
-    max_input_tokens = 1024  # max tokens BART supports
-    
-    # Properly encode with truncation
-    inputs = tokenizer(text, max_length=max_input_tokens, truncation=True, return_tensors="pt")
-    
-    # Decode truncated input tokens back to string
-    truncated_text = tokenizer.decode(inputs['input_ids'][0], skip_special_tokens=True)
-    
-    summary_list = summarizer(truncated_text, max_length=max_length, min_length=min_length, do_sample=False)
-    return summary_list[0]['summary_text']
+    return abstractive_summary_batch([text], max_length=max_length, min_length=min_length)[0]
+
+
+# Batch variant: every text is tokenized once (truncated to 1024 tokens) and generated together
+@instrumented("summarize", lambda result, texts, **_: {"docs": len(texts), "chars": sum(map(len, texts))})
+def abstractive_summary_batch(texts, max_length=130, min_length=30, batch_size=8):
+    if not texts:
+        return []
+    tokenizer = registry.get("summarizer").tokenizer
+
+    inputs = tokenizer(list(texts), max_length=MAX_INPUT_TOKENS, truncation=True)
+    generated = generate_from_ids(inputs['input_ids'], max_length=max_length,
+                                  min_length=min_length, batch_size=batch_size)
+    return tokenizer.batch_decode(generated, skip_special_tokens=True, clean_up_tokenization_spaces=True)
+
+
+# Split token ids into overlapping windows that each fit the model once special tokens are added
+def split_windows(ids, window_size=MAX_INPUT_TOKENS - 2, overlap=128):
+    if len(ids) <= window_size:
+        return [ids]
+    step = max(1, window_size - overlap)
+    windows = []
+    for start in range(0, len(ids), step):
+        windows.append(ids[start:start + window_size])
+        if start + window_size >= len(ids):
+            break
+    return windows
+
+
+# Keep max_windows windows spread evenly over the document instead of only the first ones
+def spread_windows(windows, max_windows):
+    if max_windows is None or len(windows) <= max_windows:
+        return windows
+    if max_windows == 1:
+        return [windows[0]]
+    step = (len(windows) - 1) / (max_windows - 1)
+    return [windows[round(i * step)] for i in range(max_windows)]
+
+
+# Map-reduce summary for documents longer than BART's input limit.
+# Map: summarize overlapping token windows in batches. Reduce: summarize the joined
+# partial summaries (again from token ids) until they fit into a single window.
+@instrumented("summarize_long", lambda result, text, **_: {"docs": 1, "chars": len(text)})
+def long_document_summary(text, max_length=130, min_length=30, overlap=128, batch_size=8,
+                          max_windows=32, time_budget=None, reduce=True, max_reduce_rounds=3,
+                          return_details=False):
+    tokenizer = registry.get("summarizer").tokenizer
+    special_ids = set(tokenizer.all_special_ids)
+    deadline = time.perf_counter() + time_budget if time_budget else None
+
+    ids = tokenizer(text, add_special_tokens=False)['input_ids']
+    all_windows = split_windows(ids, overlap=overlap)
+    windows = spread_windows(all_windows, max_windows)
+
+    # Map pass, stopping early once the latency budget is spent
+    partial_ids = []
+    for start in range(0, len(windows), batch_size):
+        if deadline and partial_ids and time.perf_counter() > deadline:
+            break
+        batch = [tokenizer.build_inputs_with_special_tokens(w) for w in windows[start:start + batch_size]]
+        for out in generate_from_ids(batch, max_length=max_length, min_length=min_length, batch_size=batch_size):
+            partial_ids.append([t for t in out if t not in special_ids])
+    windows_used = len(partial_ids)
+
+    # Reduce pass over the concatenated partial summaries. Once the budget is spent
+    # the partial summaries are returned joined as they are.
+    rounds = 0
+    if reduce:
+        while len(partial_ids) > 1 and rounds < max_reduce_rounds:
+            if deadline and time.perf_counter() > deadline:
+                break
+            joined = [t for part in partial_ids for t in part]
+            chunks = split_windows(joined, overlap=0)
+            batch = [tokenizer.build_inputs_with_special_tokens(c) for c in chunks]
+            outs = generate_from_ids(batch, max_length=max_length, min_length=min_length, batch_size=batch_size)
+            partial_ids = [[t for t in out if t not in special_ids] for out in outs]
+            rounds += 1
+
+    summary = " ".join(tokenizer.decode(p, skip_special_tokens=True).strip() for p in partial_ids)
+    if not return_details:
+        return summary
+    return {
+        "summary": summary,
+        "input_tokens": len(ids),
+        "windows_total": len(all_windows),
+        "windows_used": windows_used,
+        "reduce_rounds": rounds,
+    }
@@ -0,0 +1,81 @@
+import os
+import random
+
+# Deterministic synthetic inputs for the benchmarks: news-like articles of
+# different lengths, generated PDFs and images with rendered text.
+
+_WORDS = (
+    "government minister election campaign vote parliament policy budget tax economy market "
+    "shares investors bank interest rate inflation growth company profit sales quarter report "
+    "technology software mobile phone network internet users security data launch device "
+    "game player team match season coach league final goal win championship injury "
+    "film music award actor director festival album band show audience television "
+    "health hospital doctors patients study research scientists climate energy oil prices "
+    "police court trial judge law officials said people year week month time world country "
+    "city state national international public new first last major local announced plans"
+).split()
+
+_PEOPLE = ("Anita Rao", "John Smith", "Maria Garcia", "Rahul Verma", "Chen Wei", "Sarah Jones")
+_ORGS = ("Reuters", "the World Bank", "Microsoft", "the United Nations", "Infosys", "BBC")
+_PLACES = ("London", "New Delhi", "Hyderabad", "New York", "Paris", "Tokyo")
+
+# Approximate word counts of each article size
+SIZES = {"short": 80, "medium": 600, "long": 4000, "very_long": 20000}
+
+
+def make_sentence(rng):
+    words = rng.choices(_WORDS, k=rng.randint(8, 20))
+    slot = rng.randrange(len(words))
+    words[slot] = rng.choice((rng.choice(_PEOPLE), rng.choice(_ORGS), rng.choice(_PLACES)))
+    sentence = " ".join(words)
+    return sentence[0].upper() + sentence[1:] + rng.choice((".", ".", ".", "!", "?"))
+
+
+def make_article(size="medium", seed=0):
+    rng = random.Random(f"{size}:{seed}")
+    target = SIZES[size]
+    sentences, count = [], 0
+    while count < target:
+        sentence = make_sentence(rng)
+        sentences.append(sentence)
+        count += sentence.count(" ") + 1
+    paragraphs = [" ".join(sentences[i:i + 5]) for i in range(0, len(sentences), 5)]
+    return "\n\n".join(paragraphs)
+
+
+def make_corpus(counts=None, seed=0):
+    counts = counts or {"short": 20, "medium": 20, "long": 5, "very_long": 2}
+    return {size: [make_article(size, seed=seed * 100000 + i) for i in range(n)]
+            for size, n in counts.items()}
+
+
+def make_pdf(path, pages=200, seed=0):
+    import fitz
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        text = make_article("medium", seed=seed * 100000 + number)[:3000]
+        page.insert_textbox(fitz.Rect(50, 50, page.rect.width - 50, page.rect.height - 50), text, fontsize=9)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def make_image(path, seed=0, width=1200, height=800):
+    from PIL import Image, ImageDraw
+    rng = random.Random(f"image:{seed}")
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    y = 20
+    while y < height - 30:
+        draw.text((20, y), make_sentence(rng)[:110], fill="black")
+        y += 24
+    image.save(path)
+    return path
+
+
+def make_files(directory, pdf_pages=(10, 200), images=3, seed=0):
+    os.makedirs(directory, exist_ok=True)
+    pdfs = [make_pdf(os.path.join(directory, f"synthetic_{n}p.pdf"), pages=n, seed=seed) for n in pdf_pages]
+    pngs = [make_image(os.path.join(directory, f"synthetic_{i}.png"), seed=seed + i) for i in range(images)]
+    return pdfs, pngs
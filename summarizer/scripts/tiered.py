@@ -0,0 +1,178 @@
+import math
+import os
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import numpy as np
+
+from . import registry
+from .instrument import instrumented, snapshot
+from .ner import sentence_spans
+from .preprocess import preprocess_many
+
+# Summaries in two tiers:
+#   extractive   - the most central sentences by TF-IDF (TextRank or centroid), in milliseconds
+#   abstractive  - BART through a MicroBatcher, used when the latency budget allows it
+# The abstractive latency is an EWMA of observed BART batches (seeded from the
+# "summarize" instrument stats), scaled by how many batches are queued ahead.
+# When BART can't make the budget the extractive summary answers, and BART can keep
+# running in the background to upgrade it; finished summaries go to the result cache.
+
+EXTRACTIVE_SENTENCES = int(os.environ.get("NEWSSENSE_EXTRACTIVE_SENTENCES", "3"))
+MAX_SENTENCES = 400  # longer texts are scored on evenly spread sentences
+ABSTRACTIVE_PRIOR_SECONDS = float(os.environ.get("NEWSSENSE_ABSTRACTIVE_PRIOR_SECONDS", "3.0"))
+# Without a budget or timeout, BART is waited for this many times its estimated latency
+ABSTRACTIVE_TIMEOUT_FACTOR = float(os.environ.get("NEWSSENSE_ABSTRACTIVE_TIMEOUT_FACTOR", "4"))
+MIN_ABSTRACTIVE_TIMEOUT_SECONDS = 5.0
+TIERS = ("auto", "extractive", "abstractive")
+
+
+def _textrank(similarity, damping=0.85, iterations=30):
+    np.fill_diagonal(similarity, 0)
+    totals = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, totals, out=np.zeros_like(similarity), where=totals > 0)
+    n = len(similarity)
+    scores = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        scores = (1 - damping) / n + damping * (transition.T @ scores)
+    return scores
+
+
+# The num_sentences most central sentences, in document order
+@instrumented("summarize_extractive", lambda result, text, **_: {"docs": 1, "chars": len(text)})
+def extractive_summary(text, num_sentences=EXTRACTIVE_SENTENCES, method="textrank"):
+    from sklearn.preprocessing import normalize
+    spans = sentence_spans(text or "")
+    sentences = [text[start:end].strip() for start, end in spans]
+    sentences = [s for s in sentences if s]
+    if len(sentences) <= num_sentences:
+        return " ".join(sentences)
+    if len(sentences) > MAX_SENTENCES:
+        step = len(sentences) / MAX_SENTENCES
+        sentences = [sentences[int(i * step)] for i in range(MAX_SENTENCES)]
+
+    vectors = normalize(registry.get("tfidf").transform(preprocess_many(sentences)))
+    if method == "centroid":
+        centroid = np.asarray(vectors.mean(axis=0)).ravel()
+        scores = vectors @ centroid
+    elif method == "textrank":
+        scores = _textrank((vectors @ vectors.T).toarray())
+    else:
+        raise ValueError(f"Unknown method {method!r}, expected 'textrank' or 'centroid'")
+    chosen = sorted(np.argsort(-np.asarray(scores).ravel(), kind="stable")[:num_sentences])
+    return " ".join(sentences[i] for i in chosen)
+
+
+class LatencyEstimator:
+    def __init__(self, alpha=0.2, prior=ABSTRACTIVE_PRIOR_SECONDS, stage="summarize"):
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        stats = snapshot().get(stage)
+        self.seconds = stats["mean_wall_seconds"] if stats else prior
+
+    def observe(self, seconds):
+        with self._lock:
+            self.seconds = self.alpha * seconds + (1 - self.alpha) * self.seconds
+
+    # Seconds until a request submitted now is answered, with queue_depth requests ahead
+    def estimate(self, queue_depth=0, batch_size=1):
+        return math.ceil((queue_depth + 1) / max(1, batch_size)) * self.seconds
+
+
+def _summary_key(text):
+    from .analysis import current_fingerprint
+    from .cache import document_key
+    return document_key(text, current_fingerprint())
+
+
+# batcher_options go to the MicroBatcher created when no batcher is given
+class TieredSummarizer:
+    def __init__(self, batcher=None, estimator=None, use_cache=True, **batcher_options):
+        from .server import MicroBatcher
+        self.estimator = estimator or LatencyEstimator()
+        self.batcher = batcher or MicroBatcher(self.timed_abstractive, **batcher_options)
+        self.use_cache = use_cache
+        self.tiers = {"extractive": 0, "abstractive": 0, "cached": 0}
+        self._lock = threading.Lock()
+
+    # BART over a batch; meant as the MicroBatcher handler so every batch is timed
+    def timed_abstractive(self, texts):
+        from .summarization import abstractive_summary_batch
+        start = time.perf_counter()
+        summaries = abstractive_summary_batch(texts, batch_size=len(texts))
+        self.estimator.observe(time.perf_counter() - start)
+        return summaries
+
+    def _cache(self):
+        if not self.use_cache:
+            return None
+        from .cache import get_cache
+        return get_cache()
+
+    def _submit(self, text, key):
+        future = self.batcher.submit(text)
+        cache = self._cache()
+
+        def store(done):
+            if done.exception() is None:
+                cache.set(key, "summary", done.result())
+
+        if cache is not None:
+            future.add_done_callback(store)
+        return future
+
+    def estimate(self):
+        return self.estimator.estimate(self.batcher.depth(), self.batcher.max_batch_size)
+
+    # tier is "auto", "extractive" or "abstractive"; budget (seconds) only matters for "auto",
+    # timeout bounds the wait for BART when there is no budget. It defaults to
+    # ABSTRACTIVE_TIMEOUT_FACTOR times the estimate (at least MIN_ABSTRACTIVE_TIMEOUT_SECONDS).
+    # Returns {"summary", "tier", "estimated_abstractive_seconds", "elapsed_seconds", "upgrade"},
+    # where upgrade is a Future of the BART summary when upgrade=True and the extractive tier answered.
+    # In "auto", a full queue or a missed deadline falls back to the extractive tier; in
+    # "abstractive" they raise QueueFull and concurrent.futures.TimeoutError.
+    def summarize(self, text, budget=None, tier="auto", upgrade=False, timeout=None):
+        from .cache import MISSING
+        from .server import QueueFull
+        if tier not in TIERS:
+            raise ValueError(f"Unknown tier {tier!r}, expected one of {TIERS}")
+        start = time.perf_counter()
+        key = _summary_key(text)
+        estimate = self.estimate()
+        if timeout is None:
+            timeout = max(MIN_ABSTRACTIVE_TIMEOUT_SECONDS, ABSTRACTIVE_TIMEOUT_FACTOR * estimate)
+
+        def answer(summary, answered_by, pending=None):
+            with self._lock:
+                self.tiers[answered_by] += 1
+            return {"summary": summary, "tier": answered_by, "estimated_abstractive_seconds": round(estimate, 3),
+                    "elapsed_seconds": round(time.perf_counter() - start, 4), "upgrade": pending}
+
+        cache = self._cache()
+        cached = cache.get(key, "summary") if cache is not None else MISSING
+        if cached is not MISSING and tier != "extractive":
+            return answer(cached, "cached")
+
+        use_abstractive = tier == "abstractive" or (tier == "auto" and (budget is None or estimate <= budget))
+        future = None
+        if use_abstractive or upgrade:
+            try:
+                future = self._submit(text, key)
+            except QueueFull:
+                if tier == "abstractive":
+                    raise
+                use_abstractive = False
+        if use_abstractive:
+            remaining = timeout if budget is None or tier == "abstractive" else budget - (time.perf_counter() - start)
+            try:
+                return answer(future.result(timeout=remaining), "abstractive")
+            except FutureTimeout:
+                if tier == "abstractive":
+                    raise
+                # The estimate was too optimistic; BART keeps going and still lands in the cache
+        return answer(extractive_summary(text), "extractive", future if upgrade else None)
+
+    def stats(self):
+        return {"tiers": dict(self.tiers), "abstractive_batch_seconds": round(self.estimator.seconds, 3),
+                "queue_depth": self.batcher.depth()}
@@ -1,12 +1,20 @@
+import argparse
+import glob
+import os
+import shutil
+from itertools import islice
+from multiprocessing import Pool
+import numpy as np
 import pandas as pd
 from gensim import corpora, models
 from sklearn.feature_extraction.text import CountVectorizer
-from preprocess import preprocess_text
+from preprocess import preprocess_many
+from model_store import building_version, publish, current_version, read_metadata, version_path
 
 
-def train_lda_model(documents, num_topics=10):
+def train_lda_model(documents, num_topics=10, n_jobs=1):
     # Preprocess documents
-    processed_docs = [preprocess_text(doc).split() for doc in documents]
+    processed_docs = [doc.split() for doc in preprocess_many(documents, n_jobs=n_jobs)]
     dictionary = corpora.Dictionary(processed_docs)
     corpus = [dictionary.doc2bow(doc) for doc in processed_docs]
     # Train LDA model
@@ -20,44 +28,256 @@ def train_lda_model(documents, num_topics=10):
     dictionary.save('../models/lda_dictionary.dict')
     return lda_model, corpus, dictionary
 
-def get_topic_data(lda_model, corpus, dictionary, topn=10):
-    topic_keywords = {
-        topic_id: [word for word, _ in lda_model.show_topic(topic_id, topn=topn)]
-        for topic_id in range(lda_model.num_topics)
-    }
 
-    topic_sizes = [0] * lda_model.num_topics
-    topic_probs = [0.0] * lda_model.num_topics
-    total_docs = len(corpus)
+# === Streaming training ===
+# news.csv or a directory of csv shards is read in chunks, preprocessed once into a
+# token file, and turned into an MmCorpus on disk, so nothing has to fit in RAM.
+
+def iter_text_chunks(source, text_column='text', chunksize=10000):
+    paths = sorted(glob.glob(os.path.join(source, '*.csv'))) if os.path.isdir(source) else [source]
+    for path in paths:
+        for chunk in pd.read_csv(path, usecols=[text_column], chunksize=chunksize):
+            yield chunk[text_column].dropna().tolist()
+
+
+class TokenFile:
+    # One preprocessed document per line, re-readable for every pass
+    def __init__(self, path):
+        self.path = path
+
+    def __iter__(self):
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                yield line.split()
+
+
+def write_token_file(sources, path, n_jobs=1, chunksize=10000, text_column='text'):
+    with open(path, 'w', encoding='utf-8') as out:
+        for source in sources:
+            for texts in iter_text_chunks(source, text_column=text_column, chunksize=chunksize):
+                for clean in preprocess_many(texts, n_jobs=n_jobs):
+                    out.write(clean + '\n')
+    return TokenFile(path)
+
+
+def build_dictionary(token_docs, no_below=5, no_above=0.5, keep_n=100000):
+    dictionary = corpora.Dictionary()
+    batch = []
+    for tokens in token_docs:
+        batch.append(tokens)
+        if len(batch) >= 10000:
+            dictionary.add_documents(batch, prune_at=2000000)
+            batch = []
+    if batch:
+        dictionary.add_documents(batch, prune_at=2000000)
+    dictionary.filter_extremes(no_below=no_below, no_above=no_above, keep_n=keep_n)
+    return dictionary
+
+
+def serialize_corpus(token_docs, dictionary, path):
+    corpora.MmCorpus.serialize(path, (dictionary.doc2bow(tokens) for tokens in token_docs))
+    return corpora.MmCorpus(path)
+
+
+# Full training with LdaMulticore. The model, dictionary and corpus are written to a
+# new version directory which is then published, and collecting picks it up on its next call.
+def train_lda_streaming(sources, num_topics=10, workers=None, passes=10, chunksize=2000, n_jobs=1):
+    with building_version('lda') as (version, out_dir):
+        token_docs = write_token_file(sources, os.path.join(out_dir, 'tokens.txt'), n_jobs=n_jobs)
+        dictionary = build_dictionary(token_docs)
+        corpus = serialize_corpus(token_docs, dictionary, os.path.join(out_dir, 'corpus.mm'))
+        os.remove(token_docs.path)
+
+        lda_model = models.LdaMulticore(corpus=corpus,
+                                        id2word=dictionary,
+                                        num_topics=num_topics,
+                                        workers=workers or max(1, (os.cpu_count() or 2) - 1),
+                                        passes=passes,
+                                        chunksize=chunksize,
+                                        random_state=42)
+        lda_model.save(os.path.join(out_dir, 'lda_model.gensim'))
+        dictionary.save(os.path.join(out_dir, 'lda_dictionary.dict'))
+        publish('lda', version, {
+            'mode': 'full',
+            'sources': list(sources),
+            'num_topics': num_topics,
+            'num_docs': corpus.num_docs,
+            'num_terms': len(dictionary),
+            'passes': passes,
+        })
+    return version, lda_model, corpus, dictionary
+
+
+# Incremental update with a new batch of documents, starting from the published version.
+# The vocabulary stays fixed, so words the dictionary has never seen are ignored.
+def update_lda_model(sources, passes=1, chunksize=2000, n_jobs=1):
+    base_version = current_version('lda')
+    if base_version is None:
+        raise RuntimeError("No published LDA version to update, run a full training first")
+    base_dir = version_path('lda', base_version)
+    lda_model = models.LdaMulticore.load(os.path.join(base_dir, 'lda_model.gensim'))
+    dictionary = corpora.Dictionary.load(os.path.join(base_dir, 'lda_dictionary.dict'))
+
+    with building_version('lda') as (version, out_dir):
+        token_docs = write_token_file(sources, os.path.join(out_dir, 'tokens.txt'), n_jobs=n_jobs)
+        corpus = serialize_corpus(token_docs, dictionary, os.path.join(out_dir, 'corpus.mm'))
+        os.remove(token_docs.path)
+
+        # LdaMulticore.update only takes the corpus; passes and chunksize are read from the model
+        lda_model.passes = passes
+        lda_model.chunksize = chunksize
+        lda_model.update(corpus)
+        lda_model.save(os.path.join(out_dir, 'lda_model.gensim'))
+        shutil.copy(os.path.join(base_dir, 'lda_dictionary.dict'), os.path.join(out_dir, 'lda_dictionary.dict'))
+        publish('lda', version, {
+            'mode': 'update',
+            'base_version': base_version,
+            'sources': list(sources),
+            'num_topics': lda_model.num_topics,
+            'num_docs': corpus.num_docs,
+            'num_terms': len(dictionary),
+            'passes': passes,
+        })
+    return version, lda_model, corpus, dictionary
+
+
+class CorpusChain:
+    # Several corpora read one after the other, re-readable like TokenFile
+    def __init__(self, parts):
+        self.parts = parts
+
+    def __iter__(self):
+        for part in self.parts:
+            yield from part
 
-    for doc_bow in corpus:
-        topic_dist = lda_model.get_document_topics(doc_bow, minimum_probability=0.0)
-        for topic_id, prob in topic_dist:
-            topic_sizes[topic_id] += 1
-            topic_probs[topic_id] += prob
+    def __len__(self):
+        return sum(len(part) for part in self.parts)
+
+
+# Every document a published LDA version was trained on: its own corpus plus those of
+# the versions it was updated from, back to the last full training. An update keeps
+# the dictionary, so all of them use the same word ids.
+def lineage_corpus(version):
+    parts = []
+    while version is not None:
+        parts.append(corpora.MmCorpus(os.path.join(version_path('lda', version), 'corpus.mm')))
+        meta = read_metadata('lda', version) or {}
+        version = meta.get('base_version') if meta.get('mode') == 'update' else None
+    return CorpusChain(parts)
+
+
+_worker_model = None
+
+
+def _init_worker(model_path):
+    global _worker_model
+    _worker_model = models.LdaModel.load(model_path)
+
+
+def _infer_chunk(chunk):
+    gamma, _ = _worker_model.inference(chunk)
+    return gamma
+
+
+# Full document-topic matrix, inferred a chunk of documents at a time.
+# Rows are normalized the same way get_document_topics normalizes gamma.
+# With workers > 1 each worker process loads the model from model_path.
+def doc_topic_matrix(lda_model, corpus, chunksize=2000, workers=1, model_path='../models/lda_model.gensim'):
+    def chunks():
+        it = iter(corpus)
+        while True:
+            chunk = list(islice(it, chunksize))
+            if not chunk:
+                return
+            yield chunk
+
+    if workers > 1:
+        with Pool(workers, initializer=_init_worker, initargs=(model_path,)) as pool:
+            gammas = list(pool.imap(_infer_chunk, chunks()))
+    else:
+        gammas = [lda_model.inference(chunk)[0] for chunk in chunks()]
+
+    if not gammas:
+        return np.zeros((0, lda_model.num_topics), dtype=np.float32)
+    gamma = np.vstack(gammas).astype(np.float32)
+    return gamma / gamma.sum(axis=1, keepdims=True)
+
+
+# Per topic: keywords, number of documents where it is the dominant topic,
+# average probability, share of documents it dominates, and how many
+# documents give it at least `threshold` probability.
+def get_topic_data(lda_model, corpus, dictionary, topn=10, chunksize=2000, workers=1,
+                   model_path='../models/lda_model.gensim', threshold=0.1):
+    theta = doc_topic_matrix(lda_model, corpus, chunksize=chunksize, workers=workers, model_path=model_path)
+    total_docs = max(theta.shape[0], 1)
+
+    # Each document is counted once, for its most probable topic
+    dominant_counts = np.bincount(theta.argmax(axis=1), minlength=lda_model.num_topics)
+    average_probs = theta.sum(axis=0) / total_docs
+    above_threshold = (theta >= threshold).sum(axis=0)
 
     topic_data = [
-        (topic_id, topic_keywords[topic_id], topic_sizes[topic_id], topic_probs[topic_id] / total_docs)
+        (topic_id,
+         [word for word, _ in lda_model.show_topic(topic_id, topn=topn)],
+         int(dominant_counts[topic_id]),
+         float(average_probs[topic_id]),
+         float(dominant_counts[topic_id]) / total_docs,
+         int(above_threshold[topic_id]))
         for topic_id in range(lda_model.num_topics)
     ]
     return topic_data
 
-
-if __name__ == "__main__":
-    df = pd.read_csv('../data/news.csv')
-    documents = df['text'].dropna().tolist()
-    model, corpus, dictionary = train_lda_model(documents, num_topics=10)
-    topic_data = get_topic_data(model, corpus, dictionary)
-    df_topics = pd.DataFrame([
+# threshold is the one topic_data was computed with, for the column name
+def topic_summary_frame(topic_data, threshold=0.1):
+    return pd.DataFrame([
         {
             "TopicID": tid,
             "Keywords": ", ".join(keywords),
             "Document Count": size,
-            "Average Probability": round(prob, 4)
+            "Average Probability": round(prob, 4),
+            "Coverage": round(coverage, 4),
+            f"Docs Above {threshold:g}": above
         }
-        for tid, keywords, size, prob in topic_data
+        for tid, keywords, size, prob, coverage, above in topic_data
     ])
-    
-    print(df_topics)
-    df_topics.to_csv('../data/lda_topic_summary.csv', index=False)
 
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the LDA topic model")
+    parser.add_argument("sources", nargs="*", default=['../data/news.csv'],
+                        help="csv files or directories of csv shards")
+    parser.add_argument("--stream", action="store_true", help="stream to an on-disk corpus and train with LdaMulticore")
+    parser.add_argument("--update", action="store_true", help="update the published model with new documents")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--topics", type=int, default=10)
+    parser.add_argument("--passes", type=int, default=None)
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="probability a document must give a topic to count in the summary")
+    args = parser.parse_args()
+    n_jobs = os.cpu_count() or 1
+
+    if args.stream or args.update:
+        if args.update:
+            version, model, corpus, dictionary = update_lda_model(args.sources, passes=args.passes or 1, n_jobs=n_jobs)
+        else:
+            version, model, corpus, dictionary = train_lda_streaming(args.sources, num_topics=args.topics,
+                                                                     workers=args.workers, passes=args.passes or 10,
+                                                                     n_jobs=n_jobs)
+        out_dir = version_path('lda', version)
+        # The summary covers every document the model has seen, not only this update's batch
+        corpus = lineage_corpus(version)
+        topic_data = get_topic_data(model, corpus, dictionary, workers=n_jobs,
+                                    model_path=os.path.join(out_dir, 'lda_model.gensim'), threshold=args.threshold)
+        df_topics = topic_summary_frame(topic_data, threshold=args.threshold)
+        print(f"Published LDA version {version}")
+        print(df_topics)
+        df_topics.to_csv(os.path.join(out_dir, 'lda_topic_summary.csv'), index=False)
+    else:
+        df = pd.read_csv(args.sources[0])
+        documents = df['text'].dropna().tolist()
+        model, corpus, dictionary = train_lda_model(documents, num_topics=args.topics, n_jobs=n_jobs)
+        topic_data = get_topic_data(model, corpus, dictionary, workers=n_jobs, threshold=args.threshold)
+        df_topics = topic_summary_frame(topic_data, threshold=args.threshold)
+
+        print(df_topics)
+        df_topics.to_csv('../data/lda_topic_summary.csv', index=False)
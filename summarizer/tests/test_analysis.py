@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+analysis = pytest.importorskip("scripts.analysis")
+
+
+@pytest.fixture
+def models(monkeypatch):
+    calls = {}
+
+    def fake(name, value):
+        def compute(texts, *args, **kwargs):
+            calls.setdefault(name, []).append(list(texts))
+            return [value(text) for text in texts]
+        return compute
+
+    monkeypatch.setattr(analysis, "current_fingerprint", lambda: "test")
+    monkeypatch.setattr(analysis, "preprocess_many", lambda texts, **_: [t.lower() for t in texts])
+    monkeypatch.setattr(analysis.collecting, "predict_categories", fake("category", lambda t: "business"))
+    monkeypatch.setattr(analysis.collecting, "topic_modeling_batch", fake("lda_topics", lambda t: [(0, [("w", 0.1)])]))
+    monkeypatch.setattr(analysis, "extract_entities_batch", fake("entities", lambda t: [("Reuters", "ORG")]))
+    monkeypatch.setattr(analysis, "analyze_sentiment_batch", fake("sentiment", lambda t: "Neutral"))
+    monkeypatch.setattr(analysis.summarization, "abstractive_summary_batch", fake("summary", lambda t: t[:10]))
+    monkeypatch.setattr(analysis.dataIngestion, "detect_fake_news_batch", fake("fake_news", lambda t: ("REAL", 0.9)))
+    return calls
+
+
+def test_analyze_many_batches_every_stage(models):
+    results = analysis.analyze_many(["First story text.", "Second story text."], use_cache=False,
+                                    near_duplicates=False)
+    assert [r["summary"] for r in results] == ["First stor", "Second sto"]
+    assert results[0]["fake_news_label"] == "REAL" and results[0]["fake_news_confidence"] == 0.9
+    assert all(len(batches) == 1 and len(batches[0]) == 2 for batches in models.values())
+
+
+def test_identical_documents_are_computed_once(models):
+    results = analysis.analyze_many(["Same text.", "Same text.", "Other text."], use_cache=False,
+                                    near_duplicates=False)
+    assert len(results) == 3 and results[0] == results[1]
+    assert models["summary"] == [["Same text.", "Other text."]]
+
+
+def test_empty_documents_skip_the_transformers(models):
+    result = analysis.analyze_many(["", "Some text."], use_cache=False, near_duplicates=False)[0]
+    assert result["summary"] == "" and result["fake_news_label"] is None
+    assert models["summary"] == [["Some text."]]
+
+
+def test_stages_limit_the_result_fields(models):
+    result = analysis.analyze("Some text.", use_cache=False, stages=("category",))
+    assert result == {"category": "business"}
+    assert set(models) == {"category"}
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    near_duplicates = analysis.dedup.NearDuplicateIndex(str(tmp_path / "dedup.sqlite"))
+    monkeypatch.setattr(analysis.dedup, "get_index", lambda: near_duplicates)
+    return near_duplicates
+
+
+def test_executor_reports_every_stage_and_preprocesses_once(models, index, monkeypatch):
+    preprocessed = []
+    monkeypatch.setattr(analysis, "preprocess_many",
+                        lambda texts, **_: preprocessed.append(list(texts)) or [t.lower() for t in texts])
+    reported = {}
+    text = "Markets rallied after the central bank held interest rates steady."
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        result = analysis.analyze_many([text], use_cache=False, near_duplicates=True, executor=pool,
+                                       on_stage=lambda name, fields, error: reported.update({name: fields}))[0]
+    assert set(reported) == set(analysis.STAGES)
+    assert reported["summary"] == [{"summary": text[:10]}]
+    assert reported["fake_news"][0]["fake_news_label"] == "REAL"
+    assert preprocessed == [[text]]
+    # The complete analysis is remembered, so the same text is now a near duplicate
+    assert len(index) == 1
+    again = analysis.analyze_many([text], use_cache=False, near_duplicates=True)[0]
+    assert again["duplicate_of"]["similarity"] == 1.0
+    assert {k: v for k, v in again.items() if k != "duplicate_of"} == result
+
+
+def test_executor_stage_errors_are_reported_then_raised(models, index, monkeypatch):
+    def broken(texts, **_):
+        raise RuntimeError("summarizer crashed")
+
+    monkeypatch.setattr(analysis.summarization, "abstractive_summary_batch", broken)
+    errors, done = {}, set()
+
+    def on_stage(name, fields, error):
+        done.add(name)
+        if error is not None:
+            errors[name] = str(error)
+
+    with ThreadPoolExecutor(max_workers=3) as pool, pytest.raises(RuntimeError, match="summarizer crashed"):
+        analysis.analyze_many(["Some story text here."], use_cache=False, near_duplicates=True, executor=pool,
+                              on_stage=on_stage)
+    assert errors == {"summary": "summarizer crashed"}
+    assert done == set(analysis.STAGES)
+    assert len(index) == 0
+
+
+def test_features_hold_the_preprocessed_texts(models):
+    features = {}
+    analysis.analyze_many(["First Story.", "Other Story.", "First Story."], use_cache=False, near_duplicates=False,
+                          features=features)
+    assert features["clean_texts"] == ["first story.", "other story.", "first story."]
+    features = {}
+    analysis.analyze_many(["No preprocessing."], use_cache=False, near_duplicates=False, stages=("summary",),
+                          features=features)
+    assert features["clean_texts"] == [None]
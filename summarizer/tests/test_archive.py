@@ -0,0 +1,120 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from scripts import archive, registry
+from scripts.synthetic_corpus import make_article
+
+TfidfVectorizer = pytest.importorskip("sklearn.feature_extraction.text").TfidfVectorizer
+
+
+class _Dictionary:
+    def doc2bow(self, words):
+        return [(len(word) % 3, 1) for word in words]
+
+
+class _Lda:
+    num_topics = 3
+
+    def get_document_topics(self, bow, minimum_probability=None):
+        counts = np.bincount([topic for topic, _ in bow], minlength=3) + 1.0
+        return list(enumerate(counts / counts.sum()))
+
+
+def clean(text):
+    return " ".join(word.strip(".!?").lower() for word in text.split())
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    for attr in ("_specs", "_models", "_loaded_versions", "_stats"):
+        monkeypatch.setattr(registry, attr, dict(getattr(registry, attr)))
+    vectorizer = TfidfVectorizer().fit([clean(make_article("medium", seed=i)) for i in range(20)])
+    registry.register("tfidf", lambda path: vectorizer)
+    registry.register("lda", lambda path: _Lda())
+    registry.register("dictionary", lambda path: _Dictionary())
+    preprocessed = []
+    monkeypatch.setattr(archive, "preprocess_many",
+                        lambda texts: preprocessed.extend(texts) or [clean(text) for text in texts])
+    return archive.Archive(str(tmp_path / "archive")), preprocessed
+
+
+def record(i):
+    return {"id": f"doc-{i}", "category": "business", "sentiment": "Positive", "entities": [("Reuters", "ORG")]}
+
+
+def test_small_adds_keep_few_segments(store):
+    arc, _ = store
+    texts = [make_article("short", seed=i) for i in range(21)]
+    for i, text in enumerate(texts):
+        arc.add([record(i)], [text])
+        # Segment sizes follow the binary digits of the row count
+        assert arc.segment_count() == bin(i + 1).count("1")
+    before = arc.similar("doc-3", k=5)
+    arc.compact()
+    assert arc.segment_count() == 1
+    assert arc.similar("doc-3", k=5) == before
+    assert arc.similar(text=texts[7], k=1)[0]["doc_id"] == "doc-7"
+
+
+def test_merged_segments_keep_every_row(store):
+    arc, _ = store
+    texts = [make_article("short", seed=i) for i in range(12)]
+    arc.add([record(i) for i in range(5)], texts[:5])
+    for i in range(5, 12):
+        arc.add([record(i)], [texts[i]])
+    assert len(arc) == 12 and arc.segment_count() <= int(np.log2(12)) + 1
+    for i, text in enumerate(texts):
+        assert arc.similar(text=text, k=1)[0]["doc_id"] == f"doc-{i}"
+
+
+def test_precomputed_features_are_used(store):
+    arc, preprocessed = store
+    texts = [make_article("short", seed=i) for i in range(3)]
+    # Only the missing clean text is preprocessed
+    arc.add([record(0), record(1)], texts[:2], clean_texts=[clean(texts[0]), None])
+    assert preprocessed == [texts[1]]
+
+    vectorizer = registry.get("tfidf")
+    tfidf = vectorizer.transform([clean(texts[2])])
+    lda = np.array([[0.2, 0.3, 0.5]], dtype=np.float32)
+    assert arc.add([record(2)], [texts[2]], tfidf=tfidf, lda=lda) == 1
+    assert preprocessed == [texts[1]]
+    assert arc.similar(text=texts[2], k=1)[0]["doc_id"] == "doc-2"
+    # Rows of records already archived are skipped together with their features
+    assert arc.add([record(2), record(3)], [texts[2], "new text"], tfidf=vectorizer.transform(["a", "new text"]),
+                   lda=np.ones((2, 3))) == 1
+    assert len(arc) == 4
+
+
+def test_models_are_matched_by_content(store, tmp_path):
+    arc, _ = store
+    vectorizer, lda = registry.get("tfidf"), registry.get("lda")
+    models = tmp_path / "models"
+    models.mkdir()
+    (models / "tfidf.pkl").write_bytes(b"tfidf weights")
+    (models / "lda.model").write_bytes(b"lda weights")
+
+    def use(directory):
+        registry.register("tfidf", lambda path: vectorizer, filename=str(directory / "tfidf.pkl"))
+        registry.register("lda", lambda path: lda, filename=str(directory / "lda.model"))
+
+    use(models)
+    texts = [make_article("short", seed=i) for i in range(3)]
+    arc.add([record(0)], texts[:1])
+
+    # A copy of the same models elsewhere, with new mtimes, still matches
+    moved = tmp_path / "moved"
+    shutil.copytree(models, moved, copy_function=shutil.copy)
+    os.utime(moved / "lda.model", ns=(1, 1))
+    use(moved)
+    assert arc.add([record(1)], texts[1:2]) == 1
+    assert arc.similar(text=texts[0], k=1)[0]["doc_id"] == "doc-0"
+
+    (moved / "lda.model").write_bytes(b"retrained lda weights")
+    with pytest.raises(ValueError, match="other TF-IDF/LDA models"):
+        arc.add([record(2)], texts[2:])
+    with pytest.raises(ValueError):
+        arc.similar(text=texts[0], k=1)
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from scripts import async_ingest
+
+
+def test_offline_sources(monkeypatch):
+    monkeypatch.setattr(async_ingest, "parse_article", lambda url, html: html.upper())
+    pages = async_ingest.LocalPageSource({"https://a.test/1": "one"})
+    results = async_ingest.fetch_urls(["https://a.test/1", "https://a.test/2"], source=pages)
+    assert results[0] == {"source": "https://a.test/1", "text": "ONE", "error": None}
+    assert results[1]["text"] == "" and results[1]["error"]
+
+    transcripts = async_ingest.LocalTranscriptSource({"abc": "hello"})
+    results = async_ingest.fetch_youtube(["https://youtu.be/abc", "not a video"], source=transcripts)
+    assert results[0]["text"] == "hello" and results[1]["error"] == "Invalid YouTube URL format."
+
+
+def test_translation_packs_sentences():
+    backend = async_ingest.LocalTranslateBackend({"Uno.\nDos.": "One.\nTwo."})
+    assert async_ingest.translate_many(["Uno. Dos."], "es", backend=backend) == ["One. Two."]
+    assert backend.requests == 1
+
+
+def test_with_retries_backs_off_then_succeeds():
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise async_ingest.RetryableError("HTTP 503")
+        return "ok"
+
+    assert asyncio.run(async_ingest.with_retries(flaky, retries=3, backoff=0.001)) == "ok"
+    assert len(attempts) == 3
+
+
+def test_rate_limited_translations_are_retried():
+    exceptions = pytest.importorskip("deep_translator.exceptions")
+    attempts = []
+
+    async def rate_limited():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise exceptions.TooManyRequests()
+        return "ok"
+
+    assert asyncio.run(async_ingest.with_retries(rate_limited, backoff=0.001)) == "ok"
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = f'<div class="result-container">{text}</div>'
+
+    def close(self):
+        pass
+
+
+def test_google_backend_keeps_concurrent_chunks_apart(monkeypatch):
+    pytest.importorskip("deep_translator")
+    requests = pytest.importorskip("requests")
+    threads = set()
+
+    def fake_get(url, params=None, **kwargs):
+        threads.add(threading.current_thread().name)
+        time.sleep(0.01)
+        return _Response(params["q"].replace("uno", "one").replace("dos", "two"))
+
+    monkeypatch.setattr(requests, "get", fake_get)
+    backend = async_ingest.GoogleTranslateBackend(max_workers=2)
+
+    async def run():
+        return await asyncio.gather(*(backend.translate(text, "es") for text in ["uno", "dos"] * 4))
+
+    assert asyncio.run(run()) == ["one", "two"] * 4
+    # The requests run on the backend's own pool
+    assert len(threads) <= 2 and all(name.startswith("translate") for name in threads)
+
+
+class _Page:
+    status = 200
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    async def text(self, errors=None):
+        return "<html></html>"
+
+
+class _Session:
+    def get(self, url):
+        return _Page()
+
+
+def test_rate_limit_wait_does_not_count_against_the_timeout():
+    pytest.importorskip("aiohttp")
+    # Two requests per host and second: the third request queues for about a second,
+    # five times the timeout, and still succeeds on its first attempt
+    source = async_ingest.HttpPageSource(per_host_rate=2.0, timeout=0.2, retries=0)
+    source._session = _Session()
+
+    async def run():
+        return await asyncio.gather(*(source.fetch(f"https://a.test/{i}") for i in range(3)))
+
+    start = time.monotonic()
+    assert asyncio.run(run()) == ["<html></html>"] * 3
+    assert time.monotonic() - start >= 0.9
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from scripts import batch_run
+
+
+def record(doc_id, **extra):
+    return dict({"id": doc_id, "source_type": "text", "chars": 12, "error": None, "category": np.str_("business"),
+                 "summary": "s", "lda_topics": [(0, [("market", np.float32(0.1)), ("bank", 0.05)])],
+                 "entities": [("Reuters", "ORG")], "sentiment": "Neutral", "fake_news_label": "REAL",
+                 "fake_news_confidence": np.float32(0.875), "fake_news_windows": None}, **extra)
+
+
+def test_parquet_parts_share_one_schema(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    writer = batch_run.ParquetWriter(str(tmp_path / "out"))
+    writer.write([record("a")])
+    writer.write([record("b", duplicate_of={"key": "k", "similarity": 0.93},
+                         fake_news_windows=[{"start_token": 0, "end_token": 510, "label": "REAL"}])])
+
+    parts = sorted((tmp_path / "out").glob("part-*.parquet"))
+    tables = [pq.read_table(str(part)) for part in parts]
+    assert len(tables) == 2 and tables[0].schema == tables[1].schema == writer.schema
+    first, second = tables[0].to_pylist()[0], tables[1].to_pylist()[0]
+    assert first["duplicate_of"] is None and first["keywords"] == "market, bank"
+    assert first["entities"] == '[["Reuters", "ORG"]]' and first["fake_news_confidence"] == 0.875
+    assert second["duplicate_of"] == '{"key": "k", "similarity": 0.93}'
+
+
+def test_long_document_is_decided_per_item(monkeypatch):
+    analysis = pytest.importorskip("scripts.analysis")
+    calls = []
+
+    def analyze_many(texts, long_document=False, features=None):
+        calls.append((list(texts), long_document))
+        features["clean_texts"] = [text.upper() for text in texts]
+        return [{"summary": f"{text}:{long_document}"} for text in texts]
+
+    monkeypatch.setattr(analysis, "analyze_many", analyze_many)
+    monkeypatch.setattr(batch_run, "_load_texts", lambda items: ({i: f"t{i}" for i, _, _ in items}, {}))
+    records = batch_run.process_batch([("1", "text", "t1"), ("2", "pdf", "a.pdf"), ("3", "text", "t3")],
+                                      with_text=True)
+    assert [r["summary"] for r in records] == ["t1:False", "t2:True", "t3:False"]
+    assert calls == [(["t1", "t3"], False), (["t2"], True)]
+    # The archive gets the preprocessed text analyze_many already made
+    assert [(r["text"], r["clean_text"]) for r in records] == [("t1", "T1"), ("t2", "T2"), ("t3", "T3")]
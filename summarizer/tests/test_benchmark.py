@@ -0,0 +1,43 @@
+import pytest
+
+from scripts import benchmark, registry, stand_ins
+
+
+@pytest.fixture
+def models(monkeypatch):
+    for attr in ("_specs", "_models", "_loaded_versions", "_stats"):
+        monkeypatch.setattr(registry, attr, dict(getattr(registry, attr)))
+
+
+def missing_model(path):
+    raise OSError("model not available offline")
+
+
+def test_failing_stage_is_skipped(nltk_resources, models):
+    registry.register("summarizer", missing_model)
+    results = benchmark.run_benchmarks(stages=("abstractive_summary", "preprocess_text"), samples=1, quick=True)
+    assert results["skipped"] == {"abstractive_summary": "OSError: model not available offline"}
+    assert "abstractive_summary" not in results["stages"]
+    assert set(results["stages"]["preprocess_text"]) == {"short", "medium", "long", "very_long"}
+    assert set(results["throughput"]["preprocess_text"]) == {"1", "4"}
+    assert "preprocess_text" in results["memory"]
+
+
+def test_compare_ignores_skipped_stages():
+    old = {"stages": {"preprocess_text": {"short": {"p50_ms": 1.0}}}}
+    new = {"stages": {}, "skipped": {"preprocess_text": "ImportError: nltk"}}
+    assert benchmark.compare(old, new) == []
+
+
+def test_stand_ins_replace_the_downloaded_models(models):
+    stand_ins.install()
+    for name in ("summarizer", "fake_news", "spacy", "spacy_ner"):
+        assert registry.model_id(name) == f"stand-in:{name}"
+    assert registry.model_id("classifier") is None
+
+
+def test_stand_in_entity_ruler():
+    pytest.importorskip("spacy")
+    doc = stand_ins.make_spacy()("Talks between Anita Rao and the World Bank in New Delhi.")
+    assert [(ent.text, ent.label_) for ent in doc.ents] == [
+        ("Anita Rao", "PERSON"), ("the World Bank", "ORG"), ("New Delhi", "GPE")]
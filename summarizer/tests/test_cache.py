@@ -0,0 +1,63 @@
+import os
+import shutil
+
+from scripts.cache import MISSING, ResultCache, content_fingerprint, document_key, model_fingerprint
+
+
+def test_round_trip_through_memory_and_disk(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    cache = ResultCache(path, max_items=4)
+    cache.set("k", "summary", {"text": "short", "score": None})
+    assert cache.get("k", "summary") == {"text": "short", "score": None}
+
+    reopened = ResultCache(path)
+    assert reopened.get("k", "summary") == {"text": "short", "score": None}
+    assert reopened.get("k", "category") is MISSING
+    assert reopened.stats()["total"] == {"hits": 1, "misses": 1}
+
+
+def test_none_is_a_stored_value():
+    cache = ResultCache(":memory:")
+    cache.set("k", "fake_news", None)
+    assert cache.get("k", "fake_news") is None
+
+
+def test_memory_tier_is_bounded():
+    cache = ResultCache(None, max_items=2)
+    cache.set_many("summary", [("a", 1), ("b", 2), ("c", 3)])
+    assert cache.get("a", "summary") is MISSING
+    assert cache.get("c", "summary") == 3
+    assert cache.stats()["memory_items"] == 2
+
+
+def test_prune_keeps_the_newest_rows(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.sqlite"), max_items=1)
+    for key in "abc":
+        cache.set(key, "summary", key)
+    cache.prune(1)
+    cache._memory.clear()
+    assert cache.get("a", "summary") is MISSING
+
+
+def test_document_key_normalizes_text_and_tracks_models(tmp_path):
+    assert document_key("Hello   world\n", "m1") == document_key("Hello world", "m1")
+    assert document_key("Hello world", "m1") != document_key("Hello world", "m2")
+
+    model = tmp_path / "model.pkl"
+    model.write_bytes(b"v1")
+    before = model_fingerprint([str(model)], ["bart"])
+    model.write_bytes(b"version 2")
+    assert model_fingerprint([str(model)], ["bart"]) != before
+
+
+def test_content_fingerprint_ignores_path_and_mtime(tmp_path):
+    model = tmp_path / "model.pkl"
+    model.write_bytes(b"v1")
+    before = content_fingerprint([str(model)])
+    copy = tmp_path / "copy.pkl"
+    shutil.copy(model, copy)
+    os.utime(copy, ns=(1, 1))
+    assert content_fingerprint([str(copy)]) == before
+    copy.write_bytes(b"v2")
+    assert content_fingerprint([str(copy)]) != before
+    assert content_fingerprint([str(tmp_path / "gone.pkl")]) != before
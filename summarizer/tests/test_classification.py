@@ -0,0 +1,68 @@
+import importlib
+import os
+import random
+
+import pytest
+
+joblib = pytest.importorskip("joblib")
+pytest.importorskip("sklearn")
+
+# The training scripts import their neighbours as top-level modules
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+WORDS = {
+    "business": ["market", "shares", "bank", "profit", "investor", "earnings"],
+    "sports": ["match", "goal", "league", "coach", "striker", "season"],
+}
+
+
+@pytest.fixture
+def classification(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(SCRIPTS_DIR)
+    module = importlib.import_module("classification")
+    monkeypatch.setattr(module, "preprocess_many", lambda texts, **_: [t.lower() for t in texts])
+    monkeypatch.setattr(importlib.import_module("model_store"), "MODELS_DIR", str(tmp_path / "models"))
+    return module
+
+
+def write_csv(path, rows, seed):
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        f.write("text,labels\n")
+        for _ in range(rows):
+            label = rng.choice(sorted(WORDS))
+            f.write(" ".join(rng.choice(WORDS[label]) for _ in range(8)) + f",{label}\n")
+    return str(path)
+
+
+@pytest.mark.parametrize("model, estimator", [("sgd", "SGDClassifier"), ("nb", "MultinomialNB")])
+def test_incremental_training_publishes_a_version(classification, tmp_path, model, estimator):
+    model_store = importlib.import_module("model_store")
+    shards = tmp_path / "shards"
+    shards.mkdir()
+    sources = [write_csv(tmp_path / "a.csv", 120, 1), str(shards)]
+    write_csv(shards / "part-0.csv", 60, 2)
+    write_csv(shards / "part-1.csv", 60, 3)
+
+    version = classification.train_incremental(sources, model=model, n_features=2 ** 12, chunksize=25,
+                                               epochs=3, spool_dir=str(tmp_path))
+
+    assert model_store.current_version("classifier") == version
+    meta = model_store.read_metadata("classifier")
+    assert meta["mode"] == "incremental" and meta["model"] == estimator
+    assert meta["n_train"] + meta["n_test"] == 240 and meta["n_test"] > 0
+    assert meta["classes"] == ["business", "sports"] and meta["accuracy"] >= 0.9
+    # The spool files are removed once the model is trained
+    assert not list(tmp_path.glob("*.spool.jsonl"))
+
+    directory = model_store.version_path("classifier", version)
+    classifier = joblib.load(os.path.join(directory, "classifier_model.pkl"))
+    vectorizer = joblib.load(os.path.join(directory, "tfidf_vectorizer.pkl"))
+    predicted = classifier.predict(vectorizer.transform(["bank profit for investor", "coach and striker goal"]))
+    assert list(predicted) == ["business", "sports"]
+
+
+def test_held_out_rows_are_stable(classification):
+    texts = [f"story {i}" for i in range(1000)]
+    held_out = [classification.is_held_out(text, 0.2) for text in texts]
+    assert held_out == [classification.is_held_out(text, 0.2) for text in texts]
+    assert 150 < sum(held_out) < 250
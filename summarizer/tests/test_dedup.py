@@ -0,0 +1,52 @@
+from scripts import dedup
+from scripts.synthetic_corpus import make_article
+
+
+def clean(text):
+    return " ".join(word.strip(".!?").lower() for word in text.split())
+
+
+def test_similarity_of_edited_copies():
+    text = clean(make_article("medium", seed=1))
+    words = text.split()
+    edited = " ".join(words[:-5] + ["breaking", "update", "from", "the", "wire"])
+    assert dedup.similarity(dedup.signature(text), dedup.signature(text)) == 1.0
+    assert dedup.similarity(dedup.signature(text), dedup.signature(edited)) > 0.9
+    assert dedup.similarity(dedup.signature(text), dedup.signature(clean(make_article("medium", seed=2)))) < 0.2
+    assert dedup.signature("") is None
+
+
+def test_query_finds_inserted_near_duplicates(tmp_path):
+    index = dedup.NearDuplicateIndex(str(tmp_path / "dedup.sqlite"))
+    text = make_article("medium", seed=1)
+    sig = dedup.signature(clean(text))
+    doc = index.insert("key-1", "v1", sig, text, {"summary": "stored"})
+    assert doc is not None and len(index) == 1
+    # The same key and variant is only stored once
+    assert index.insert("key-1", "v1", sig, text, {"summary": "again"}) is None
+
+    copy = text.replace("\n\n", " ", 1)[:-40]
+    match = index.query(dedup.signature(clean(copy)), "v1")
+    assert match is not None and match[0] == doc and match[1] >= dedup.THRESHOLD
+    assert index.load(doc) == ("key-1", text, {"summary": "stored"})
+    # Analyses made with other models or options are not reused
+    assert index.query(sig, "v2") is None
+    assert index.query(dedup.signature(clean(make_article("medium", seed=2))), "v1") is None
+    assert index.query(None, "v1") is None
+
+
+def test_index_is_rebuilt_from_disk(tmp_path):
+    path = str(tmp_path / "dedup.sqlite")
+    sig = dedup.signature(clean(make_article("short", seed=3)))
+    doc = dedup.NearDuplicateIndex(path).insert("key", "v1", sig, "text", {"category": "sport"})
+    reopened = dedup.NearDuplicateIndex(path)
+    assert len(reopened) == 1
+    assert reopened.query(sig, "v1") == (doc, 1.0)
+    reopened.clear()
+    assert len(reopened) == 0 and reopened.query(sig, "v1") is None
+
+
+def test_diff_texts():
+    old = "Markets rallied. Shares rose. Analysts were surprised."
+    new = "Markets rallied. Shares fell. Analysts were surprised. More to follow."
+    assert dedup.diff_texts(old, new) == {"removed": ["Shares rose."], "added": ["Shares fell.", "More to follow."]}
@@ -0,0 +1,101 @@
+import math
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+dataIngestion = pytest.importorskip("scripts.dataIngestion")
+from scripts import registry  # noqa: E402
+
+
+# Stub of the text-classification pipeline. Every word of the text is an integer
+# token id; the FAKE logit of a window is its first token, so "3" scores
+# sigmoid(3) = 0.95 FAKE and "-3" 0.95 REAL.
+class _Tokenizer:
+    pad_token_id = 0
+
+    def __call__(self, text, add_special_tokens=False):
+        return {"input_ids": [int(word) for word in text.split()]}
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def build_inputs_with_special_tokens(self, ids):
+        return [0] + list(ids) + [0]
+
+
+class _Model:
+    device = "cpu"
+    config = SimpleNamespace(id2label={0: "LABEL_0", 1: "LABEL_1"}, num_labels=2)
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, input_ids, attention_mask):
+        self.batches.append(input_ids.tolist())
+        fake = input_ids[:, 1].float()
+        return SimpleNamespace(logits=torch.stack([torch.zeros_like(fake), fake], dim=1))
+
+
+@pytest.fixture
+def model(monkeypatch):
+    for attr in ("_specs", "_models", "_loaded_versions", "_stats"):
+        monkeypatch.setattr(registry, attr, dict(getattr(registry, attr)))
+    stub = _Model()
+    registry.register("fake_news", lambda path: SimpleNamespace(tokenizer=_Tokenizer(), model=stub))
+    return stub
+
+
+def sigmoid(x):
+    return 1 / (1 + math.exp(-x))
+
+
+def test_window_spans(model):
+    # 20 tokens, 6 per window (8 minus 2 special tokens), 2 overlapping
+    result = dataIngestion.detect_fake_news_document(" ".join(["1"] * 20), window=8, overlap=2, early_exit=None)
+    assert result["windows_total"] == result["windows_scored"] == 5
+    assert [(w["start_token"], w["end_token"]) for w in result["windows"]] == [
+        (0, 6), (4, 10), (8, 14), (12, 18), (16, 20)]
+    assert all(len(row) == 8 for batch in model.batches for row in batch)
+
+    spread = dataIngestion.detect_fake_news_document(" ".join(["1"] * 20), window=8, overlap=2, max_windows=3,
+                                                     early_exit=None)
+    assert spread["windows_total"] == 5 and spread["windows_scored"] == 3
+    assert [w["start_token"] for w in spread["windows"]] == [0, 8, 16]
+
+
+def test_mean_and_max_aggregation(model):
+    # Window one is very confidently FAKE, windows two and three mildly REAL
+    text = " ".join(["4"] * 4 + ["-1"] * 8)
+    mean = dataIngestion.detect_fake_news_document(text, window=6, overlap=0, early_exit=None)
+    expected = (sigmoid(4) + 2 * sigmoid(-1)) / 3
+    assert mean["label"] == "FAKE" and mean["confidence"] == round(expected, 3)
+    assert [w["label"] for w in mean["windows"]] == ["FAKE", "REAL", "REAL"]
+    assert mean["windows"][1]["fake_probability"] == round(sigmoid(-1), 3)
+
+    text = " ".join(["1"] * 4 + ["-3"] * 8)
+    mean = dataIngestion.detect_fake_news_document(text, window=6, overlap=0, early_exit=None)
+    top = dataIngestion.detect_fake_news_document(text, window=6, overlap=0, aggregate="max", early_exit=None)
+    assert mean["label"] == "REAL"
+    assert top["label"] == "REAL" and top["confidence"] == round(sigmoid(3), 3)
+
+
+def test_early_exit_stops_after_a_confident_batch(model):
+    text = " ".join(["5"] * 40)
+    result = dataIngestion.detect_fake_news_document(text, window=6, overlap=0, batch_size=2, early_exit=0.95)
+    assert result["early_exit"] and result["windows_scored"] == 2 and result["windows_total"] == 10
+    assert len(model.batches) == 1
+
+    # Below the threshold every window is scored
+    model.batches.clear()
+    result = dataIngestion.detect_fake_news_document(" ".join(["1"] * 40), window=6, overlap=0, batch_size=2,
+                                                     early_exit=0.95)
+    assert not result["early_exit"] and result["windows_scored"] == 10 and len(model.batches) == 5
+
+
+@pytest.mark.parametrize("text, options", [("", {}), ("1 2 3", {"max_windows": 0})])
+def test_nothing_to_score_is_unknown(model, text, options):
+    result = dataIngestion.detect_fake_news_document(text, **options)
+    assert result["label"] == "Unknown" and result["confidence"] == 0.0
+    assert result["windows_scored"] == 0 and result["windows"] == []
+    assert model.batches == []
@@ -0,0 +1,105 @@
+import json
+import re
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+from scripts import instrument
+
+
+class Clock:
+    # Every reading advances by step seconds
+    def __init__(self, step):
+        self.now, self.step = 0.0, step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    monkeypatch.setattr(instrument, "_stats", {})
+    monkeypatch.setattr(instrument, "_events", deque(maxlen=100))
+    monkeypatch.setattr(instrument, "_profiles", {})
+    # Each stage takes 0.5 s wall and 0.25 s CPU, and grows the RSS by 1 MiB
+    monkeypatch.setattr(instrument, "time", SimpleNamespace(perf_counter=Clock(0.5), thread_time=Clock(0.25),
+                                                            time=lambda: 1700000000.0))
+    monkeypatch.setattr(instrument, "current_rss", Clock(1024 * 1024))
+    monkeypatch.setattr(instrument, "peak_rss", lambda: 0)
+    return instrument
+
+
+def test_stage_records_time_and_sizes(stats):
+    with stats.stage("pdf_parse", docs=1) as sizes:
+        sizes.update(pages=12, source="upload.pdf")
+    with stats.stage("pdf_parse", docs=1) as sizes:
+        sizes["pages"] = 4
+
+    snap = stats.snapshot()["pdf_parse"]
+    assert snap["calls"] == 2
+    assert snap["wall_seconds"] == 1.0 and snap["mean_wall_seconds"] == 0.5 and snap["max_wall_seconds"] == 0.5
+    assert snap["cpu_seconds"] == 0.5 and snap["rss_delta_mb"] == 2.0
+    # Only numeric sizes are counted
+    assert snap["docs_total"] == 2 and snap["pages_total"] == 16 and "source_total" not in snap
+    assert snap["pages_per_sec"] == 16.0
+
+
+def test_failed_stages_are_still_timed(stats):
+    with pytest.raises(ValueError):
+        with stats.stage("summarize"):
+            raise ValueError("model failed")
+    assert stats.snapshot()["summarize"]["calls"] == 1
+
+
+def test_instrumented_records_the_sizes_of_the_result(stats):
+    @stats.instrumented("sentiment", lambda result, texts: {"docs": len(texts), "chars": sum(map(len, texts))})
+    def score(texts):
+        return [len(text) for text in texts]
+
+    assert score(["ab", "cde"]) == [2, 3]
+    snap = stats.snapshot()["sentiment"]
+    assert snap["docs_total"] == 2 and snap["chars_total"] == 5
+    events = [json.loads(line) for line in stats.to_jsonl().splitlines()]
+    assert events == [{"stage": "sentiment", "time": 1700000000.0, "wall_seconds": 0.5, "cpu_seconds": 0.25,
+                       "rss_delta_bytes": 1024 * 1024, "peak_rss_delta_bytes": 0, "docs": 2, "chars": 5}]
+
+
+def test_prometheus_text_format(stats):
+    with stats.stage("summarize", docs=2):
+        pass
+    with stats.stage("ner"):
+        pass
+
+    assert stats.to_prometheus() == (
+        "# TYPE newssense_stage_calls_total counter\n"
+        'newssense_stage_calls_total{stage="ner"} 1\n'
+        'newssense_stage_calls_total{stage="summarize"} 1\n'
+        "# TYPE newssense_stage_wall_seconds_total counter\n"
+        'newssense_stage_wall_seconds_total{stage="ner"} 0.5\n'
+        'newssense_stage_wall_seconds_total{stage="summarize"} 0.5\n'
+        "# TYPE newssense_stage_cpu_seconds_total counter\n"
+        'newssense_stage_cpu_seconds_total{stage="ner"} 0.25\n'
+        'newssense_stage_cpu_seconds_total{stage="summarize"} 0.25\n'
+        "# TYPE newssense_stage_max_wall_seconds gauge\n"
+        'newssense_stage_max_wall_seconds{stage="ner"} 0.5\n'
+        'newssense_stage_max_wall_seconds{stage="summarize"} 0.5\n'
+        "# TYPE newssense_stage_peak_rss_delta_bytes gauge\n"
+        'newssense_stage_peak_rss_delta_bytes{stage="ner"} 0\n'
+        'newssense_stage_peak_rss_delta_bytes{stage="summarize"} 0\n'
+        "# TYPE newssense_stage_input_total counter\n"
+        'newssense_stage_input_total{stage="summarize",unit="docs"} 2\n'
+    )
+
+
+def test_prometheus_lines_parse(stats):
+    with stats.stage("fake_news", docs=3, chars=1200):
+        pass
+    sample = re.compile(r'^[a-z_]+\{stage="[a-z_]+"(,unit="[a-z_]+")?\} -?[0-9.e+-]+$')
+    lines = stats.to_prometheus(prefix="app").splitlines()
+    assert all(line.startswith("# TYPE app_") or sample.match(line) for line in lines)
+    assert all(line.startswith("app_") for line in lines if not line.startswith("#"))
+    # Each metric is declared once, before its samples
+    declared = [line.split()[2] for line in lines if line.startswith("# TYPE")]
+    assert len(declared) == len(set(declared)) == 6
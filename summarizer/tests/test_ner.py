@@ -0,0 +1,59 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from scripts import ner, registry
+from scripts.synthetic_corpus import make_article
+
+
+def test_sentence_spans():
+    text = "First one. Second one!  Third"
+    assert [text[s:e] for s, e in ner.sentence_spans(text)] == ["First one.", "Second one!", "Third"]
+
+
+@pytest.mark.parametrize("max_chars", [40, 200, 1000])
+def test_chunk_offsets_point_into_the_text(max_chars):
+    text = make_article("medium", seed=3)
+    chunks = ner.chunk_text(text, max_chars)
+    assert len(chunks) > 1
+    for offset, chunk in chunks:
+        assert text[offset:offset + len(chunk)] == chunk
+        assert len(chunk) <= max_chars
+    # In order, without overlap, and no word is lost
+    ends = [offset + len(chunk) for offset, chunk in chunks]
+    assert all(end <= offset for end, (offset, _) in zip(ends, chunks[1:]))
+    assert " ".join(chunk for _, chunk in chunks).split() == text.split()
+
+
+def test_overlong_sentence_is_cut_at_whitespace():
+    text = " ".join(["word"] * 50) + "."
+    chunks = ner.chunk_text(text, max_chars=32)
+    assert all(len(chunk) <= 32 and set(chunk.split()) <= {"word", "word."} for _, chunk in chunks)
+    assert " ".join(chunk for _, chunk in chunks).split() == text.split()
+
+
+def test_short_and_blank_texts():
+    assert ner.chunk_text("Short text.", 100) == [(0, "Short text.")]
+    assert ner.chunk_text("   ", 100) == []
+
+
+# Tags every "Reuters" in a chunk, with offsets relative to the chunk like spaCy
+class _FakeNLP:
+    max_length = 1000000
+
+    def pipe(self, items, as_tuples=False, **_):
+        for chunk, context in items:
+            ents = [SimpleNamespace(text=m.group(), label_="ORG", start_char=m.start(), end_char=m.end())
+                    for m in re.finditer("Reuters", chunk)]
+            yield SimpleNamespace(ents=ents), context
+
+
+def test_mention_offsets_are_relative_to_the_document(monkeypatch):
+    monkeypatch.setattr(registry, "get", lambda name: _FakeNLP())
+    text = " ".join(f"Sentence {i} quoted Reuters today." for i in range(30))
+    mentions = ner.extract_mentions([text, ""], max_chars=100)
+    assert len(mentions[0]) == 30 and mentions[1] == []
+    assert all(text[m["start"]:m["end"]] == "Reuters" for m in mentions[0])
+    merged = ner.merge_mentions(mentions[0])
+    assert merged[0]["count"] == 30 and merged[0]["offsets"][0] == (mentions[0][0]["start"], mentions[0][0]["end"])
@@ -0,0 +1,43 @@
+import io
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+from scripts import pdf_ingest  # noqa: E402
+from scripts.synthetic_corpus import make_pdf  # noqa: E402
+
+PAGES = 23
+
+
+@pytest.fixture(scope="module")
+def pdf(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("pdf") / "synthetic.pdf")
+    make_pdf(path, pages=PAGES)
+    with fitz.open(path) as doc:
+        pages = [page.get_text() for page in doc]
+    return path, pages
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_page_ranges_come_back_in_order_and_cover_every_page(pdf, workers):
+    path, pages = pdf
+    ranges = list(pdf_ingest.iter_page_ranges(path, pages_per_range=5, workers=workers, ocr_dpi=0))
+    assert [start for start, _ in ranges] == [0, 5, 10, 15, 20]
+    assert [len(texts) for _, texts in ranges] == [5, 5, 5, 5, 3]
+    assert [text for _, texts in ranges for text in texts] == pages
+
+
+def test_uploaded_files_match_paths(pdf):
+    path, pages = pdf
+    with open(path, "rb") as f:
+        upload = io.BytesIO(f.read())
+    assert list(pdf_ingest.iter_pdf_pages(upload, start=20, ocr_dpi=0)) == pages[20:]
+    assert pdf_ingest.extract_pdf_text(upload, ocr_dpi=0) == "".join(pages)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_extract_text_from_pdf_joins_the_ranges(pdf, workers):
+    dataIngestion = pytest.importorskip("scripts.dataIngestion")
+    path, pages = pdf
+    text = "".join(t for _, texts in pdf_ingest.iter_page_ranges(path, workers=workers, ocr_dpi=0) for t in texts)
+    assert dataIngestion.extract_text_from_pdf(path, workers=workers) == text == "".join(pages)
@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+from scripts.preprocess import fast_tokenize, preprocess_many, preprocess_text
+
+pytestmark = pytest.mark.usefixtures("nltk_resources")
+
+
+def test_preprocess_text():
+    assert preprocess_text("The Cats were running, in 2024!") == "cat running"
+
+
+def test_fast_tokenize_splits_like_word_tokenize():
+    assert fast_tokenize("i cannot go gonna") == ["i", "can", "not", "go", "gon", "na"]
+
+
+def test_preprocess_many_list():
+    result = preprocess_many(["The cats", None, "Dogs and birds"])
+    assert result == ["cat", "", "dog bird"]
+    assert isinstance(result, list)
+
+
+def test_preprocess_many_series_keeps_index():
+    texts = pd.Series(["The cats", "Dogs and birds"], index=[10, 20])
+    result = preprocess_many(texts)
+    assert isinstance(result, pd.Series)
+    assert result.to_dict() == {10: "cat", 20: "dog bird"}
+
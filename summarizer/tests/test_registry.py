@@ -0,0 +1,55 @@
+import pytest
+
+from scripts import model_store, registry
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_store, "MODELS_DIR", str(tmp_path))
+    monkeypatch.setattr(registry, "VERSION_CHECK_SECONDS", 0)
+    for attr in ("_specs", "_models", "_loaded_versions", "_stats", "_version_checks"):
+        monkeypatch.setattr(registry, attr, dict(getattr(registry, attr)))
+    return tmp_path
+
+
+def publish(kind, files):
+    version, path = model_store.new_version(kind)
+    for name, content in files.items():
+        with open(f"{path}/{name}", "w") as f:
+            f.write(content)
+    model_store.publish(kind, version)
+    return version
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_get_follows_the_published_version(store):
+    (store / "vec.txt").write_text("flat")
+    registry.register("vec", read, "vec.txt", kind="pair")
+    assert registry.get("vec") == "flat"
+    publish("pair", {"vec.txt": "v1"})
+    assert registry.get("vec") == "v1"
+
+
+def test_get_many_pairs_models_of_one_version(store):
+    publish("pair", {"vec.txt": "vec-1", "clf.txt": "clf-1"})
+
+    # A new version is published while the first model of the pair is loading
+    def load_and_publish(path):
+        publish("pair", {"vec.txt": "vec-2", "clf.txt": "clf-2"})
+        return read(path)
+
+    registry.register("vec", load_and_publish, "vec.txt", kind="pair")
+    registry.register("clf", read, "clf.txt", kind="pair")
+    assert registry.get_many("vec", "clf") == ("vec-1", "clf-1")
+
+    registry.register("vec", read, "vec.txt", kind="pair")
+    assert registry.get_many("vec", "clf") == ("vec-2", "clf-2")
+
+
+def test_unknown_model(store):
+    with pytest.raises(KeyError):
+        registry.get_many("no_such_model")
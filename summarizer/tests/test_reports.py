@@ -0,0 +1,77 @@
+import glob
+import os
+import shutil
+
+import pytest
+
+from scripts import reports
+
+fitz = pytest.importorskip("fitz")
+
+
+def system_ttf():
+    for pattern in ("/usr/share/fonts/**/*.ttf", "/Library/Fonts/*.ttf", "C:/Windows/Fonts/*.ttf"):
+        for path in glob.glob(pattern, recursive=True):
+            return path
+    return None
+
+
+@pytest.fixture
+def font_dir(tmp_path, monkeypatch):
+    fonts = tmp_path / "fonts"
+    fonts.mkdir()
+    monkeypatch.setattr(reports, "FONT_SEARCH_PATHS", (str(fonts),))
+    reports._installed_fonts.cache_clear()
+    yield fonts
+    reports._installed_fonts.cache_clear()
+
+
+def records(n):
+    return [{"id": f"Story {i}", "category": "business", "summary": "Markets rallied after the report. " * 20,
+             "lda_topics": [[0, [["market", 0.1], ["shares", 0.05]]]], "sentiment": "Positive",
+             "entities": [["Reuters", "ORG"], ["London", "GPE"]]} for i in range(n)]
+
+
+def test_find_font_prefers_noto_with_its_bold_face(font_dir):
+    for name in ("DejaVuSans.ttf", "DejaVuSans-Bold.ttf", "NotoSans-Regular.ttf", "NotoSans-Bold.ttf",
+                 "Lohit-Telugu.ttf"):
+        (font_dir / name).write_bytes(b"")
+    assert reports.find_font() == (str(font_dir / "NotoSans-Regular.ttf"), str(font_dir / "NotoSans-Bold.ttf"))
+    assert reports.find_font("telugu") == (str(font_dir / "Lohit-Telugu.ttf"), None)
+    assert reports.find_font("devanagari") is None
+    assert reports.report_fonts("/my/font.ttf")["latin"] == ("/my/font.ttf", None)
+
+
+def test_core_font_when_no_font_is_installed(font_dir, tmp_path):
+    writer = reports.ReportWriter()
+    assert not writer.unicode
+    writer.article(reports.article_fields({"summary": "Zoë said “hello” ✓", "category": "world"}))
+    path = writer.save(str(tmp_path / "report.pdf"))
+    with fitz.open(path) as doc:
+        assert "Zoë said ?hello? ?" in doc[0].get_text()
+
+
+def test_digest_appends_parts_with_bookmarks(font_dir, tmp_path):
+    path = reports.build_digest(records(7), str(tmp_path / "out" / "digest.pdf"), workers=1, part_size=3)
+    assert os.listdir(tmp_path / "out") == ["digest.pdf"]
+    with fitz.open(path) as doc:
+        toc = doc.get_toc()
+        assert [title for _, title, _ in toc] == [f"{i}. Story {i - 1}" for i in range(1, 8)]
+        for _, title, page in toc:
+            assert doc[page - 1].get_text().startswith(title)
+
+
+def test_unicode_font_and_bold_face_are_embedded(font_dir, tmp_path):
+    ttf = system_ttf()
+    if ttf is None:
+        pytest.skip("no TTF font on this machine")
+    shutil.copy(ttf, font_dir / "NotoSans-Regular.ttf")
+    shutil.copy(ttf, font_dir / "NotoSans-Bold.ttf")
+    shutil.copy(ttf, font_dir / "NotoSansDevanagari-Regular.ttf")
+    writer = reports.ReportWriter()
+    writer.article(reports.article_fields({"summary": "Résumé — “quotes” नमस्ते", "category": "world"}))
+    assert writer._added == {"latin": True, "devanagari": False}
+    path = writer.save(str(tmp_path / "report.pdf"))
+    with fitz.open(path) as doc:
+        assert "Résumé — “quotes”" in doc[0].get_text()
+        assert len(doc.get_page_fonts(0)) == 3
@@ -0,0 +1,61 @@
+import re
+
+import pytest
+
+from scripts import registry, sentiment
+from scripts.synthetic_corpus import make_article
+
+textblob = pytest.importorskip("textblob")
+
+
+@pytest.fixture
+def lexicon(tmp_path, monkeypatch):
+    for attr in ("_specs", "_models", "_loaded_versions", "_stats"):
+        monkeypatch.setattr(registry, attr, dict(getattr(registry, attr)))
+    path = str(tmp_path / sentiment.LEXICON_FILE)
+    registry.register("sentiment_lexicon", lambda _: sentiment.load_lexicon(path))
+
+
+@pytest.mark.parametrize("text", [
+    "I didn't like it, but they can't and won't stop.",
+    "Café naïve rock'n'roll, n't, 'quoted' and ALL CAPS!",
+    "tabs\tnew\nlines\x01and\x02control characters",
+])
+def test_tokenize_matches_the_regex(text):
+    text = text.lower()
+    assert sentiment.tokenize(text) == re.findall(r"[a-z]+(?=n't)|n't|[a-z]+", text)
+
+
+# Single sentences TextBlob's PatternAnalyzer scores the same way
+@pytest.mark.parametrize("text", [
+    "The food was very good.",
+    "The movie was not good at all.",
+    "The results were bad and the service was slow.",
+    "The new policy is extremely popular with voters.",
+    "It is a table.",
+])
+def test_sentence_scores_match_textblob(lexicon, text):
+    expected = textblob.TextBlob(text).sentiment
+    result = sentiment.score_documents([text])[0]
+    assert result["polarity"] == pytest.approx(expected.polarity, abs=1e-3)
+    assert result["subjectivity"] == pytest.approx(expected.subjectivity, abs=1e-3)
+
+
+# Documents are averaged over words rather than scored as one blob, so only the sign is compared
+def test_document_polarity_sign_matches_textblob(lexicon):
+    texts = [make_article("short", seed=i) for i in range(50)] + [make_article("medium", seed=i) for i in range(10)]
+    results = sentiment.score_documents(texts)
+    for text, result in zip(texts, results):
+        expected = textblob.TextBlob(text).sentiment.polarity
+        assert (result["polarity"] > 0) == (expected > 0) and (result["polarity"] < 0) == (expected < 0)
+
+
+def test_sentences_and_shares(lexicon):
+    text = "The food was very good.  The service was terrible! It is a table.  "
+    result = sentiment.score_documents([text, "", "   "])
+    assert result[0]["sentences"] == 3
+    assert (result[0]["positive_share"], result[0]["negative_share"]) == (0.3333, 0.3333)
+    assert result[0]["most_positive"] == [("The food was very good.", 0.91)]
+    assert result[0]["most_negative"][0][0] == "The service was terrible!"
+    assert [r["sentences"] for r in result[1:]] == [0, 1]
+    assert all(r["label"] == "Neutral" for r in result[1:])
@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from scripts.server import MicroBatcher, QueueFull
+
+
+def test_requests_are_grouped_into_batches():
+    batches = []
+    batcher = MicroBatcher(lambda items: batches.append(items) or [item.upper() for item in items],
+                           max_batch_size=4, max_wait=0.2)
+    futures = [batcher.submit(text) for text in ["ccc", "a", "bb"]]
+    assert [f.result(timeout=5) for f in futures] == ["CCC", "A", "BB"]
+    # Sorted by size inside the batch
+    assert batches == [["a", "bb", "ccc"]]
+    assert batcher.stats()["mean_batch_size"] == 3.0
+
+
+def test_handler_errors_reach_every_request():
+    def fail(items):
+        raise ValueError("model failed")
+
+    batcher = MicroBatcher(fail, max_wait=0.05)
+    future = batcher.submit("x")
+    with pytest.raises(ValueError, match="model failed"):
+        future.result(timeout=5)
+
+
+def test_short_result_lists_fail_instead_of_hanging():
+    batcher = MicroBatcher(lambda items: items[:1], max_batch_size=2, max_wait=0.2)
+    futures = [batcher.submit("a"), batcher.submit("b")]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="1 results for 2 requests"):
+            future.result(timeout=5)
+
+
+@pytest.mark.parametrize("handler", [lambda items: None, lambda items: (1 / 0 for _ in items)])
+def test_bad_results_keep_the_batcher_running(handler):
+    calls = []
+
+    def flaky(items):
+        calls.append(items)
+        return handler(items) if len(calls) == 1 else items
+
+    batcher = MicroBatcher(flaky, max_wait=0.05)
+    with pytest.raises((TypeError, ZeroDivisionError)):
+        batcher.submit("broken").result(timeout=5)
+    assert batcher.submit("next").result(timeout=5) == "next"
+
+
+def test_cancelled_requests_are_skipped():
+    release = threading.Event()
+    batcher = MicroBatcher(lambda items: release.wait(5) and items, max_batch_size=1, max_wait=0)
+    first = batcher.submit("running")
+    while batcher.depth():
+        time.sleep(0.001)
+    cancelled = batcher.submit("cancelled")
+    assert cancelled.cancel()
+    release.set()
+    assert first.result(timeout=5) == "running"
+    assert batcher.submit("after").result(timeout=5) == "after"
+
+
+def test_full_queue_is_refused():
+    release = threading.Event()
+
+    def blocked(items):
+        release.wait(5)
+        return items
+
+    batcher = MicroBatcher(blocked, max_batch_size=1, max_wait=0, max_queue=1)
+    first = batcher.submit("running")
+    # Wait until the worker has taken the first item, then fill the queue
+    while batcher.depth():
+        time.sleep(0.001)
+    batcher.submit("queued")
+    with pytest.raises(QueueFull):
+        batcher.submit("refused")
+    release.set()
+    assert first.result(timeout=5) == "running"
@@ -0,0 +1,92 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from scripts import registry, summarization
+from scripts.summarization import MAX_INPUT_TOKENS, split_windows, spread_windows
+
+
+def test_short_input_is_one_window():
+    assert split_windows(list(range(10)), window_size=10) == [list(range(10))]
+    assert split_windows([], window_size=10) == [[]]
+
+
+def test_windows_overlap_and_cover_every_token():
+    ids = list(range(100))
+    windows = split_windows(ids, window_size=30, overlap=10)
+    assert [w[0] for w in windows] == [0, 20, 40, 60, 80]
+    for before, after in zip(windows, windows[1:]):
+        assert before[-10:] == after[:10]
+    assert windows[-1][-1] == 99
+    assert sorted(set(t for w in windows for t in w)) == ids
+
+
+def test_windows_are_capped():
+    ids = list(range(5000))
+    assert all(len(w) <= 40 for w in split_windows(ids, window_size=40, overlap=39))
+    assert max(len(w) for w in split_windows(ids)) == MAX_INPUT_TOKENS - 2
+    # An overlap as large as the window still advances one token at a time
+    assert len(split_windows(list(range(12)), window_size=10, overlap=10)) == 3
+
+
+def test_spread_windows_keeps_the_ends_and_spaces_evenly():
+    windows = list(range(33))
+    assert spread_windows(windows, None) == windows
+    assert spread_windows(windows, 40) == windows
+    assert spread_windows(windows, 1) == [0]
+    assert spread_windows(windows, 5) == [0, 8, 16, 24, 32]
+    kept = spread_windows(list(range(100)), 7)
+    assert kept[0] == 0 and kept[-1] == 99
+    gaps = [b - a for a, b in zip(kept, kept[1:])]
+    assert max(gaps) - min(gaps) <= 1
+
+
+# BART stand-in: token ids are the words of the text, and the "summary" of a
+# window is its first token
+class _Tokenizer:
+    all_special_ids = [0]
+
+    def __call__(self, text, add_special_tokens=False):
+        return {"input_ids": [int(word) for word in text.split()]}
+
+    def build_inputs_with_special_tokens(self, ids):
+        return [0] + list(ids) + [0]
+
+    def decode(self, ids, skip_special_tokens=True):
+        return " ".join(str(t) for t in ids)
+
+
+@pytest.fixture
+def bart(monkeypatch):
+    for attr in ("_specs", "_models", "_loaded_versions", "_stats"):
+        monkeypatch.setattr(registry, attr, dict(getattr(registry, attr)))
+    registry.register("summarizer", lambda path: SimpleNamespace(tokenizer=_Tokenizer()))
+    calls = []
+
+    def generate(id_lists, **options):
+        calls.append(len(id_lists))
+        time.sleep(0.02)
+        return [[0, ids[1], 0] for ids in id_lists]
+
+    monkeypatch.setattr(summarization, "generate_from_ids", generate)
+    return calls
+
+
+# Four windows, each of a single repeated token
+DOCUMENT = " ".join(str(window) for window in range(1, 5) for _ in range(MAX_INPUT_TOKENS - 2))
+
+
+def test_long_document_map_then_reduce(bart):
+    details = summarization.long_document_summary(DOCUMENT, overlap=0, batch_size=2, return_details=True)
+    assert details["windows_total"] == details["windows_used"] == 4
+    assert details["reduce_rounds"] == 1 and details["summary"] == "1"
+
+
+def test_time_budget_also_stops_the_reduce_rounds(bart):
+    details = summarization.long_document_summary(DOCUMENT, overlap=0, batch_size=2, time_budget=0.001,
+                                                  return_details=True)
+    # The first map batch always runs; after it the budget is spent
+    assert details["windows_used"] == 2 and details["reduce_rounds"] == 0
+    assert details["summary"] == "1 2"
+    assert bart == [2]
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from scripts import cache, registry, tiered
+from scripts.cache import MISSING, ResultCache, document_key
+from scripts.preprocess import preprocess_many
+from scripts.server import MicroBatcher, QueueFull
+from scripts.synthetic_corpus import make_article
+
+TfidfVectorizer = pytest.importorskip("sklearn.feature_extraction.text").TfidfVectorizer
+
+TEXT = make_article("medium", seed=1)
+
+
+@pytest.fixture
+def models(nltk_resources, monkeypatch):
+    for attr in ("_specs", "_models", "_loaded_versions", "_stats"):
+        monkeypatch.setattr(registry, attr, dict(getattr(registry, attr)))
+    vectorizer = TfidfVectorizer().fit(preprocess_many([make_article("medium", seed=i) for i in range(10)]))
+    registry.register("tfidf", lambda path: vectorizer)
+    monkeypatch.setattr(tiered, "_summary_key", lambda text: document_key(text, "test"))
+    monkeypatch.setattr(cache, "_default_cache", ResultCache(None))
+    return cache._default_cache
+
+
+# BART stand-in: answers once released, and records every batch
+class FakeBart:
+    def __init__(self, released=True):
+        self.release = threading.Event()
+        if released:
+            self.release.set()
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        self.release.wait(5)
+        return [f"bart: {text[:20]}" for text in texts]
+
+
+def summarizer(bart, seconds=1.0, **batcher_options):
+    estimator = tiered.LatencyEstimator()
+    estimator.seconds = seconds
+    batcher = MicroBatcher(bart, max_batch_size=1, max_wait=0, **batcher_options)
+    return tiered.TieredSummarizer(batcher=batcher, estimator=estimator)
+
+
+def wait_until(condition, seconds=5):
+    deadline = time.monotonic() + seconds
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_budget_below_the_estimate_is_extractive(models):
+    bart = FakeBart()
+    answer = summarizer(bart, seconds=1.0).summarize(TEXT, budget=0.1)
+    assert answer["tier"] == "extractive" and answer["upgrade"] is None
+    assert answer["summary"] == tiered.extractive_summary(TEXT)
+    assert answer["estimated_abstractive_seconds"] == 1.0
+    assert bart.batches == []
+
+
+def test_budget_above_the_estimate_is_abstractive_then_cached(models):
+    bart = FakeBart()
+    tiers = summarizer(bart, seconds=0.01)
+    answer = tiers.summarize(TEXT, budget=5)
+    assert answer["tier"] == "abstractive" and answer["summary"] == f"bart: {TEXT[:20]}"
+    # The cache is filled by a callback on the batcher thread
+    wait_until(lambda: models.get(document_key(TEXT, "test"), "summary") is not MISSING)
+    again = tiers.summarize(TEXT, budget=0.001)
+    assert again["tier"] == "cached" and again["summary"] == answer["summary"]
+    assert len(bart.batches) == 1
+    assert tiers.stats()["tiers"] == {"extractive": 0, "abstractive": 1, "cached": 1}
+
+
+def test_upgrade_fills_the_cache(models):
+    bart = FakeBart(released=False)
+    tiers = summarizer(bart, seconds=1.0)
+    answer = tiers.summarize(TEXT, budget=0.1, upgrade=True)
+    assert answer["tier"] == "extractive"
+    bart.release.set()
+    assert answer["upgrade"].result(timeout=5) == f"bart: {TEXT[:20]}"
+    wait_until(lambda: models.get(document_key(TEXT, "test"), "summary") is not MISSING)
+    assert tiers.summarize(TEXT, budget=0.1)["tier"] == "cached"
+
+
+def test_full_queue_falls_back(models):
+    bart = FakeBart(released=False)
+    tiers = summarizer(bart, seconds=0.001, max_queue=1)
+    tiers.batcher.submit("running")
+    wait_until(lambda: tiers.batcher.depth() == 0)
+    tiers.batcher.submit("queued")
+    answer = tiers.summarize(TEXT, budget=5)
+    assert answer["tier"] == "extractive"
+    with pytest.raises(QueueFull):
+        tiers.summarize(TEXT, tier="abstractive")
+    bart.release.set()
+
+
+def test_missed_deadline_falls_back(models, monkeypatch):
+    bart = FakeBart(released=False)
+    tiers = summarizer(bart, seconds=0.001)
+    start = time.perf_counter()
+    assert tiers.summarize(TEXT, budget=0.2)["tier"] == "extractive"
+    assert time.perf_counter() - start < 2
+    # Without a budget or timeout the wait is still bounded
+    monkeypatch.setattr(tiered, "MIN_ABSTRACTIVE_TIMEOUT_SECONDS", 0.1)
+    assert tiers.summarize(TEXT + " More.")["tier"] == "extractive"
+    with pytest.raises(tiered.FutureTimeout):
+        tiers.summarize(TEXT + " Again.", tier="abstractive", timeout=0.05)
+    bart.release.set()
+
+
+def test_empty_text(models):
+    tiers = summarizer(FakeBart(), seconds=1.0)
+    for answer in (tiers.summarize("", budget=0.1), tiers.summarize("", tier="extractive")):
+        assert answer["summary"] == "" and answer["tier"] == "extractive"
+    assert tiered.extractive_summary("   ") == ""
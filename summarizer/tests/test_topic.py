@@ -0,0 +1,65 @@
+import importlib
+import os
+import random
+
+import pytest
+
+pytest.importorskip("gensim")
+
+# The training scripts import their neighbours as top-level modules
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+WORDS = ["market", "shares", "bank", "profit", "match", "goal", "league", "coach",
+         "vote", "election", "minister", "court", "film", "album", "festival", "actor"]
+
+
+@pytest.fixture
+def topic(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(SCRIPTS_DIR)
+    module = importlib.import_module("topic")
+    monkeypatch.setattr(module, "preprocess_many", lambda texts, **_: [t.lower() for t in texts])
+    monkeypatch.setattr(importlib.import_module("model_store"), "MODELS_DIR", str(tmp_path / "models"))
+    return module
+
+
+def write_csv(path, rows, seed):
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        f.write("text\n")
+        for _ in range(rows):
+            f.write(" ".join(rng.choice(WORDS) for _ in range(6)) + "\n")
+    return str(path)
+
+
+def test_update_publishes_a_new_version(topic, tmp_path):
+    model_store = importlib.import_module("model_store")
+    base, _, _, _ = topic.train_lda_streaming([write_csv(tmp_path / "a.csv", 60, 1)], num_topics=3,
+                                              workers=1, passes=1)
+    version, model, corpus, _ = topic.update_lda_model([write_csv(tmp_path / "b.csv", 30, 2)], passes=2)
+
+    assert model_store.current_version("lda") == version != base
+    meta = model_store.read_metadata("lda")
+    assert meta["mode"] == "update" and meta["base_version"] == base and meta["num_docs"] == 30
+    assert model.passes == 2
+
+    # The topic summary of the update covers the documents of both trainings
+    everything = topic.lineage_corpus(version)
+    assert len(everything) == 90
+    topic_data = topic.get_topic_data(model, everything, None)
+    assert sum(size for _, _, size, _, _, _ in topic_data) == 90
+    assert len(topic.lineage_corpus(base)) == 60
+
+
+def test_failed_update_leaves_no_version_behind(topic, tmp_path):
+    model_store = importlib.import_module("model_store")
+    topic.train_lda_streaming([write_csv(tmp_path / "a.csv", 60, 1)], num_topics=3, workers=1, passes=1)
+    before = model_store.list_versions("lda")
+    with pytest.raises(FileNotFoundError):
+        topic.update_lda_model([str(tmp_path / "missing.csv")])
+    assert model_store.list_versions("lda") == before
+
+
+def test_summary_names_the_threshold(topic):
+    topic_data = [(0, ["market", "bank"], 3, 0.4, 0.6, 2)]
+    assert "Docs Above 0.1" in topic.topic_summary_frame(topic_data).columns
+    frame = topic.topic_summary_frame(topic_data, threshold=0.25)
+    assert "Docs Above 0.25" in frame.columns and "Docs Above 0.1" not in frame.columns